@@ -2,8 +2,10 @@ from abc import ABC, abstractmethod
 from contextlib import asynccontextmanager
 from typing import List, Optional
 
-from pydantic import BaseModel, Field, model_validator
+from pydantic import BaseModel, Field, PrivateAttr, model_validator
 
+from app.config import config
+from app.event_stream import EventType, emit
 from app.llm import LLM
 from app.logger import logger
 from app.sandbox.client import SANDBOX_CLIENT
@@ -42,6 +44,14 @@ class BaseAgent(BaseModel, ABC):
 
     duplicate_threshold: int = 2
 
+    # Set by AgentPool, whose lifecycle task owns the agent's resources
+    pooled: bool = Field(
+        default=False, description="Whether resources outlive a single run"
+    )
+
+    # Restored by reset(), stuck handling prepends to next_step_prompt
+    _initial_next_step_prompt: Optional[str] = PrivateAttr(default=None)
+
     class Config:
         arbitrary_types_allowed = True
         extra = "allow"  # Allow extra fields for flexibility in subclasses
@@ -53,6 +63,15 @@ class BaseAgent(BaseModel, ABC):
             self.llm = LLM(config_name=self.name.lower())
         if not isinstance(self.memory, Memory):
             self.memory = Memory()
+        # Apply configured compaction settings unless set explicitly
+        for field in (
+            "keep_recent_messages",
+            "observation_preview_chars",
+            "keep_recent_images",
+        ):
+            if field not in self.memory.model_fields_set:
+                setattr(self.memory, field, getattr(config.memory, field))
+        self._initial_next_step_prompt = self.next_step_prompt
         return self
 
     @asynccontextmanager
@@ -138,6 +157,13 @@ class BaseAgent(BaseModel, ABC):
             ):
                 self.current_step += 1
                 logger.info(f"Executing step {self.current_step}/{self.max_steps}")
+                self.compact_memory()
+                await emit(
+                    EventType.STEP_START,
+                    agent=self.name,
+                    step=self.current_step,
+                    max_steps=self.max_steps,
+                )
                 step_result = await self.step()
 
                 # Check for stuck state
@@ -145,6 +171,12 @@ class BaseAgent(BaseModel, ABC):
                     self.handle_stuck_state()
 
                 results.append(f"Step {self.current_step}: {step_result}")
+                await emit(
+                    EventType.STEP_END,
+                    agent=self.name,
+                    step=self.current_step,
+                    result=step_result,
+                )
 
             if self.current_step >= self.max_steps:
                 self.current_step = 0
@@ -153,6 +185,30 @@ class BaseAgent(BaseModel, ABC):
         await SANDBOX_CLIENT.cleanup()
         return "\n".join(results) if results else "No steps executed"
 
+    async def reset(self) -> None:
+        """Return the agent to a fresh IDLE state so it can serve a new request"""
+        self.memory.clear()
+        self.state = AgentState.IDLE
+        self.current_step = 0
+        self.next_step_prompt = self._initial_next_step_prompt
+
+    def is_healthy(self) -> bool:
+        """Whether the agent can be reused for another request"""
+        return self.state == AgentState.IDLE
+
+    def compact_memory(self) -> None:
+        """Keep memory within the configured token budget before each step"""
+        settings = config.memory
+        budget = settings.max_context_tokens
+        if self.llm.max_input_tokens:
+            budget = min(budget or self.llm.max_input_tokens, self.llm.max_input_tokens)
+        self.memory.compact(
+            budget,
+            token_counter=self.llm.token_counter.count_message,
+            trigger=settings.compaction_trigger,
+            target=settings.compaction_target,
+        )
+
     @abstractmethod
     async def step(self) -> str:
         """Execute a single step in the agent's workflow.
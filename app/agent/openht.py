@@ -130,6 +130,20 @@ class OpenHT(ToolCallAgent):
         self.available_tools = ToolCollection(*base_tools)
         self.available_tools.add_tools(*self.mcp_clients.tools)
 
+    async def reset(self) -> None:
+        """Ajanı yeni bir istek için sıfırla, MCP bağlantıları açık kalır."""
+        await super().reset()
+        # Tarayıcı oturumu bir sonraki kullanıcıya taşınmamalı
+        if self.browser_context_helper:
+            await self.browser_context_helper.cleanup_browser()
+
+    def is_healthy(self) -> bool:
+        """Ajan ve bağlı tüm MCP sunucuları yeniden kullanılabilir mi?"""
+        return super().is_healthy() and all(
+            server_id in self.mcp_clients.sessions
+            for server_id in self.connected_servers
+        )
+
     async def cleanup(self):
         """OpenHT ajan kaynaklarını temizle."""
         if self.browser_context_helper:
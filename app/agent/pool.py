@@ -0,0 +1,298 @@
+"""Pool of pre-initialized agents.
+
+Creating an agent can be expensive (MCP servers are connected on creation),
+so request handlers check agents out of a pool, and agents are reset and
+returned afterwards instead of being torn down.
+"""
+
+import asyncio
+import time
+from contextlib import asynccontextmanager
+from typing import (
+    AsyncIterator,
+    Awaitable,
+    Callable,
+    Dict,
+    Generic,
+    List,
+    Optional,
+    Set,
+    TypeVar,
+)
+
+from app.agent.base import BaseAgent
+from app.logger import logger
+
+
+AgentT = TypeVar("AgentT", bound=BaseAgent)
+
+
+class _PooledAgent(Generic[AgentT]):
+    """An agent owned by a dedicated task.
+
+    MCP sessions are bound to the task that opened them, so the agent is
+    created and cleaned up by the same long-lived task while request handlers
+    only borrow it.
+    """
+
+    def __init__(self):
+        self.agent: Optional[AgentT] = None
+        self.created_at = time.monotonic()
+        self.last_used = self.created_at
+        self.uses = 0
+        self._closing = asyncio.Event()
+        self._task: Optional[asyncio.Task] = None
+
+    async def open(self, factory: Callable[[], Awaitable[AgentT]]) -> AgentT:
+        ready = asyncio.get_running_loop().create_future()
+        self._task = asyncio.create_task(self._lifecycle(factory, ready))
+        try:
+            self.agent = await asyncio.shield(ready)
+        except asyncio.CancelledError:
+            self._closing.set()
+            raise
+        return self.agent
+
+    async def _lifecycle(self, factory, ready: asyncio.Future) -> None:
+        try:
+            agent = await factory()
+        except Exception as e:
+            ready.set_exception(e)
+            return
+        # Runs must not clean up what this task owns
+        agent.pooled = True
+        ready.set_result(agent)
+
+        await self._closing.wait()
+        try:
+            await agent.cleanup()
+        except Exception as e:
+            logger.warning(f"Error cleaning up pooled agent {agent.name}: {e}")
+
+    @property
+    def alive(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    async def close(self) -> None:
+        self._closing.set()
+        if self._task is not None:
+            await asyncio.gather(self._task, return_exceptions=True)
+
+
+class AgentPool(Generic[AgentT]):
+    """Bounded pool of warm agents with health checks and idle eviction.
+
+    Args:
+        factory: Coroutine function creating a ready-to-use agent
+        max_size: Maximum number of agents, checked out or idle
+        min_idle: Idle agents kept warm (created on start and after eviction)
+        idle_timeout: Seconds an idle agent is kept before it is closed
+        max_uses: Requests served before an agent is replaced (None for no limit)
+    """
+
+    def __init__(
+        self,
+        factory: Callable[[], Awaitable[AgentT]],
+        max_size: int = 4,
+        min_idle: int = 0,
+        idle_timeout: float = 600.0,
+        max_uses: Optional[int] = None,
+    ):
+        self.factory = factory
+        self.max_size = max(1, max_size)
+        self.min_idle = min(min_idle, self.max_size)
+        self.idle_timeout = idle_timeout
+        self.max_uses = max_uses
+
+        self._idle: List[_PooledAgent[AgentT]] = []
+        self._size = 0
+        self._condition: Optional[asyncio.Condition] = None
+        self._reaper: Optional[asyncio.Task] = None
+        # Background closes of replaced agents, awaited on close
+        self._tasks: Set[asyncio.Task] = set()
+        self._closed = False
+
+        # Metrics
+        self.created = 0
+        self.evicted = 0
+        self.waits = 0
+
+    def _get_condition(self) -> asyncio.Condition:
+        if self._condition is None:
+            self._condition = asyncio.Condition()
+        return self._condition
+
+    async def start(self) -> None:
+        """Pre-create `min_idle` agents and start idle eviction"""
+        self._closed = False
+        await self._fill()
+        if self._reaper is None and self.idle_timeout:
+            self._reaper = asyncio.create_task(self._reap_idle())
+
+    async def close(self) -> None:
+        """Close all idle agents, checked out agents are closed on release"""
+        self._closed = True
+        if self._reaper is not None:
+            self._reaper.cancel()
+            self._reaper = None
+        condition = self._get_condition()
+        async with condition:
+            idle, self._idle = self._idle, []
+            self._size -= len(idle)
+            condition.notify_all()
+        await asyncio.gather(
+            *(slot.close() for slot in idle),
+            *list(self._tasks),
+            return_exceptions=True,
+        )
+
+    def _spawn(self, coro) -> None:
+        task = asyncio.create_task(coro)
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "size": self._size,
+            "idle": len(self._idle),
+            "in_use": self._size - len(self._idle),
+            "created": self.created,
+            "evicted": self.evicted,
+            "waits": self.waits,
+        }
+
+    def _healthy(self, slot: _PooledAgent[AgentT]) -> bool:
+        if not slot.alive:
+            return False
+        if self.max_uses and slot.uses >= self.max_uses:
+            return False
+        try:
+            return slot.agent.is_healthy()
+        except Exception as e:
+            logger.warning(f"Health check of pooled agent failed: {e}")
+            return False
+
+    async def _create(self) -> _PooledAgent[AgentT]:
+        """Create a slot, the caller must have reserved it in `_size`"""
+        slot = _PooledAgent()
+        try:
+            await slot.open(self.factory)
+        except BaseException:
+            await self._discard(slot, closed=False)
+            raise
+        self.created += 1
+        return slot
+
+    async def _discard(self, slot: _PooledAgent[AgentT], closed: bool = True) -> None:
+        condition = self._get_condition()
+        async with condition:
+            self._size -= 1
+            condition.notify()
+        if closed:
+            await slot.close()
+
+    async def acquire(self) -> _PooledAgent[AgentT]:
+        condition = self._get_condition()
+        unhealthy = []
+        async with condition:
+            while True:
+                if self._closed:
+                    raise RuntimeError("Agent pool is closed")
+                while self._idle:
+                    slot = self._idle.pop()  # Most recently used is the warmest
+                    if self._healthy(slot):
+                        slot.uses += 1
+                        break
+                    unhealthy.append(slot)
+                    self._size -= 1
+                else:
+                    slot = None
+                if slot is not None:
+                    break
+                if self._size < self.max_size:
+                    self._size += 1
+                    break
+                self.waits += 1
+                await condition.wait()
+
+        for stale in unhealthy:
+            logger.info("Replacing unhealthy pooled agent")
+            self._spawn(stale.close())
+
+        if slot is None:
+            slot = await self._create()
+            slot.uses += 1
+        return slot
+
+    async def release(self, slot: _PooledAgent[AgentT], discard: bool = False) -> None:
+        """Reset the agent and return it to the pool, or close it"""
+        if not discard and not self._closed:
+            try:
+                await slot.agent.reset()
+            except Exception as e:
+                logger.warning(f"Could not reset pooled agent, discarding it: {e}")
+                discard = True
+
+        if discard or self._closed:
+            await self._discard(slot)
+            return
+
+        condition = self._get_condition()
+        async with condition:
+            slot.last_used = time.monotonic()
+            self._idle.append(slot)
+            condition.notify()
+
+    @asynccontextmanager
+    async def agent(self) -> AsyncIterator[AgentT]:
+        """Check out an agent for the duration of the block.
+
+        Agents are discarded instead of reused if the block raises.
+        """
+        slot = await self.acquire()
+        try:
+            yield slot.agent
+        except BaseException:
+            await self.release(slot, discard=True)
+            raise
+        await self.release(slot)
+
+    async def _fill(self) -> None:
+        """Create idle agents until `min_idle` are available"""
+        while not self._closed:
+            condition = self._get_condition()
+            async with condition:
+                if len(self._idle) >= self.min_idle or self._size >= self.max_size:
+                    return
+                self._size += 1
+            try:
+                slot = await self._create()
+            except Exception as e:
+                logger.error(f"Could not pre-create pooled agent: {e}")
+                return
+            async with condition:
+                self._idle.append(slot)
+                condition.notify()
+
+    async def _reap_idle(self) -> None:
+        """Periodically close agents idle for longer than `idle_timeout`"""
+        interval = max(1.0, self.idle_timeout / 4)
+        while True:
+            await asyncio.sleep(interval)
+            condition = self._get_condition()
+            expired = []
+            async with condition:
+                cutoff = time.monotonic() - self.idle_timeout
+                # Oldest first, keeping at least `min_idle` warm
+                for slot in list(self._idle):
+                    if len(self._idle) <= self.min_idle:
+                        break
+                    if slot.last_used < cutoff or not self._healthy(slot):
+                        self._idle.remove(slot)
+                        self._size -= 1
+                        expired.append(slot)
+                condition.notify_all()
+            for slot in expired:
+                self.evicted += 1
+                await slot.close()
+            await self._fill()
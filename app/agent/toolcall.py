@@ -1,19 +1,27 @@
 import asyncio
 import json
-from typing import Any, List, Optional, Union
+from contextvars import ContextVar
+from typing import Any, Dict, List, Optional, Sequence, Tuple, Union
 
-from pydantic import Field
+from pydantic import Field, PrivateAttr
 
 from app.agent.react import ReActAgent
+from app.config import config
+from app.event_stream import EventType, emit, streaming_enabled
 from app.exceptions import TokenLimitExceeded
 from app.logger import logger
 from app.prompt.toolcall import NEXT_STEP_PROMPT, SYSTEM_PROMPT
-from app.schema import TOOL_CHOICE_TYPE, AgentState, Message, ToolCall, ToolChoice
+from app.schema import TOOL_CHOICE_TYPE, AgentState, Message, Role, ToolCall, ToolChoice
 from app.tool import CreateChatCompletion, Terminate, ToolCollection
 
 
 TOOL_CALL_REQUIRED = "Tool calls required but none provided"
 
+# Image captured by the tool call running in the current task
+_current_base64_image: ContextVar[Optional[str]] = ContextVar(
+    "current_base64_image", default=None
+)
+
 
 class ToolCallAgent(ReActAgent):
     """Base agent class for handling tool/function calls with enhanced abstraction"""
@@ -31,35 +39,70 @@ class ToolCallAgent(ReActAgent):
     special_tool_names: List[str] = Field(default_factory=lambda: [Terminate().name])
 
     tool_calls: List[ToolCall] = Field(default_factory=list)
-    _current_base64_image: Optional[str] = None
+
+    # Start tool calls while the LLM response is still streaming
+    stream_tool_calls: bool = Field(
+        default_factory=lambda: config.llm["default"].stream_tool_calls
+    )
+    # Run consecutive concurrency-safe tool calls at the same time
+    parallel_tool_calls: bool = Field(
+        default_factory=lambda: config.llm["default"].parallel_tool_calls
+    )
+    max_parallel_tool_calls: int = Field(
+        default_factory=lambda: config.llm["default"].max_parallel_tool_calls
+    )
+
+    _started_tool_calls: Dict[str, asyncio.Task] = PrivateAttr(default_factory=dict)
+    _serial_tail: Optional[asyncio.Task] = PrivateAttr(default=None)
+    _parallel_batch: List[asyncio.Task] = PrivateAttr(default_factory=list)
+    _tool_semaphore: Optional[asyncio.Semaphore] = PrivateAttr(default=None)
 
     max_steps: int = 30
     max_observe: Optional[Union[int, bool]] = None
 
     async def think(self) -> bool:
         """Process current state and decide next actions using tools"""
+        should_act = False
+        try:
+            should_act = await self._think()
+            return should_act
+        finally:
+            # Calls launched while streaming are only recorded by act()
+            if not should_act:
+                await self._cancel_started_tool_calls()
+
+    async def _think(self) -> bool:
         if self.next_step_prompt:
             user_msg = Message.user_message(self.next_step_prompt)
             self.messages += [user_msg]
 
         try:
             # Get response with tool options
-            response = await self.llm.ask_tool(
-                messages=self.messages,
-                system_msgs=(
-                    [Message.system_message(self.system_prompt)]
-                    if self.system_prompt
-                    else None
-                ),
-                tools=self.available_tools.to_params(),
-                tool_choice=self.tool_choices,
-            )
+            if self.stream_tool_calls or streaming_enabled():
+                response = await self._ask_tool_streaming(
+                    start_tools=self.stream_tool_calls
+                )
+            else:
+                response = await self.llm.ask_tool(
+                    messages=self.messages,
+                    system_msgs=(
+                        [Message.system_message(self.system_prompt)]
+                        if self.system_prompt
+                        else None
+                    ),
+                    tools=self.available_tools.to_params(),
+                    tool_choice=self.tool_choices,
+                )
         except ValueError:
             raise
         except Exception as e:
-            # Check if this is a RetryError containing TokenLimitExceeded
-            if hasattr(e, "__cause__") and isinstance(e.__cause__, TokenLimitExceeded):
-                token_limit_error = e.__cause__
+            # Check if this is a (RetryError containing) TokenLimitExceeded
+            if isinstance(e, TokenLimitExceeded) or isinstance(
+                e.__cause__, TokenLimitExceeded
+            ):
+                token_limit_error = (
+                    e if isinstance(e, TokenLimitExceeded) else e.__cause__
+                )
                 logger.error(
                     f"🚨 Token limit error (from RetryError): {token_limit_error}"
                 )
@@ -137,12 +180,19 @@ class ToolCallAgent(ReActAgent):
             # Return last message content if no tool calls
             return self.messages[-1].content or "No content or commands to execute"
 
+        if self.parallel_tool_calls and not self._started_tool_calls:
+            self._reset_tool_schedule()
+            for command in self.tool_calls:
+                self._started_tool_calls[command.id] = self._schedule_tool_call(command)
+
         results = []
         for command in self.tool_calls:
-            # Reset base64_image for each tool call
-            self._current_base64_image = None
-
-            result = await self.execute_tool(command)
+            started = self._started_tool_calls.pop(command.id, None)
+            if started is not None:
+                # Already launched while streaming or as part of a parallel batch
+                result, base64_image = await started
+            else:
+                result, base64_image = await self._execute_tool_call(command)
 
             if self.max_observe:
                 result = result[: self.max_observe]
@@ -156,13 +206,120 @@ class ToolCallAgent(ReActAgent):
                 content=result,
                 tool_call_id=command.id,
                 name=command.function.name,
-                base64_image=self._current_base64_image,
+                base64_image=base64_image,
             )
             self.memory.add_message(tool_msg)
             results.append(result)
 
         return "\n\n".join(results)
 
+    async def _ask_tool_streaming(self, start_tools: bool = True) -> Message:
+        """Stream the LLM response, launching tool calls as soon as they arrive.
+
+        Launched calls follow the same ordering rules as act(), so the first
+        can start while the model is still emitting the rest. Content deltas
+        are published to the current event stream.
+        """
+        self._reset_tool_schedule()
+        content = ""
+        tool_calls: List[ToolCall] = []
+        async for item in self.llm.ask_tool_stream(
+            messages=self.messages,
+            system_msgs=(
+                [Message.system_message(self.system_prompt)]
+                if self.system_prompt
+                else None
+            ),
+            tools=self.available_tools.to_params(),
+            tool_choice=self.tool_choices,
+        ):
+            if isinstance(item, str):
+                content += item
+                await emit(EventType.TOKEN, content=item)
+                continue
+            tool_calls.append(item)
+            if start_tools and self.tool_choices != ToolChoice.NONE:
+                self._started_tool_calls[item.id] = self._schedule_tool_call(item)
+
+        return Message(
+            role=Role.ASSISTANT, content=content, tool_calls=tool_calls or None
+        )
+
+    async def reset(self) -> None:
+        """Reset state, memory and pending tool calls"""
+        await self._cancel_started_tool_calls()
+        await super().reset()
+        self.tool_calls = []
+
+    async def _cancel_started_tool_calls(self) -> None:
+        """Cancel launched tool calls and wait until they have stopped"""
+        tasks = list(self._started_tool_calls.values())
+        for task in tasks:
+            task.cancel()
+        if tasks:
+            await asyncio.gather(*tasks, return_exceptions=True)
+        self._reset_tool_schedule()
+
+    def _reset_tool_schedule(self) -> None:
+        """Forget previously scheduled tool calls and start a new step"""
+        self._started_tool_calls = {}
+        self._serial_tail = None
+        self._parallel_batch = []
+        self._tool_semaphore = asyncio.Semaphore(max(1, self.max_parallel_tool_calls))
+
+    def _schedule_tool_call(self, command: ToolCall) -> asyncio.Task:
+        """Launch a tool call as a task, ordered against earlier calls.
+
+        Concurrency-safe tools only wait for the last serial call, so runs of
+        them overlap. Any other tool waits for everything scheduled before it
+        and holds back everything scheduled after it.
+        """
+        if self.parallel_tool_calls and self._is_concurrency_safe(command):
+            after = [self._serial_tail] if self._serial_tail else []
+            task = asyncio.create_task(self._execute_tool_call(command, after=after))
+            self._parallel_batch.append(task)
+        else:
+            after = ([self._serial_tail] if self._serial_tail else []) + (
+                self._parallel_batch
+            )
+            task = asyncio.create_task(self._execute_tool_call(command, after=after))
+            self._serial_tail = task
+            self._parallel_batch = []
+        return task
+
+    def _is_concurrency_safe(self, command: ToolCall) -> bool:
+        """Check if a tool call may overlap with other tool calls"""
+        tool = self.available_tools.get_tool(command.function.name)
+        return bool(tool and tool.concurrency_safe)
+
+    async def _execute_tool_call(
+        self, command: ToolCall, after: Sequence[asyncio.Task] = ()
+    ) -> Tuple[str, Optional[str]]:
+        """Execute a tool call and return its observation with any captured image"""
+        if after:
+            await asyncio.gather(*after, return_exceptions=True)
+
+        # Reset base64_image for each tool call
+        _current_base64_image.set(None)
+        await emit(
+            EventType.TOOL_START,
+            id=command.id,
+            name=command.function.name,
+            arguments=command.function.arguments,
+        )
+        if self._tool_semaphore is None:
+            result = await self.execute_tool(command)
+        else:
+            async with self._tool_semaphore:
+                result = await self.execute_tool(command)
+        await emit(
+            EventType.TOOL_END,
+            id=command.id,
+            name=command.function.name,
+            result=result[: self.max_observe] if self.max_observe else result,
+        )
+        return result, _current_base64_image.get()
+
     async def execute_tool(self, command: ToolCall) -> str:
         """Execute a single tool call with robust error handling"""
         if not command or not command.function or not command.function.name:
@@ -186,7 +343,7 @@ class ToolCallAgent(ReActAgent):
             # Check if result is a ToolResult with base64_image
             if hasattr(result, "base64_image") and result.base64_image:
                 # Store the base64_image for later use in tool_message
-                self._current_base64_image = result.base64_image
+                _current_base64_image.set(result.base64_image)
 
             # Format result for display (standard case)
             observation = (
@@ -243,8 +400,13 @@ class ToolCallAgent(ReActAgent):
         logger.info(f"✨ Cleanup complete for agent '{self.name}'.")
 
     async def run(self, request: Optional[str] = None) -> str:
-        """Run the agent with cleanup when done."""
+        """Run the agent with cleanup when done.
+
+        Pooled agents keep their resources (MCP sessions) between runs, the
+        pool cleans them up from the task that opened them.
+        """
         try:
             return await super().run(request)
         finally:
-            await self.cleanup()
+            if not self.pooled:
+                await self.cleanup()
@@ -1,3 +1,4 @@
+import asyncio
 import json
 import sys
 import time
@@ -95,13 +96,18 @@ class ChatCompletions:
                 bedrock_tools.append(bedrock_tool)
         return bedrock_tools
 
-    def _convert_openai_messages_to_bedrock_format(self, messages):
+    def _convert_openai_messages_to_bedrock_format(
+        self, messages, prompt_caching=False
+    ):
         # Convert OpenAI message format to Bedrock message format
         bedrock_messages = []
         system_prompt = []
         for message in messages:
             if message.get("role") == "system":
                 system_prompt = [{"text": message.get("content")}]
+                if prompt_caching:
+                    # Everything up to here (tools + system) is a stable prefix
+                    system_prompt.append({"cachePoint": {"type": "default"}})
             elif message.get("role") == "user":
                 bedrock_message = {
                     "role": message.get("role", "user"),
@@ -200,36 +206,45 @@ class ChatCompletions:
                     "inputTokens", 0
                 ),
                 "total_tokens": bedrock_response.get("usage", {}).get("totalTokens", 0),
+                "prompt_tokens_details": {
+                    "cached_tokens": bedrock_response.get("usage", {}).get(
+                        "cacheReadInputTokens", 0
+                    ),
+                },
+                "cache_creation_input_tokens": bedrock_response.get("usage", {}).get(
+                    "cacheWriteInputTokens", 0
+                ),
             },
         }
         return OpenAIResponse(openai_format)
 
-    async def _invoke_bedrock(
+    def _build_request(
         self,
         model: str,
         messages: List[Dict[str, str]],
         max_tokens: int,
         temperature: float,
         tools: Optional[List[dict]] = None,
-        tool_choice: Literal["none", "auto", "required"] = "auto",
         **kwargs,
-    ) -> OpenAIResponse:
-        # Non-streaming invocation of Bedrock model
+    ) -> dict:
+        # Build the keyword arguments shared by converse and converse_stream
         (
             system_prompt,
             bedrock_messages,
-        ) = self._convert_openai_messages_to_bedrock_format(messages)
-        response = self.client.converse(
-            modelId=model,
-            system=system_prompt,
-            messages=bedrock_messages,
-            inferenceConfig={"temperature": temperature, "maxTokens": max_tokens},
-            toolConfig={"tools": tools} if tools else None,
+        ) = self._convert_openai_messages_to_bedrock_format(
+            messages, kwargs.get("prompt_caching", False)
         )
-        openai_response = self._convert_bedrock_response_to_openai_format(response)
-        return openai_response
+        request = {
+            "modelId": model,
+            "system": system_prompt,
+            "messages": bedrock_messages,
+            "inferenceConfig": {"temperature": temperature, "maxTokens": max_tokens},
+        }
+        if tools:
+            request["toolConfig"] = {"tools": tools}
+        return request
 
-    async def _invoke_bedrock_stream(
+    async def _invoke_bedrock(
         self,
         model: str,
         messages: List[Dict[str, str]],
@@ -239,75 +254,32 @@ class ChatCompletions:
         tool_choice: Literal["none", "auto", "required"] = "auto",
         **kwargs,
     ) -> OpenAIResponse:
-        # Streaming invocation of Bedrock model
-        (
-            system_prompt,
-            bedrock_messages,
-        ) = self._convert_openai_messages_to_bedrock_format(messages)
-        response = self.client.converse_stream(
-            modelId=model,
-            system=system_prompt,
-            messages=bedrock_messages,
-            inferenceConfig={"temperature": temperature, "maxTokens": max_tokens},
-            toolConfig={"tools": tools} if tools else None,
+        # Non-streaming invocation of Bedrock model, boto3 is blocking so the
+        # call runs in a worker thread
+        request = self._build_request(
+            model, messages, max_tokens, temperature, tools, **kwargs
         )
+        response = await asyncio.to_thread(self.client.converse, **request)
+        openai_response = self._convert_bedrock_response_to_openai_format(response)
+        return openai_response
 
-        # Initialize response structure
-        bedrock_response = {
-            "output": {"message": {"role": "", "content": []}},
-            "stopReason": "",
-            "usage": {},
-            "metrics": {},
-        }
-        bedrock_response_text = ""
-        bedrock_response_tool_input = ""
-
-        # Process streaming response
-        stream = response.get("stream")
-        if stream:
-            for event in stream:
-                if event.get("messageStart", {}).get("role"):
-                    bedrock_response["output"]["message"]["role"] = event[
-                        "messageStart"
-                    ]["role"]
-                if event.get("contentBlockDelta", {}).get("delta", {}).get("text"):
-                    bedrock_response_text += event["contentBlockDelta"]["delta"]["text"]
-                    print(
-                        event["contentBlockDelta"]["delta"]["text"], end="", flush=True
-                    )
-                if event.get("contentBlockStop", {}).get("contentBlockIndex") == 0:
-                    bedrock_response["output"]["message"]["content"].append(
-                        {"text": bedrock_response_text}
-                    )
-                if event.get("contentBlockStart", {}).get("start", {}).get("toolUse"):
-                    bedrock_tool_use = event["contentBlockStart"]["start"]["toolUse"]
-                    tool_use = {
-                        "toolUseId": bedrock_tool_use["toolUseId"],
-                        "name": bedrock_tool_use["name"],
-                    }
-                    bedrock_response["output"]["message"]["content"].append(
-                        {"toolUse": tool_use}
-                    )
-                    global CURRENT_TOOLUSE_ID
-                    CURRENT_TOOLUSE_ID = bedrock_tool_use["toolUseId"]
-                if event.get("contentBlockDelta", {}).get("delta", {}).get("toolUse"):
-                    bedrock_response_tool_input += event["contentBlockDelta"]["delta"][
-                        "toolUse"
-                    ]["input"]
-                    print(
-                        event["contentBlockDelta"]["delta"]["toolUse"]["input"],
-                        end="",
-                        flush=True,
-                    )
-                if event.get("contentBlockStop", {}).get("contentBlockIndex") == 1:
-                    bedrock_response["output"]["message"]["content"][1]["toolUse"][
-                        "input"
-                    ] = json.loads(bedrock_response_tool_input)
-        print()
-        openai_response = self._convert_bedrock_response_to_openai_format(
-            bedrock_response
+    async def _invoke_bedrock_stream(
+        self,
+        model: str,
+        messages: List[Dict[str, str]],
+        max_tokens: int,
+        temperature: float,
+        tools: Optional[List[dict]] = None,
+        tool_choice: Literal["none", "auto", "required"] = "auto",
+        **kwargs,
+    ) -> "BedrockStream":
+        # Streaming invocation of Bedrock model, returns an async iterator of
+        # OpenAI-style chunks
+        request = self._build_request(
+            model, messages, max_tokens, temperature, tools, **kwargs
         )
-        return openai_response
+        response = await asyncio.to_thread(self.client.converse_stream, **request)
+        return BedrockStream(response.get("stream"), model)
 
     def create(
         self,
@@ -324,6 +296,8 @@ class ChatCompletions:
         bedrock_tools = []
         if tools is not None:
             bedrock_tools = self._convert_openai_tools_to_bedrock_format(tools)
+            if bedrock_tools and kwargs.get("prompt_caching"):
+                bedrock_tools.append({"cachePoint": {"type": "default"}})
         if stream:
             return self._invoke_bedrock_stream(
                 model,
@@ -344,3 +318,146 @@ class ChatCompletions:
                 tool_choice,
                 **kwargs,
             )
+
+
+# Bedrock stop reasons mapped to OpenAI finish reasons
+FINISH_REASONS = {
+    "end_turn": "stop",
+    "stop_sequence": "stop",
+    "tool_use": "tool_calls",
+    "max_tokens": "length",
+    "content_filtered": "content_filter",
+    "guardrail_intervened": "content_filter",
+}
+
+_STREAM_END = object()
+
+
+# Async iterator over a Bedrock converse_stream, yielding OpenAI-style chunks
+class BedrockStream:
+    def __init__(self, stream, model: str):
+        self.stream = stream
+        self.model = model
+        self.id = f"chatcmpl-{uuid.uuid4()}"
+        self.created = int(time.time())
+        # Bedrock content block index -> OpenAI tool call index
+        self._tool_indices: Dict[int, int] = {}
+        self._finished = False
+
+    def __aiter__(self):
+        return self._iterate()
+
+    async def _iterate(self):
+        if self.stream is None:
+            return
+        events = iter(self.stream)
+        try:
+            while True:
+                # Each read blocks on the network, so it runs in a worker thread
+                event = await asyncio.to_thread(next, events, _STREAM_END)
+                if event is _STREAM_END:
+                    break
+                chunk = self._convert_event(event)
+                if chunk is not None:
+                    yield chunk
+            self._finished = True
+        finally:
+            if not self._finished:
+                await self.close()
+
+    async def close(self):
+        # Release the underlying HTTP connection when the consumer stops early
+        close = getattr(self.stream, "close", None)
+        if close is not None:
+            await asyncio.to_thread(close)
+
+    def _chunk(self, delta=None, finish_reason=None, usage=None) -> OpenAIResponse:
+        delta = {"role": None, "content": None, "tool_calls": None, **(delta or {})}
+        return OpenAIResponse(
+            {
+                "id": self.id,
+                "object": "chat.completion.chunk",
+                "created": self.created,
+                "model": self.model,
+                "choices": [
+                    {"index": 0, "delta": delta, "finish_reason": finish_reason}
+                ],
+                "usage": usage,
+            }
+        )
+
+    def _convert_event(self, event: dict) -> Optional[OpenAIResponse]:
+        # Convert one Bedrock stream event to an OpenAI chunk, None to skip it
+        if "messageStart" in event:
+            return self._chunk({"role": event["messageStart"].get("role")})
+
+        if "contentBlockStart" in event:
+            block = event["contentBlockStart"]
+            tool_use = block.get("start", {}).get("toolUse")
+            if not tool_use:
+                return None
+            global CURRENT_TOOLUSE_ID
+            CURRENT_TOOLUSE_ID = tool_use["toolUseId"]
+            index = len(self._tool_indices)
+            self._tool_indices[block.get("contentBlockIndex", index)] = index
+            return self._chunk(
+                {
+                    "tool_calls": [
+                        {
+                            "index": index,
+                            "id": tool_use["toolUseId"],
+                            "type": "function",
+                            "function": {"name": tool_use["name"], "arguments": ""},
+                        }
+                    ]
+                }
+            )
+
+        if "contentBlockDelta" in event:
+            block = event["contentBlockDelta"]
+            delta = block.get("delta", {})
+            if delta.get("text"):
+                return self._chunk({"content": delta["text"]})
+            if "toolUse" in delta:
+                index = self._tool_indices.get(block.get("contentBlockIndex"), 0)
+                return self._chunk(
+                    {
+                        "tool_calls": [
+                            {
+                                "index": index,
+                                "id": None,
+                                "type": "function",
+                                "function": {
+                                    "name": None,
+                                    "arguments": delta["toolUse"].get("input", ""),
+                                },
+                            }
+                        ]
+                    }
+                )
+            return None
+
+        if "messageStop" in event:
+            reason = event["messageStop"].get("stopReason", "end_turn")
+            return self._chunk(finish_reason=FINISH_REASONS.get(reason, reason))
+
+        if "metadata" in event:
+            usage = event["metadata"].get("usage", {})
+            chunk = self._chunk(
+                usage={
+                    "completion_tokens": usage.get("outputTokens", 0),
+                    "prompt_tokens": usage.get("inputTokens", 0),
+                    "total_tokens": usage.get("totalTokens", 0),
+                    "prompt_tokens_details": {
+                        "cached_tokens": usage.get("cacheReadInputTokens", 0)
+                    },
+                    "cache_creation_input_tokens": usage.get(
+                        "cacheWriteInputTokens", 0
+                    ),
+                }
+            )
+            # Like OpenAI's include_usage chunk, the usage chunk has no choices
+            chunk.choices = []
+            return chunk
+
+        return None
@@ -33,6 +33,148 @@ class LLMSettings(BaseModel):
     temperature: float = Field(1.0, description="Sampling temperature")
     api_type: str = Field(..., description="Azure, Openai, or Ollama")
     api_version: str = Field(..., description="Azure Openai version if AzureOpenai")
+    prompt_caching: bool = Field(
+        False,
+        description="Mark the system prompt and tool schemas as a provider cache prefix",
+    )
+    requests_per_minute: Optional[int] = Field(
+        None, description="Client-side request rate limit (None for unlimited)"
+    )
+    tokens_per_minute: Optional[int] = Field(
+        None, description="Client-side token rate limit (None for unlimited)"
+    )
+    stream_tool_calls: bool = Field(
+        False, description="Start tool calls while the response is still streaming"
+    )
+    parallel_tool_calls: bool = Field(
+        False, description="Run consecutive concurrency-safe tool calls together"
+    )
+    max_parallel_tool_calls: int = Field(
+        4, description="Maximum tool calls running at the same time"
+    )
+
+
+class LLMRouterSettings(BaseModel):
+    """Configuration for routing requests over several LLM configurations"""
+
+    enabled: bool = Field(False, description="Whether to route the default LLM")
+    models: List[str] = Field(
+        default_factory=lambda: ["default"],
+        description="Names of [llm.*] sections in the pool, in order of preference",
+    )
+    weights: Dict[str, float] = Field(
+        default_factory=dict,
+        description="Relative routing weight per model (higher is preferred)",
+    )
+    window_size: int = Field(100, description="Requests kept per model for health")
+    window_seconds: float = Field(
+        300.0, description="Maximum age of requests used for health (seconds)"
+    )
+    min_samples: int = Field(
+        5, description="Requests needed before latency is used for routing"
+    )
+    max_error_rate: float = Field(
+        0.5, description="Error rate above which a model is only used as fallback"
+    )
+    hedge_delay: Optional[float] = Field(
+        5.0,
+        description="Seconds before a slow request is hedged on the next model (None to disable)",
+    )
+    adaptive_hedge: bool = Field(
+        True, description="Hedge earlier, at the model's p95 latency, when known"
+    )
+    attempts_per_model: int = Field(
+        2, description="Attempts on one model before falling back to the next"
+    )
+
+
+class HttpPoolSettings(BaseModel):
+    """Configuration for the shared HTTP connection pool"""
+
+    max_connections: int = Field(100, description="Maximum concurrent connections")
+    max_keepalive_connections: int = Field(
+        20, description="Maximum idle connections kept alive for reuse"
+    )
+    keepalive_expiry: float = Field(
+        30.0, description="Seconds an idle connection is kept alive"
+    )
+    http2: bool = Field(False, description="Whether to negotiate HTTP/2")
+    timeout: float = Field(600.0, description="Default request timeout (seconds)")
+    connect_timeout: float = Field(10.0, description="Connection timeout (seconds)")
+
+
+class ResponseCacheSettings(BaseModel):
+    """Configuration for caching LLM responses"""
+
+    enabled: bool = Field(False, description="Whether to cache LLM responses")
+    backend: str = Field("memory", description="Cache backend (memory or sqlite)")
+    path: str = Field(
+        "workspace/.cache/llm_responses.sqlite",
+        description="SQLite file for the sqlite backend, relative to the project root",
+    )
+    ttl: Optional[int] = Field(
+        None, description="Seconds before an entry expires (None for never)"
+    )
+    max_entries: int = Field(1024, description="Maximum number of cached responses")
+    cache_nondeterministic: bool = Field(
+        False,
+        description="Also cache sampled requests: non-zero temperature or reasoning models (for replays)",
+    )
+
+
+class MemorySettings(BaseModel):
+    """Configuration for agent memory compaction"""
+
+    max_context_tokens: Optional[int] = Field(
+        64000,
+        description="Token budget for agent memory, capped by the LLM's max_input_tokens (None to disable)",
+    )
+    compaction_trigger: float = Field(
+        0.8, description="Fraction of the budget at which compaction starts"
+    )
+    compaction_target: float = Field(
+        0.5, description="Fraction of the budget compaction reduces memory to"
+    )
+    keep_recent_messages: int = Field(
+        6, description="Trailing messages that are never compacted"
+    )
+    observation_preview_chars: int = Field(
+        300, description="Characters kept from an elided tool observation"
+    )
+    keep_recent_images: int = Field(
+        1, description="Number of most recent screenshots kept in memory"
+    )
+
+
+class AgentPoolSettings(BaseModel):
+    """Configuration for the web server's pool of warm agents"""
+
+    max_size: int = Field(4, description="Maximum number of pooled agents")
+    min_idle: int = Field(1, description="Idle agents kept warm")
+    idle_timeout: float = Field(
+        600.0, description="Seconds an idle agent is kept before it is closed"
+    )
+    max_uses: Optional[int] = Field(
+        100,
+        description="Requests served before an agent is replaced (None for no limit)",
+    )
+
+
+class SessionStoreSettings(BaseModel):
+    """Configuration for the web UI's conversation store"""
+
+    path: str = Field(
+        "web/conversations.db", description="SQLite database for conversations"
+    )
+    flush_interval: float = Field(
+        0.5, description="Seconds between batched writes (0 to write immediately)"
+    )
+    batch_size: int = Field(
+        100, description="Pending writes that trigger an early flush"
+    )
+    max_retries: int = Field(
+        3, description="Failed flushes retried before failing writes are dropped"
+    )
 
 
 class ProxySettings(BaseModel):
@@ -108,6 +250,18 @@ class SandboxSettings(BaseModel):
     network_enabled: bool = Field(
         False, description="Whether network access is allowed"
     )
+    pool_min_idle: int = Field(
+        0, description="Pre-started sandboxes kept warm for this profile"
+    )
+    pool_max_idle: int = Field(
+        2, description="Released sandboxes kept warm for reuse at most"
+    )
+    max_read_size: int = Field(
+        10 * 1024 * 1024, description="Largest file read into memory (bytes)"
+    )
+    max_copy_size: int = Field(
+        1024 * 1024 * 1024, description="Largest total size copied out (bytes)"
+    )
 
 
 class DaytonaSettings(BaseModel):
@@ -194,6 +348,24 @@ class AppConfig(BaseModel):
     daytona_config: Optional[DaytonaSettings] = Field(
         None, description="Daytona configuration"
     )
+    response_cache_config: Optional[ResponseCacheSettings] = Field(
+        None, description="LLM response cache configuration"
+    )
+    http_pool_config: Optional[HttpPoolSettings] = Field(
+        None, description="Shared HTTP connection pool configuration"
+    )
+    llm_router_config: Optional[LLMRouterSettings] = Field(
+        None, description="LLM routing configuration"
+    )
+    agent_pool_config: Optional[AgentPoolSettings] = Field(
+        None, description="Warm agent pool configuration"
+    )
+    session_store_config: Optional[SessionStoreSettings] = Field(
+        None, description="Web UI conversation store configuration"
+    )
+    memory_config: Optional[MemorySettings] = Field(
+        None, description="Agent memory compaction configuration"
+    )
 
     class Config:
         arbitrary_types_allowed = True
@@ -252,6 +424,12 @@ class Config:
             "temperature": base_llm.get("temperature", 1.0),
             "api_type": base_llm.get("api_type", ""),
             "api_version": base_llm.get("api_version", ""),
+            "prompt_caching": base_llm.get("prompt_caching", False),
+            "requests_per_minute": base_llm.get("requests_per_minute"),
+            "tokens_per_minute": base_llm.get("tokens_per_minute"),
+            "stream_tool_calls": base_llm.get("stream_tool_calls", False),
+            "parallel_tool_calls": base_llm.get("parallel_tool_calls", False),
+            "max_parallel_tool_calls": base_llm.get("max_parallel_tool_calls", 4),
         }
 
         # handle browser config.
@@ -311,6 +489,24 @@ class Config:
         else:
             mcp_settings = MCPSettings(servers=MCPSettings.load_server_config())
 
+        response_cache_config = raw_config.get("response_cache", {})
+        response_cache_settings = ResponseCacheSettings(**response_cache_config)
+
+        http_pool_config = raw_config.get("http_pool", {})
+        http_pool_settings = HttpPoolSettings(**http_pool_config)
+
+        llm_router_config = raw_config.get("llm_router", {})
+        llm_router_settings = LLMRouterSettings(**llm_router_config)
+
+        agent_pool_config = raw_config.get("agent_pool", {})
+        agent_pool_settings = AgentPoolSettings(**agent_pool_config)
+
+        session_store_config = raw_config.get("session_store", {})
+        session_store_settings = SessionStoreSettings(**session_store_config)
+
+        memory_config = raw_config.get("memory", {})
+        memory_settings = MemorySettings(**memory_config)
+
         run_flow_config = raw_config.get("runflow")
         if run_flow_config:
             run_flow_settings = RunflowSettings(**run_flow_config)
@@ -330,6 +526,12 @@ class Config:
             "mcp_config": mcp_settings,
             "run_flow_config": run_flow_settings,
             "daytona_config": daytona_settings,
+            "response_cache_config": response_cache_settings,
+            "http_pool_config": http_pool_settings,
+            "memory_config": memory_settings,
+            "llm_router_config": llm_router_settings,
+            "agent_pool_config": agent_pool_settings,
+            "session_store_config": session_store_settings,
         }
 
         self._config = AppConfig(**config_dict)
@@ -364,6 +566,36 @@ class Config:
         """Get the Run Flow configuration"""
         return self._config.run_flow_config
 
+    @property
+    def response_cache(self) -> ResponseCacheSettings:
+        """Get the LLM response cache configuration"""
+        return self._config.response_cache_config
+
+    @property
+    def http_pool(self) -> HttpPoolSettings:
+        """Get the shared HTTP connection pool configuration"""
+        return self._config.http_pool_config
+
+    @property
+    def llm_router(self) -> LLMRouterSettings:
+        """Get the LLM routing configuration"""
+        return self._config.llm_router_config
+
+    @property
+    def agent_pool(self) -> AgentPoolSettings:
+        """Get the warm agent pool configuration"""
+        return self._config.agent_pool_config
+
+    @property
+    def session_store(self) -> SessionStoreSettings:
+        """Get the web UI conversation store configuration"""
+        return self._config.session_store_config
+
+    @property
+    def memory(self) -> MemorySettings:
+        """Get the agent memory compaction configuration"""
+        return self._config.memory_config
+
     @property
     def workspace_root(self) -> Path:
         """Get the workspace root directory"""
@@ -3,63 +3,113 @@ OpenHT - Supabase Database Client
 Database bağlantısı ve CRUD işlemleri
 """
 
+import asyncio
+import base64
 import os
+import uuid
+from datetime import datetime, timezone
 from functools import lru_cache
-from typing import Optional
+from typing import Dict, List, Optional, Tuple
 
 try:
-    from supabase import Client, create_client
+    from postgrest import AsyncPostgrestClient
+    from postgrest.exceptions import APIError
+    from supabase import AsyncClient, acreate_client
 
     SUPABASE_AVAILABLE = True
 except ImportError:
     SUPABASE_AVAILABLE = False
-    Client = None
+    AsyncClient = None
+    APIError = None
 
 from loguru import logger
 
+from app.database.write_behind import MessageWriteBehind
+
 
 class SupabaseClient:
-    """Supabase client wrapper with connection management"""
+    """Supabase client wrapper with connection management.
+
+    All queries use the async PostgREST client, so database round-trips do not
+    block the event loop. The client is created on first use.
+
+    Setting POSTGREST_URL instead of the Supabase credentials talks to a plain
+    PostgREST server, e.g. a local Postgres + PostgREST pair used in tests.
+    """
 
     _instance: Optional["SupabaseClient"] = None
-    _client: Optional[Client] = None
 
     def __new__(cls):
         if cls._instance is None:
             cls._instance = super().__new__(cls)
+            cls._instance._configured = False
         return cls._instance
 
     def __init__(self):
-        if self._client is None:
+        if not self._configured:
             self._initialize()
 
     def _initialize(self):
-        """Initialize Supabase client"""
+        """Read connection settings, the client itself is created lazily"""
+        self._configured = True
+        self._client = None
+        self._client_lock: Optional[asyncio.Lock] = None
+        self._url = None
+        self._key = None
+        self._postgrest_url = None
+        # Cleared when the append_messages function is not deployed
+        self._append_rpc = True
+        # Message inserts are batched off the request path
+        self.message_writer = MessageWriteBehind(self._write_messages)
+
         if not SUPABASE_AVAILABLE:
             logger.warning("Supabase package not installed. Running in local mode.")
             return
 
-        url = os.getenv("SUPABASE_URL")
-        key = os.getenv("SUPABASE_ANON_KEY")
+        self._postgrest_url = os.getenv("POSTGREST_URL")
+        if self._postgrest_url:
+            logger.info(f"Using PostgREST server at {self._postgrest_url}")
+            return
 
-        if not url or not key:
+        self._url = os.getenv("SUPABASE_URL")
+        self._key = os.getenv("SUPABASE_ANON_KEY")
+        if not self._url or not self._key:
             logger.warning("Supabase credentials not found. Running in local mode.")
-            return
 
-        try:
-            self._client = create_client(url, key)
-            logger.info("Supabase client initialized successfully")
-        except Exception as e:
-            logger.error(f"Failed to initialize Supabase: {e}")
-            self._client = None
+    async def _connect(self):
+        """Return the async client, creating it on first use"""
+        if self._client is not None:
+            return self._client
+        if self._client_lock is None:
+            self._client_lock = asyncio.Lock()
+        async with self._client_lock:
+            if self._client is None:
+                if self._postgrest_url:
+                    self._client = AsyncPostgrestClient(self._postgrest_url)
+                else:
+                    self._client = await acreate_client(self._url, self._key)
+                logger.info("Supabase client initialized successfully")
+        return self._client
 
     @property
-    def client(self) -> Optional[Client]:
+    def client(self) -> Optional["AsyncClient"]:
         return self._client
 
     @property
     def is_connected(self) -> bool:
-        return self._client is not None
+        return bool(self._postgrest_url or (self._url and self._key))
+
+    async def close(self) -> None:
+        """Write pending messages and close the PostgREST connection pool"""
+        await self.message_writer.close()
+        client, self._client = self._client, None
+        if client is None:
+            return
+        postgrest = getattr(client, "postgrest", client)
+        try:
+            await postgrest.aclose()
+        except Exception as e:
+            logger.warning(f"Error closing Supabase client: {e}")
 
     # ==================== User Operations ====================
 
@@ -69,12 +119,9 @@ class SupabaseClient:
             return None
 
         try:
-            response = (
-                self._client.table("users")
-                .select("*")
-                .eq("id", user_id)
-                .single()
-                .execute()
+            client = await self._connect()
+            response = await (
+                client.table("users").select("*").eq("id", user_id).single().execute()
             )
             return response.data
         except Exception as e:
@@ -87,12 +134,9 @@ class SupabaseClient:
             return None
 
         try:
-            response = (
-                self._client.table("users")
-                .select("*")
-                .eq("email", email)
-                .single()
-                .execute()
+            client = await self._connect()
+            response = await (
+                client.table("users").select("*").eq("email", email).single().execute()
             )
             return response.data
         except Exception as e:
@@ -105,7 +149,8 @@ class SupabaseClient:
             return None
 
         try:
-            response = self._client.table("users").insert(user_data).execute()
+            client = await self._connect()
+            response = await client.table("users").insert(user_data).execute()
             return response.data[0] if response.data else None
         except Exception as e:
             logger.error(f"Error creating user: {e}")
@@ -113,40 +158,81 @@ class SupabaseClient:
 
     # ==================== Conversation Operations ====================
 
-    async def get_conversations(self, user_id: str) -> list:
-        """Get all conversations for a user"""
+    @staticmethod
+    def conversation_cursor(conversation: dict) -> str:
+        """Opaque cursor for the page after `conversation`"""
+        key = f"{conversation['updated_at']}|{conversation['id']}"
+        return base64.urlsafe_b64encode(key.encode()).decode()
+
+    @staticmethod
+    def _decode_cursor(cursor: str) -> Tuple[str, str]:
+        updated_at, conv_id = base64.urlsafe_b64decode(cursor).decode().split("|", 1)
+        return updated_at, conv_id
+
+    async def get_conversations(
+        self, user_id: str, limit: Optional[int] = None, cursor: Optional[str] = None
+    ) -> list:
+        """Get a user's conversations, most recently updated first.
+
+        Keyset pagination on (updated_at, id): pass the `conversation_cursor`
+        of the last row to get the next page. Rows include `message_count`.
+        Queued messages are written first, so counts and order are current.
+        """
         if not self.is_connected:
             return []
 
         try:
-            response = (
-                self._client.table("conversations")
-                .select("*")
+            await self.message_writer.flush()
+            client = await self._connect()
+            query = (
+                client.table("conversations")
+                .select("*, messages(count)")
                 .eq("user_id", user_id)
-                .order("updated_at", desc=True)
-                .execute()
             )
-            return response.data or []
+            if cursor:
+                updated_at, conv_id = self._decode_cursor(cursor)
+                query = query.or_(
+                    f'updated_at.lt."{updated_at}",'
+                    f'and(updated_at.eq."{updated_at}",id.lt.{conv_id})'
+                )
+            query = query.order("updated_at", desc=True).order("id", desc=True)
+            if limit is not None:
+                query = query.limit(limit)
+            response = await query.execute()
+            return [self._with_message_count(row) for row in response.data or []]
         except Exception as e:
             logger.error(f"Error getting conversations: {e}")
             return []
 
+    @staticmethod
+    def _with_message_count(row: dict) -> dict:
+        counts = row.pop("messages", None) or [{}]
+        row["message_count"] = counts[0].get("count", 0)
+        return row
+
     async def get_conversation(
-        self, conv_id: str, user_id: str = None
+        self,
+        conv_id: str,
+        user_id: str = None,
+        since: Optional[str] = None,
+        limit: Optional[int] = None,
     ) -> Optional[dict]:
-        """Get single conversation with messages"""
+        """Get single conversation with a window of its messages"""
         if not self.is_connected:
             return None
 
         try:
-            query = self._client.table("conversations").select("*").eq("id", conv_id)
+            client = await self._connect()
+            query = client.table("conversations").select("*").eq("id", conv_id)
             if user_id:
                 query = query.eq("user_id", user_id)
-            response = query.single().execute()
+            # Fetch the conversation and its messages concurrently
+            response, messages = await asyncio.gather(
+                query.single().execute(),
+                self.get_messages(conv_id, since=since, limit=limit),
+            )
 
             if response.data:
-                # Get messages for this conversation
-                messages = await self.get_messages(conv_id)
                 response.data["messages"] = messages
 
             return response.data
@@ -165,13 +251,14 @@ class SupabaseClient:
             return None
 
         try:
+            client = await self._connect()
             data = {
                 "user_id": user_id,
                 "title": title,
                 "model": model,
                 "settings": {"temperature": 1.0, "max_tokens": 4096},
             }
-            response = self._client.table("conversations").insert(data).execute()
+            response = await client.table("conversations").insert(data).execute()
             return response.data[0] if response.data else None
         except Exception as e:
             logger.error(f"Error creating conversation: {e}")
@@ -183,11 +270,9 @@ class SupabaseClient:
             return None
 
         try:
-            response = (
-                self._client.table("conversations")
-                .update(data)
-                .eq("id", conv_id)
-                .execute()
+            client = await self._connect()
+            response = await (
+                client.table("conversations").update(data).eq("id", conv_id).execute()
             )
             return response.data[0] if response.data else None
         except Exception as e:
@@ -200,16 +285,19 @@ class SupabaseClient:
             return False
 
         try:
+            # Queued messages of the conversation must not outlive it
+            await self.message_writer.flush()
+            client = await self._connect()
             # Delete messages first
-            self._client.table("messages").delete().eq(
+            await client.table("messages").delete().eq(
                 "conversation_id", conv_id
             ).execute()
 
             # Delete conversation
-            query = self._client.table("conversations").delete().eq("id", conv_id)
+            query = client.table("conversations").delete().eq("id", conv_id)
             if user_id:
                 query = query.eq("user_id", user_id)
-            query.execute()
+            await query.execute()
 
             return True
         except Exception as e:
@@ -218,20 +306,47 @@ class SupabaseClient:
 
     # ==================== Message Operations ====================
 
-    async def get_messages(self, conversation_id: str) -> list:
-        """Get all messages for a conversation"""
+    async def get_messages(
+        self,
+        conversation_id: str,
+        since: Optional[str] = None,
+        before: Optional[str] = None,
+        limit: Optional[int] = None,
+    ) -> list:
+        """Get a window of a conversation's messages, oldest first.
+
+        Queued messages are written first, so reads see every message.
+
+        `since` returns messages created after that timestamp, `before` the
+        last `limit` messages created before it. Without either, the last
+        `limit` messages (or all of them) are returned.
+        """
         if not self.is_connected:
             return []
 
         try:
-            response = (
-                self._client.table("messages")
+            await self.message_writer.flush()
+            client = await self._connect()
+            query = (
+                client.table("messages")
                 .select("*")
                 .eq("conversation_id", conversation_id)
-                .order("created_at", desc=False)
-                .execute()
             )
-            return response.data or []
+            if since:
+                query = query.gt("created_at", since)
+            if before:
+                query = query.lt("created_at", before)
+            if limit is None:
+                response = await query.order("created_at", desc=False).execute()
+                return response.data or []
+
+            # The newest messages of the window are wanted unless paging forward
+            newest_first = since is None
+            response = await (
+                query.order("created_at", desc=newest_first).limit(limit).execute()
+            )
+            rows = response.data or []
+            return rows[::-1] if newest_first else rows
         except Exception as e:
             logger.error(f"Error getting messages: {e}")
             return []
@@ -239,27 +354,68 @@ class SupabaseClient:
     async def add_message(
         self, conversation_id: str, role: str, content: str
     ) -> Optional[dict]:
-        """Add message to conversation"""
+        """Queue a message for the next batched insert.
+
+        The id and timestamp are assigned here, so the returned row is final
+        although it is written in the background.
+        """
         if not self.is_connected:
             return None
 
-        try:
-            data = {
-                "conversation_id": conversation_id,
-                "role": role,
-                "content": content,
-            }
-            response = self._client.table("messages").insert(data).execute()
-
-            # Update conversation's updated_at
-            self._client.table("conversations").update({"updated_at": "now()"}).eq(
-                "id", conversation_id
-            ).execute()
-
-            return response.data[0] if response.data else None
-        except Exception as e:
-            logger.error(f"Error adding message: {e}")
-            return None
+        data = {
+            "id": str(uuid.uuid4()),
+            "conversation_id": conversation_id,
+            "role": role,
+            "content": content,
+            "created_at": datetime.now(timezone.utc).isoformat(),
+        }
+        self.message_writer.add(data)
+        return data
+
+    async def _write_messages(self, batch: Dict[str, List[dict]]) -> None:
+        """Bulk insert queued messages and touch their conversations.
+
+        One `append_messages` call (supabase/migrations/002) does both in a
+        single round-trip. Databases without that function get the insert
+        first and the `updated_at` touches after it. The insert skips ids
+        that already exist, so a retried batch is not inserted twice; failed
+        touches are only logged since the messages are already stored.
+        """
+        client = await self._connect()
+        rows = [row for messages in batch.values() for row in messages]
+        if self._append_rpc:
+            try:
+                await client.rpc("append_messages", {"batch": rows}).execute()
+                return
+            except APIError as e:
+                # PGRST202: the function does not exist
+                if e.code != "PGRST202":
+                    raise
+                logger.warning(
+                    "append_messages function not found, "
+                    "run supabase/migrations/002_append_messages.sql"
+                )
+                self._append_rpc = False
+
+        await (
+            client.table("messages")
+            .upsert(rows, on_conflict="id", ignore_duplicates=True)
+            .execute()
+        )
+        touches = [
+            client.table("conversations")
+            .update({"updated_at": messages[-1]["created_at"]})
+            .eq("id", conversation_id)
+            .execute()
+            for conversation_id, messages in batch.items()
+        ]
+        for conversation_id, result in zip(
+            batch, await asyncio.gather(*touches, return_exceptions=True)
+        ):
+            if isinstance(result, Exception):
+                logger.warning(
+                    f"Error touching conversation {conversation_id}: {result}"
+                )
 
     async def init_db(self):
         """Initialize database tables if they don't exist (Self-Healing)"""
@@ -270,7 +426,8 @@ class SupabaseClient:
 
         # Check if users table exists by trying to select from it
         try:
-            self._client.table("users").select("id").limit(1).execute()
+            client = await self._connect()
+            await client.table("users").select("id").limit(1).execute()
         except Exception as e:
             logger.warning(
                 f"Tables not found, attempting to create schema... Error: {e}"
@@ -292,6 +449,8 @@ class SupabaseClient:
                 CREATE TABLE IF NOT EXISTS users (id UUID PRIMARY KEY DEFAULT gen_random_uuid(), email TEXT UNIQUE NOT NULL, name TEXT, avatar_url TEXT, created_at TIMESTAMPTZ DEFAULT NOW(), updated_at TIMESTAMPTZ DEFAULT NOW(), last_login TIMESTAMPTZ, settings JSONB DEFAULT '{}'::jsonb);
                 CREATE TABLE IF NOT EXISTS conversations (id UUID PRIMARY KEY DEFAULT gen_random_uuid(), user_id UUID REFERENCES users(id) ON DELETE CASCADE, title TEXT DEFAULT 'Yeni Sohbet', model TEXT DEFAULT 'anthropic/claude-sonnet-4', settings JSONB DEFAULT '{"temperature": 1.0, "max_tokens": 4096}'::jsonb, created_at TIMESTAMPTZ DEFAULT NOW(), updated_at TIMESTAMPTZ DEFAULT NOW());
                 CREATE TABLE IF NOT EXISTS messages (id UUID PRIMARY KEY DEFAULT gen_random_uuid(), conversation_id UUID REFERENCES conversations(id) ON DELETE CASCADE, role TEXT NOT NULL CHECK (role IN ('user', 'assistant', 'system')), content TEXT NOT NULL, created_at TIMESTAMPTZ DEFAULT NOW(), metadata JSONB DEFAULT '{}'::jsonb);
+                CREATE INDEX IF NOT EXISTS idx_conversations_user_updated ON conversations (user_id, updated_at DESC, id DESC);
+                CREATE INDEX IF NOT EXISTS idx_messages_conversation_created ON messages (conversation_id, created_at);
                 CREATE TABLE IF NOT EXISTS attachments (id UUID PRIMARY KEY DEFAULT gen_random_uuid(), message_id UUID REFERENCES messages(id) ON DELETE CASCADE, user_id UUID REFERENCES users(id) ON DELETE CASCADE, file_name TEXT NOT NULL, file_type TEXT, file_size INTEGER, storage_path TEXT NOT NULL, created_at TIMESTAMPTZ DEFAULT NOW());
             """
             )
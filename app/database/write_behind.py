@@ -0,0 +1,124 @@
+"""
+OpenHT - Write-behind queue for chat messages
+Mesaj eklemelerini toplu insert'lere dönüştürür
+"""
+
+import asyncio
+from collections import defaultdict
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+from loguru import logger
+
+
+class MessageWriteBehind:
+    """Coalesces message inserts into periodic bulk writes.
+
+    Messages are queued and written every `flush_interval` seconds, or as soon
+    as `max_batch` messages are pending. Failed batches are retried up to
+    `max_retries` times before they are dropped; both are reported by
+    `stats()`.
+
+    Args:
+        write: Coroutine persisting a batch, grouped by conversation id
+        flush_interval: Seconds between flushes
+        max_batch: Pending messages that trigger an early flush
+        max_retries: Failed attempts before a batch is dropped
+    """
+
+    def __init__(
+        self,
+        write: Callable[[Dict[str, List[dict]]], Awaitable[Any]],
+        flush_interval: float = 0.2,
+        max_batch: int = 50,
+        max_retries: int = 3,
+    ):
+        self.write = write
+        self.flush_interval = flush_interval
+        self.max_batch = max(1, max_batch)
+        self.max_retries = max_retries
+
+        self._pending: List[dict] = []
+        self._attempts = 0
+        self._wakeup: Optional[asyncio.Event] = None
+        self._lock: Optional[asyncio.Lock] = None
+        self._task: Optional[asyncio.Task] = None
+
+        # Metrics
+        self.queued = 0
+        self.written = 0
+        self.batches = 0
+        self.failed_batches = 0
+        self.dropped = 0
+        self.last_error: Optional[str] = None
+
+    def _ensure_started(self) -> None:
+        if self._task is None or self._task.done():
+            self._wakeup = asyncio.Event()
+            self._lock = asyncio.Lock()
+            self._task = asyncio.create_task(self._run())
+
+    def add(self, row: dict) -> None:
+        """Queue a message row, the caller does not wait for the write"""
+        self._ensure_started()
+        self._pending.append(row)
+        self.queued += 1
+        if len(self._pending) >= self.max_batch:
+            self._wakeup.set()
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), self.flush_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+            await self.flush()
+
+    async def flush(self) -> None:
+        """Write every pending message now"""
+        if self._lock is None:
+            return
+        async with self._lock:
+            while self._pending:
+                batch = self._pending[: self.max_batch]
+                grouped: Dict[str, List[dict]] = defaultdict(list)
+                for row in batch:
+                    grouped[row["conversation_id"]].append(row)
+
+                try:
+                    await self.write(grouped)
+                except Exception as e:
+                    self.failed_batches += 1
+                    self.last_error = str(e)
+                    self._attempts += 1
+                    if self._attempts < self.max_retries:
+                        logger.warning(f"Message batch write failed, will retry: {e}")
+                        return
+                    logger.error(f"Dropping {len(batch)} messages after {e}")
+                    self.dropped += len(batch)
+                else:
+                    self.written += len(batch)
+                    self.batches += 1
+                self._attempts = 0
+                del self._pending[: len(batch)]
+
+    async def close(self) -> None:
+        """Stop the background flusher after writing pending messages"""
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+        # Nothing flushes after shutdown, a failure now drops the batch
+        self._attempts = max(0, self.max_retries - 1)
+        await self.flush()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "pending": len(self._pending),
+            "queued": self.queued,
+            "written": self.written,
+            "batches": self.batches,
+            "failed_batches": self.failed_batches,
+            "dropped": self.dropped,
+            "last_error": self.last_error,
+        }
@@ -0,0 +1,142 @@
+"""Live agent events for streaming UIs.
+
+While an agent runs inside `event_stream(stream)`, the LLM and the agent loop
+publish assistant token deltas, tool-call start/finish events and step
+boundaries to that stream. A consumer (e.g. the WebSocket chat endpoint)
+iterates the stream and forwards the events as they happen.
+"""
+
+import asyncio
+import time
+from collections import deque
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Deque, Dict, Optional
+
+from pydantic import BaseModel, Field
+
+
+class EventType:
+    TOKEN = "token"
+    STEP_START = "step_start"
+    STEP_END = "step_end"
+    TOOL_START = "tool_start"
+    TOOL_END = "tool_end"
+
+
+class AgentEvent(BaseModel):
+    """A single event published by a running agent"""
+
+    type: str
+    data: Dict[str, Any] = Field(default_factory=dict)
+    timestamp: float = Field(default_factory=time.time)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {"type": self.type, "timestamp": self.timestamp, **self.data}
+
+
+class EventStream:
+    """Bounded single-consumer event queue with backpressure.
+
+    Token deltas never block the producer: while the queue is full they are
+    coalesced into one pending delta that is delivered as soon as the consumer
+    catches up. Other events wait for free space, so a slow consumer slows the
+    agent down instead of growing memory without bound.
+    """
+
+    def __init__(self, max_size: int = 256):
+        self.max_size = max_size
+        self._events: Deque[AgentEvent] = deque()
+        self._pending_tokens = ""
+        self._readable = asyncio.Event()
+        self._writable = asyncio.Event()
+        self._writable.set()
+        self._closed = False
+        self.coalesced = 0
+
+    @property
+    def closed(self) -> bool:
+        return self._closed
+
+    async def publish(self, type: str, **data: Any) -> None:
+        """Publish an event, waiting while the queue is full (except tokens)"""
+        if self._closed:
+            return
+
+        if type == EventType.TOKEN:
+            self._pending_tokens += data.get("content") or ""
+            if len(self._events) < self.max_size:
+                self._flush_tokens()
+            else:
+                self.coalesced += 1
+            self._readable.set()
+            return
+
+        while len(self._events) >= self.max_size and not self._closed:
+            self._writable.clear()
+            await self._writable.wait()
+        if self._closed:
+            return
+
+        # Keep pending tokens ahead of the event that follows them
+        self._flush_tokens()
+        self._events.append(AgentEvent(type=type, data=data))
+        self._readable.set()
+
+    def _flush_tokens(self) -> None:
+        if self._pending_tokens:
+            self._events.append(
+                AgentEvent(type=EventType.TOKEN, data={"content": self._pending_tokens})
+            )
+            self._pending_tokens = ""
+
+    def close(self) -> None:
+        """Stop accepting events, the consumer still receives queued ones"""
+        self._closed = True
+        self._readable.set()
+        self._writable.set()
+
+    def __aiter__(self) -> "EventStream":
+        return self
+
+    async def __anext__(self) -> AgentEvent:
+        while True:
+            if self._events:
+                event = self._events.popleft()
+                self._writable.set()
+                return event
+            if self._pending_tokens:
+                self._flush_tokens()
+                continue
+            if self._closed:
+                raise StopAsyncIteration
+            self._readable.clear()
+            await self._readable.wait()
+
+
+_current_stream: ContextVar[Optional[EventStream]] = ContextVar(
+    "agent_event_stream", default=None
+)
+
+
+@contextmanager
+def event_stream(stream: EventStream):
+    """Publish events of agents run inside the block (and tasks it spawns)"""
+    token = _current_stream.set(stream)
+    try:
+        yield stream
+    finally:
+        _current_stream.reset(token)
+
+
+def streaming_enabled() -> bool:
+    """Whether events of the current context have a subscriber"""
+    stream = _current_stream.get()
+    return stream is not None and not stream.closed
+
+
+async def emit(type: str, **data: Any) -> None:
+    """Publish an event to the current stream, if any"""
+    stream = _current_stream.get()
+    if stream is not None:
+        await stream.publish(type, **data)
@@ -9,6 +9,7 @@ from app.agent.base import BaseAgent
 from app.flow.base import BaseFlow
 from app.llm import LLM
 from app.logger import logger
+from app.rate_limiter import Priority, request_priority
 from app.schema import AgentState, Message, ToolChoice
 from app.tool import PlanningTool
 
@@ -93,6 +94,12 @@ class PlanningFlow(BaseFlow):
 
     async def execute(self, input_text: str) -> str:
         """Execute the planning flow with agents."""
+        # Flows run unattended, let interactive requests go first
+        with request_priority(Priority.BACKGROUND):
+            return await self._execute(input_text)
+
+    async def _execute(self, input_text: str) -> str:
+        """Run the plan steps until the plan is finished."""
         try:
             if not self.primary_agent:
                 raise ValueError("No primary agent available")
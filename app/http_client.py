@@ -0,0 +1,78 @@
+"""Process-wide HTTP connection pool.
+
+All LLM clients and web fetchers share one httpx.AsyncClient, so concurrent
+sessions reuse keep-alive (and TLS) connections instead of opening new ones
+for every request. The connections of a client belong to the event loop
+that opened them, so each running loop gets its own client.
+"""
+
+import asyncio
+import threading
+from typing import Dict, Optional
+
+import httpx
+
+from app.config import HttpPoolSettings, config
+from app.logger import logger
+
+
+_http_clients: Dict[Optional[asyncio.AbstractEventLoop], httpx.AsyncClient] = {}
+_http_client_lock = threading.Lock()
+
+
+def create_http_client(settings: HttpPoolSettings) -> httpx.AsyncClient:
+    """Build an httpx client from pool settings."""
+    limits = httpx.Limits(
+        max_connections=settings.max_connections,
+        max_keepalive_connections=settings.max_keepalive_connections,
+        keepalive_expiry=settings.keepalive_expiry,
+    )
+    timeout = httpx.Timeout(settings.timeout, connect=settings.connect_timeout)
+
+    http2 = settings.http2
+    if http2:
+        try:
+            import h2  # noqa: F401
+        except ImportError:
+            logger.warning("HTTP/2 requested but 'h2' is not installed, using HTTP/1.1")
+            http2 = False
+
+    return httpx.AsyncClient(
+        limits=limits, timeout=timeout, http2=http2, follow_redirects=True
+    )
+
+
+def _current_loop() -> Optional[asyncio.AbstractEventLoop]:
+    try:
+        return asyncio.get_running_loop()
+    except RuntimeError:
+        return None
+
+
+def get_http_client() -> httpx.AsyncClient:
+    """Return the shared HTTP client of the running event loop.
+
+    The client is created on first use in each loop. Clients created outside
+    a running loop are shared by those callers.
+    """
+    loop = _current_loop()
+    client = _http_clients.get(loop)
+    if client is None or client.is_closed:
+        with _http_client_lock:
+            # Clients of closed loops can no longer be used or closed
+            for stale in [k for k in _http_clients if k and k.is_closed()]:
+                del _http_clients[stale]
+            client = _http_clients.get(loop)
+            if client is None or client.is_closed:
+                client = create_http_client(config.http_pool)
+                _http_clients[loop] = client
+    return client
+
+
+async def close_http_client() -> None:
+    """Close the HTTP clients of the running event loop and of no loop."""
+    with _http_client_lock:
+        clients = [_http_clients.pop(key, None) for key in {_current_loop(), None}]
+    for client in clients:
+        if client is not None and not client.is_closed:
+            await client.aclose()
@@ -1,5 +1,8 @@
+import hashlib
+import json
 import math
-from typing import Dict, List, Optional, Union
+from collections import OrderedDict
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple, Union
 
 import tiktoken
 from openai import (
@@ -20,13 +23,20 @@ from tenacity import (
 
 from app.bedrock import BedrockClient
 from app.config import LLMSettings, config
+from app.event_stream import EventType, emit
 from app.exceptions import TokenLimitExceeded
+from app.http_client import get_http_client
 from app.logger import logger  # Assuming a logger is set up in your app
+from app.rate_limiter import get_scheduler, retry_after_wait
+from app.response_cache import get_response_cache, make_cache_key
 from app.schema import (
     ROLE_VALUES,
     TOOL_CHOICE_TYPE,
     TOOL_CHOICE_VALUES,
+    Function,
     Message,
+    Role,
+    ToolCall,
     ToolChoice,
 )
 
@@ -54,8 +64,42 @@ class TokenCounter:
     HIGH_DETAIL_TARGET_SHORT_SIDE = 768
     TILE_SIZE = 512
 
-    def __init__(self, tokenizer):
+    # Per-message cache constants
+    DEFAULT_CACHE_SIZE = 4096
+
+    def __init__(self, tokenizer, cache_size: int = DEFAULT_CACHE_SIZE):
         self.tokenizer = tokenizer
+        self.cache_size = cache_size
+        self._cache: "OrderedDict[str, int]" = OrderedDict()
+        self.cache_hits = 0
+        self.cache_misses = 0
+
+    @staticmethod
+    def _hash_item(item: Union[dict, str]) -> str:
+        """Build a stable content hash for a message or tool schema"""
+        if not isinstance(item, str):
+            item = json.dumps(item, sort_keys=True, ensure_ascii=False, default=str)
+        return hashlib.blake2b(item.encode("utf-8"), digest_size=16).hexdigest()
+
+    def _cached(self, key: str, compute) -> int:
+        """Return a cached token count, computing and storing it on a miss"""
+        if key in self._cache:
+            self._cache.move_to_end(key)
+            self.cache_hits += 1
+            return self._cache[key]
+
+        self.cache_misses += 1
+        tokens = compute()
+        if self.cache_size > 0:
+            self._cache[key] = tokens
+            # Evict least recently used entries
+            while len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+        return tokens
+
+    def clear_cache(self) -> None:
+        """Drop all cached token counts"""
+        self._cache.clear()
 
     def count_text(self, text: str) -> int:
         """Calculate tokens for a text string"""
@@ -144,31 +188,132 @@ class TokenCounter:
                 token_count += self.count_text(function.get("arguments", ""))
         return token_count
 
+    def count_message(self, message: dict) -> int:
+        """Calculate the number of tokens in a single message"""
+        tokens = self.BASE_MESSAGE_TOKENS  # Base tokens per message
+
+        # Add role tokens
+        tokens += self.count_text(message.get("role", ""))
+
+        # Add content tokens
+        if "content" in message:
+            tokens += self.count_content(message["content"])
+
+        # Add tool calls tokens
+        if "tool_calls" in message:
+            tokens += self.count_tool_calls(message["tool_calls"])
+
+        # Add name and tool_call_id tokens
+        tokens += self.count_text(message.get("name", ""))
+        tokens += self.count_text(message.get("tool_call_id", ""))
+
+        return tokens
+
     def count_message_tokens(self, messages: List[dict]) -> int:
-        """Calculate the total number of tokens in a message list"""
+        """Calculate the total number of tokens in a message list
+
+        Per-message counts are cached by content hash, so only messages that
+        were not seen before are tokenized.
+        """
         total_tokens = self.FORMAT_TOKENS  # Base format tokens
 
         for message in messages:
-            tokens = self.BASE_MESSAGE_TOKENS  # Base tokens per message
+            total_tokens += self._cached(
+                "msg:" + self._hash_item(message),
+                lambda message=message: self.count_message(message),
+            )
 
-            # Add role tokens
-            tokens += self.count_text(message.get("role", ""))
+        return total_tokens
 
-            # Add content tokens
-            if "content" in message:
-                tokens += self.count_content(message["content"])
+    def count_tools(self, tools: List[dict]) -> int:
+        """Calculate the total number of tokens in a list of tool schemas"""
+        total_tokens = 0
+        for tool in tools:
+            serialized = str(tool)
+            total_tokens += self._cached(
+                "tool:" + self._hash_item(serialized),
+                lambda serialized=serialized: self.count_text(serialized),
+            )
+        return total_tokens
 
-            # Add tool calls tokens
-            if "tool_calls" in message:
-                tokens += self.count_tool_calls(message["tool_calls"])
 
-            # Add name and tool_call_id tokens
-            tokens += self.count_text(message.get("name", ""))
-            tokens += self.count_text(message.get("tool_call_id", ""))
+class ToolCallAccumulator:
+    """Assemble streamed tool-call deltas into complete ToolCall objects.
+
+    A call is emitted as soon as its arguments parse as a JSON object, when a
+    later call starts, or when the stream is flushed.
+    """
+
+    def __init__(self):
+        self._calls: Dict[int, dict] = {}
+        self._emitted: set = set()
+
+    def add(self, deltas: List[Any]) -> List[ToolCall]:
+        """Merge a chunk of tool-call deltas and return newly completed calls"""
+        completed = []
+        for delta in deltas:
+            index = delta.index if delta.index is not None else len(self._calls)
+            if index not in self._calls:
+                # A new call starting means every earlier one has finished
+                completed.extend(self._emit(lambda i: i < index))
+                self._calls[index] = {"id": "", "name": "", "arguments": ""}
+            call = self._calls[index]
+            if delta.id:
+                call["id"] = delta.id
+            if delta.function:
+                if delta.function.name:
+                    call["name"] += delta.function.name
+                if delta.function.arguments:
+                    call["arguments"] += delta.function.arguments
+            if index not in self._emitted and self._arguments_closed(call):
+                completed.extend(self._emit(lambda i: i == index))
+        return completed
+
+    def flush(self) -> List[ToolCall]:
+        """Return all calls that have not been emitted yet"""
+        return self._emit(lambda i: True)
+
+    def count_tokens(self, token_counter: TokenCounter) -> int:
+        """Estimate completion tokens spent on tool calls"""
+        return sum(
+            token_counter.count_text(call["name"])
+            + token_counter.count_text(call["arguments"])
+            for call in self._calls.values()
+        )
 
-            total_tokens += tokens
+    @staticmethod
+    def _arguments_closed(call: dict) -> bool:
+        arguments = call["arguments"].rstrip()
+        if not call["id"] or not call["name"] or not arguments.endswith("}"):
+            return False
+        try:
+            json.loads(arguments)
+        except json.JSONDecodeError:
+            return False
+        return True
+
+    def _emit(self, predicate) -> List[ToolCall]:
+        completed = []
+        for index in sorted(self._calls):
+            if index in self._emitted or not predicate(index):
+                continue
+            call = self._calls[index]
+            self._emitted.add(index)
+            completed.append(
+                ToolCall(
+                    id=call["id"],
+                    function=Function(name=call["name"], arguments=call["arguments"]),
+                )
+            )
+        return completed
 
-        return total_tokens
+
+async def _prepend(first: Any, rest: AsyncIterator) -> AsyncIterator:
+    """Iterate over an already received first item followed by the rest"""
+    if first is not None:
+        yield first
+    async for item in rest:
+        yield item
 
 
 class LLM:
@@ -177,6 +322,17 @@ class LLM:
     def __new__(
         cls, config_name: str = "default", llm_config: Optional[LLMSettings] = None
     ):
+        if (
+            cls is LLM
+            and llm_config is None
+            and config.llm_router.enabled
+            and (config_name == "default" or config_name not in config.llm)
+        ):
+            # Requests for the default model go through the shared router
+            from app.llm_router import get_router
+
+            return get_router()
+
         if config_name not in cls._instances:
             instance = super().__new__(cls)
             instance.__init__(config_name, llm_config)
@@ -196,10 +352,15 @@ class LLM:
             self.api_key = llm_config.api_key
             self.api_version = llm_config.api_version
             self.base_url = llm_config.base_url
+            self.prompt_caching = getattr(llm_config, "prompt_caching", False)
 
             # Add token counting related attributes
             self.total_input_tokens = 0
             self.total_completion_tokens = 0
+            self.total_cached_input_tokens = 0
+            self.total_cache_write_tokens = 0
+            self.cache_hits = 0
+            self.cache_misses = 0
             self.max_input_tokens = (
                 llm_config.max_input_tokens
                 if hasattr(llm_config, "max_input_tokens")
@@ -218,13 +379,24 @@ class LLM:
                     base_url=self.base_url,
                     api_key=self.api_key,
                     api_version=self.api_version,
+                    http_client=get_http_client(),
                 )
             elif self.api_type == "aws":
                 self.client = BedrockClient()
             else:
-                self.client = AsyncOpenAI(api_key=self.api_key, base_url=self.base_url)
+                self.client = AsyncOpenAI(
+                    api_key=self.api_key,
+                    base_url=self.base_url,
+                    http_client=get_http_client(),
+                )
 
             self.token_counter = TokenCounter(self.tokenizer)
+            self.response_cache = get_response_cache()
+            self.scheduler = get_scheduler(
+                f"{self.api_type}:{self.base_url}:{self.model}",
+                getattr(llm_config, "requests_per_minute", None),
+                getattr(llm_config, "tokens_per_minute", None),
+            )
 
     def count_tokens(self, text: str) -> int:
         """Calculate the number of tokens in a text"""
@@ -246,6 +418,127 @@ class LLM:
             f"Total={input_tokens + completion_tokens}, Cumulative Total={self.total_input_tokens + self.total_completion_tokens}"
         )
 
+    def update_cache_stats(self, usage) -> None:
+        """Record provider-side prompt cache reads and writes from a usage block"""
+        if usage is None:
+            return
+        details = getattr(usage, "prompt_tokens_details", None)
+        cached_tokens = (getattr(details, "cached_tokens", 0) if details else 0) or 0
+        written_tokens = getattr(usage, "cache_creation_input_tokens", 0) or 0
+        if not self.prompt_caching and not cached_tokens:
+            return
+
+        self.total_cached_input_tokens += cached_tokens
+        self.total_cache_write_tokens += written_tokens
+        if cached_tokens:
+            self.cache_hits += 1
+        else:
+            self.cache_misses += 1
+        logger.info(
+            f"Prompt cache: Read={cached_tokens}, Write={written_tokens}, "
+            f"Hits={self.cache_hits}, Misses={self.cache_misses}, "
+            f"Cumulative Read={self.total_cached_input_tokens}"
+        )
+
+    def apply_prompt_cache(self, params: dict) -> dict:
+        """
+        Mark the stable request prefix (tools and system prompt) as cacheable.
+
+        Anthropic models (directly or via OpenRouter) take a cache_control
+        breakpoint on the last system message, which also covers the tool
+        schemas placed before it. Bedrock gets cachePoint blocks when the
+        request is converted. Other providers cache identical prefixes
+        automatically, so the request is left untouched.
+        """
+        if not self.prompt_caching:
+            return params
+
+        if self.api_type == "aws":
+            params["prompt_caching"] = True
+            return params
+
+        if "claude" not in self.model.lower():
+            return params
+
+        messages = params["messages"]
+        for index in range(len(messages) - 1, -1, -1):
+            message = messages[index]
+            if message["role"] != "system" or not message.get("content"):
+                continue
+            content = message["content"]
+            if isinstance(content, str):
+                content = [{"type": "text", "text": content}]
+            content = [dict(item) for item in content]
+            content[-1]["cache_control"] = {"type": "ephemeral"}
+            messages = list(messages)
+            messages[index] = {**message, "content": content}
+            params["messages"] = messages
+            break
+        return params
+
+    def _response_cache_key(self, params: dict, use_cache: bool) -> Optional[str]:
+        """Return the response cache key for a request, or None to bypass the cache"""
+        if not use_cache or self.response_cache is None:
+            return None
+        # Only greedy sampling is repeatable; reasoning models are sent
+        # without a temperature and sample at their own default
+        deterministic = (
+            "temperature" in params
+            and params["temperature"] == 0
+            and self.model not in REASONING_MODELS
+        )
+        if not deterministic and not config.response_cache.cache_nondeterministic:
+            return None
+        return make_cache_key(params, namespace=f"{self.api_type}:{self.base_url}")
+
+    async def _create_completion(self, input_tokens: int = 0, **params):
+        """
+        Send a chat completion request through the rate limiter.
+
+        Waits for a request slot (in the priority of the calling context),
+        then feeds the provider's rate-limit headers back into the scheduler.
+        Completion tokens of non-streaming responses are charged afterwards.
+        """
+        await self.scheduler.acquire(input_tokens)
+
+        completions = self.client.chat.completions
+        try:
+            if hasattr(completions, "with_raw_response"):
+                raw = await completions.with_raw_response.create(**params)
+                self.scheduler.update_from_headers(raw.headers)
+                response = raw.parse()
+            else:
+                response = await completions.create(**params)
+        except RateLimitError as e:
+            self.scheduler.update_from_headers(e.response.headers, throttled=True)
+            raise
+
+        usage = getattr(response, "usage", None)
+        if usage is not None:
+            self.scheduler.record_usage(usage.completion_tokens)
+        return response
+
+    @staticmethod
+    def _serialize_message(message: Any) -> dict:
+        """Convert an assistant message from any client into a cacheable dict"""
+        return {
+            "role": "assistant",
+            "content": message.content,
+            "tool_calls": [
+                {
+                    "id": call.id,
+                    "type": "function",
+                    "function": {
+                        "name": call.function.name,
+                        "arguments": call.function.arguments,
+                    },
+                }
+                for call in message.tool_calls
+            ]
+            if message.tool_calls
+            else None,
+        }
+
     def check_token_limit(self, input_tokens: int) -> bool:
         """Check if token limits are exceeded"""
         if self.max_input_tokens is not None:
@@ -352,7 +645,7 @@ class LLM:
         return formatted_messages
 
     @retry(
-        wait=wait_random_exponential(min=1, max=60),
+        wait=retry_after_wait(wait_random_exponential(min=1, max=60)),
         stop=stop_after_attempt(6),
         retry=retry_if_exception_type(
             (OpenAIError, Exception, ValueError)
@@ -364,6 +657,7 @@ class LLM:
         system_msgs: Optional[List[Union[dict, Message]]] = None,
         stream: bool = True,
         temperature: Optional[float] = None,
+        use_cache: bool = True,
     ) -> str:
         """
         Send a prompt to the LLM and get the response.
@@ -373,6 +667,7 @@ class LLM:
             system_msgs: Optional system messages to prepend
             stream (bool): Whether to stream the response
             temperature (float): Sampling temperature for the response
+            use_cache (bool): Whether to consult the response cache
 
         Returns:
             str: The generated response
@@ -416,10 +711,19 @@ class LLM:
                     temperature if temperature is not None else self.temperature
                 )
 
+            self.apply_prompt_cache(params)
+
+            cache_key = self._response_cache_key(params, use_cache)
+            if cache_key:
+                cached = await self.response_cache.get(cache_key)
+                if cached is not None:
+                    logger.info("Serving LLM response from cache")
+                    return cached["content"]
+
             if not stream:
                 # Non-streaming request
-                response = await self.client.chat.completions.create(
-                    **params, stream=False
+                response = await self._create_completion(
+                    input_tokens, **params, stream=False
                 )
 
                 if not response.choices or not response.choices[0].message.content:
@@ -429,21 +733,33 @@ class LLM:
                 self.update_token_count(
                     response.usage.prompt_tokens, response.usage.completion_tokens
                 )
+                self.update_cache_stats(response.usage)
+
+                if cache_key:
+                    await self.response_cache.set(
+                        cache_key, {"content": response.choices[0].message.content}
+                    )
 
                 return response.choices[0].message.content
 
             # Streaming request, For streaming, update estimated token count before making the request
             self.update_token_count(input_tokens)
 
-            response = await self.client.chat.completions.create(**params, stream=True)
+            response = await self._create_completion(
+                input_tokens, **params, stream=True
+            )
 
             collected_messages = []
             completion_text = ""
             async for chunk in response:
+                if not chunk.choices:
+                    continue
                 chunk_message = chunk.choices[0].delta.content or ""
                 collected_messages.append(chunk_message)
                 completion_text += chunk_message
                 print(chunk_message, end="", flush=True)
+                if chunk_message:
+                    await emit(EventType.TOKEN, content=chunk_message)
 
             print()  # Newline after streaming
             full_response = "".join(collected_messages).strip()
@@ -456,6 +772,10 @@ class LLM:
                 f"Estimated completion tokens for streaming response: {completion_tokens}"
             )
             self.total_completion_tokens += completion_tokens
+            self.scheduler.record_usage(completion_tokens)
+
+            if cache_key:
+                await self.response_cache.set(cache_key, {"content": full_response})
 
             return full_response
 
@@ -479,7 +799,7 @@ class LLM:
             raise
 
     @retry(
-        wait=wait_random_exponential(min=1, max=60),
+        wait=retry_after_wait(wait_random_exponential(min=1, max=60)),
         stop=stop_after_attempt(6),
         retry=retry_if_exception_type(
             (OpenAIError, Exception, ValueError)
@@ -590,7 +910,7 @@ class LLM:
 
             # Handle non-streaming request
             if not stream:
-                response = await self.client.chat.completions.create(**params)
+                response = await self._create_completion(input_tokens, **params)
 
                 if not response.choices or not response.choices[0].message.content:
                     raise ValueError("Empty or invalid response from LLM")
@@ -600,13 +920,17 @@ class LLM:
 
             # Handle streaming request
             self.update_token_count(input_tokens)
-            response = await self.client.chat.completions.create(**params)
+            response = await self._create_completion(input_tokens, **params)
 
             collected_messages = []
             async for chunk in response:
+                if not chunk.choices:
+                    continue
                 chunk_message = chunk.choices[0].delta.content or ""
                 collected_messages.append(chunk_message)
                 print(chunk_message, end="", flush=True)
+                if chunk_message:
+                    await emit(EventType.TOKEN, content=chunk_message)
 
             print()  # Newline after streaming
             full_response = "".join(collected_messages).strip()
@@ -634,8 +958,107 @@ class LLM:
             logger.error(f"Unexpected error in ask_with_images: {e}")
             raise
 
+    def _prepare_tool_request(
+        self,
+        messages: List[Union[dict, Message]],
+        system_msgs: Optional[List[Union[dict, Message]]] = None,
+        timeout: int = 300,
+        tools: Optional[List[dict]] = None,
+        tool_choice: TOOL_CHOICE_TYPE = ToolChoice.AUTO,  # type: ignore
+        temperature: Optional[float] = None,
+        **kwargs,
+    ) -> Tuple[dict, int]:
+        """
+        Validate inputs and build the completion parameters for a tool request.
+
+        Returns:
+            Tuple[dict, int]: The request parameters and the estimated input tokens
+
+        Raises:
+            TokenLimitExceeded: If token limits are exceeded
+            ValueError: If tools, tool_choice, or messages are invalid
+        """
+        # Validate tool_choice
+        if tool_choice not in TOOL_CHOICE_VALUES:
+            raise ValueError(f"Invalid tool_choice: {tool_choice}")
+
+        # Check if the model supports images
+        supports_images = self.model in MULTIMODAL_MODELS
+
+        # Format messages
+        if system_msgs:
+            system_msgs = self.format_messages(system_msgs, supports_images)
+            messages = system_msgs + self.format_messages(messages, supports_images)
+        else:
+            messages = self.format_messages(messages, supports_images)
+
+        # Calculate input token count
+        input_tokens = self.count_message_tokens(messages)
+
+        # If there are tools, calculate token count for tool descriptions
+        tools_tokens = self.token_counter.count_tools(tools) if tools else 0
+
+        input_tokens += tools_tokens
+
+        # Check if token limits are exceeded
+        if not self.check_token_limit(input_tokens):
+            error_message = self.get_limit_error_message(input_tokens)
+            # Raise a special exception that won't be retried
+            raise TokenLimitExceeded(error_message)
+
+        # Validate tools if provided
+        if tools:
+            for tool in tools:
+                if not isinstance(tool, dict) or "type" not in tool:
+                    raise ValueError("Each tool must be a dict with 'type' field")
+
+        # Set up the completion request
+        params = {
+            "model": self.model,
+            "messages": messages,
+            "tools": tools,
+            "tool_choice": tool_choice,
+            "timeout": timeout,
+            **kwargs,
+        }
+
+        if self.model in REASONING_MODELS:
+            params["max_completion_tokens"] = self.max_tokens
+        else:
+            params["max_tokens"] = self.max_tokens
+            params["temperature"] = (
+                temperature if temperature is not None else self.temperature
+            )
+
+        self.apply_prompt_cache(params)
+
+        return params, input_tokens
+
     @retry(
-        wait=wait_random_exponential(min=1, max=60),
+        wait=retry_after_wait(wait_random_exponential(min=1, max=60)),
+        stop=stop_after_attempt(6),
+        retry=retry_if_exception_type(
+            (OpenAIError, Exception, ValueError)
+        ),  # Don't retry TokenLimitExceeded
+    )
+    async def _open_stream(self, input_tokens: int = 0, **params):
+        """Start a streaming completion and wait for its first chunk.
+
+        Nothing has reached the caller yet, so connection errors and rate
+        limits are retried here.
+
+        Returns:
+            The first chunk (None for an empty stream) and the chunk iterator
+        """
+        response = await self._create_completion(input_tokens, **params)
+        chunks = response.__aiter__()
+        try:
+            return await chunks.__anext__(), chunks
+        except StopAsyncIteration:
+            return None, chunks
+
+    @retry(
+        wait=retry_after_wait(wait_random_exponential(min=1, max=60)),
         stop=stop_after_attempt(6),
         retry=retry_if_exception_type(
             (OpenAIError, Exception, ValueError)
@@ -649,6 +1072,7 @@ class LLM:
         tools: Optional[List[dict]] = None,
         tool_choice: TOOL_CHOICE_TYPE = ToolChoice.AUTO,  # type: ignore
         temperature: Optional[float] = None,
+        use_cache: bool = True,
         **kwargs,
     ) -> ChatCompletionMessage | None:
         """
@@ -661,6 +1085,7 @@ class LLM:
             tools: List of tools to use
             tool_choice: Tool choice strategy
             temperature: Sampling temperature for the response
+            use_cache: Whether to consult the response cache
             **kwargs: Additional completion arguments
 
         Returns:
@@ -673,64 +1098,26 @@ class LLM:
             Exception: For unexpected errors
         """
         try:
-            # Validate tool_choice
-            if tool_choice not in TOOL_CHOICE_VALUES:
-                raise ValueError(f"Invalid tool_choice: {tool_choice}")
-
-            # Check if the model supports images
-            supports_images = self.model in MULTIMODAL_MODELS
-
-            # Format messages
-            if system_msgs:
-                system_msgs = self.format_messages(system_msgs, supports_images)
-                messages = system_msgs + self.format_messages(messages, supports_images)
-            else:
-                messages = self.format_messages(messages, supports_images)
-
-            # Calculate input token count
-            input_tokens = self.count_message_tokens(messages)
-
-            # If there are tools, calculate token count for tool descriptions
-            tools_tokens = 0
-            if tools:
-                for tool in tools:
-                    tools_tokens += self.count_tokens(str(tool))
-
-            input_tokens += tools_tokens
-
-            # Check if token limits are exceeded
-            if not self.check_token_limit(input_tokens):
-                error_message = self.get_limit_error_message(input_tokens)
-                # Raise a special exception that won't be retried
-                raise TokenLimitExceeded(error_message)
-
-            # Validate tools if provided
-            if tools:
-                for tool in tools:
-                    if not isinstance(tool, dict) or "type" not in tool:
-                        raise ValueError("Each tool must be a dict with 'type' field")
-
-            # Set up the completion request
-            params = {
-                "model": self.model,
-                "messages": messages,
-                "tools": tools,
-                "tool_choice": tool_choice,
-                "timeout": timeout,
+            params, input_tokens = self._prepare_tool_request(
+                messages,
+                system_msgs=system_msgs,
+                timeout=timeout,
+                tools=tools,
+                tool_choice=tool_choice,
+                temperature=temperature,
                 **kwargs,
-            }
+            )
 
-            if self.model in REASONING_MODELS:
-                params["max_completion_tokens"] = self.max_tokens
-            else:
-                params["max_tokens"] = self.max_tokens
-                params["temperature"] = (
-                    temperature if temperature is not None else self.temperature
-                )
+            cache_key = self._response_cache_key(params, use_cache)
+            if cache_key:
+                cached = await self.response_cache.get(cache_key)
+                if cached is not None:
+                    logger.info("Serving LLM tool response from cache")
+                    return ChatCompletionMessage.model_validate(cached["message"])
 
             params["stream"] = False  # Always use non-streaming for tool requests
-            response: ChatCompletion = await self.client.chat.completions.create(
-                **params
+            response: ChatCompletion = await self._create_completion(
+                input_tokens, **params
             )
 
             # Check if response is valid
@@ -743,6 +1130,13 @@ class LLM:
             self.update_token_count(
                 response.usage.prompt_tokens, response.usage.completion_tokens
             )
+            self.update_cache_stats(response.usage)
+
+            if cache_key:
+                await self.response_cache.set(
+                    cache_key,
+                    {"message": self._serialize_message(response.choices[0].message)},
+                )
 
             return response.choices[0].message
 
@@ -764,3 +1158,132 @@ class LLM:
         except Exception as e:
             logger.error(f"Unexpected error in ask_tool: {e}")
             raise
+
+    async def ask_tool_stream(
+        self,
+        messages: List[Union[dict, Message]],
+        system_msgs: Optional[List[Union[dict, Message]]] = None,
+        timeout: int = 300,
+        tools: Optional[List[dict]] = None,
+        tool_choice: TOOL_CHOICE_TYPE = ToolChoice.AUTO,  # type: ignore
+        temperature: Optional[float] = None,
+        use_cache: bool = True,
+        **kwargs,
+    ) -> AsyncIterator[Union[str, ToolCall]]:
+        """
+        Ask LLM using functions/tools and stream the response.
+
+        Content deltas are yielded as strings. Each tool call is yielded as a
+        ToolCall as soon as its arguments JSON is complete, so callers can
+        start executing it while the model is still generating later calls.
+
+        The request is retried like ask_tool until its first chunk arrives.
+        Later failures are raised: once output has been yielded the caller
+        may already have acted on it.
+
+        Args:
+            messages: List of conversation messages
+            system_msgs: Optional system messages to prepend
+            timeout: Request timeout in seconds
+            tools: List of tools to use
+            tool_choice: Tool choice strategy
+            temperature: Sampling temperature for the response
+            use_cache: Whether to consult the response cache
+            **kwargs: Additional completion arguments
+
+        Yields:
+            Union[str, ToolCall]: Content deltas and completed tool calls
+
+        Raises:
+            TokenLimitExceeded: If token limits are exceeded
+            ValueError: If tools, tool_choice, or messages are invalid
+            OpenAIError: If API call fails
+            Exception: For unexpected errors
+        """
+        try:
+            params, input_tokens = self._prepare_tool_request(
+                messages,
+                system_msgs=system_msgs,
+                timeout=timeout,
+                tools=tools,
+                tool_choice=tool_choice,
+                temperature=temperature,
+                **kwargs,
+            )
+
+            cache_key = self._response_cache_key(params, use_cache)
+            if cache_key:
+                cached = await self.response_cache.get(cache_key)
+                if cached is not None:
+                    logger.info("Serving LLM tool response from cache")
+                    message = cached["message"]
+                    if message.get("content"):
+                        yield message["content"]
+                    for call in message.get("tool_calls") or []:
+                        yield ToolCall.model_validate(call)
+                    return
+
+            # For streaming, update estimated token count before making the request
+            self.update_token_count(input_tokens)
+
+            params["stream"] = True
+            first_chunk, response = await self._open_stream(input_tokens, **params)
+
+            accumulator = ToolCallAccumulator()
+            completion_text = ""
+            tool_calls: List[ToolCall] = []
+            async for chunk in _prepend(first_chunk, response):
+                if not chunk.choices:
+                    continue
+                delta = chunk.choices[0].delta
+                if delta.content:
+                    completion_text += delta.content
+                    yield delta.content
+                for call in accumulator.add(delta.tool_calls or []):
+                    logger.info(f"🧩 Tool call '{call.function.name}' fully received")
+                    tool_calls.append(call)
+                    yield call
+
+            for call in accumulator.flush():
+                tool_calls.append(call)
+                yield call
+
+            if cache_key:
+                await self.response_cache.set(
+                    cache_key,
+                    {
+                        "message": self._serialize_message(
+                            Message(
+                                role=Role.ASSISTANT,
+                                content=completion_text or None,
+                                tool_calls=tool_calls or None,
+                            )
+                        )
+                    },
+                )
+
+            # estimate completion tokens for streaming response
+            completion_tokens = self.count_tokens(
+                completion_text
+            ) + accumulator.count_tokens(self.token_counter)
+            self.total_completion_tokens += completion_tokens
+            self.scheduler.record_usage(completion_tokens)
+
+        except TokenLimitExceeded:
+            # Re-raise token limit errors without logging
+            raise
+        except ValueError as ve:
+            logger.error(f"Validation error in ask_tool_stream: {ve}")
+            raise
+        except OpenAIError as oe:
+            logger.error(f"OpenAI API error: {oe}")
+            if isinstance(oe, AuthenticationError):
+                logger.error("Authentication failed. Check API key.")
+            elif isinstance(oe, RateLimitError):
+                logger.error("Rate limit exceeded. Consider increasing retry attempts.")
+            elif isinstance(oe, APIError):
+                logger.error(f"API error: {oe}")
+            raise
+        except Exception as e:
+            logger.error(f"Unexpected error in ask_tool_stream: {e}")
+            raise
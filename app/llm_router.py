@@ -0,0 +1,297 @@
+"""Latency-aware routing across a pool of LLM configurations.
+
+The router keeps a sliding window of latencies and errors for every model in
+the pool, sends each request to the healthiest one, falls back to the next
+model on failure and, for slow requests, hedges by starting the same request
+on a second model. Whichever response arrives first wins.
+"""
+
+import asyncio
+import statistics
+import threading
+import time
+from collections import deque
+from typing import Any, AsyncIterator, Deque, Dict, List, Optional, Tuple, Union
+
+from tenacity import stop_after_attempt
+
+from app.config import LLMRouterSettings, config
+from app.exceptions import TokenLimitExceeded
+from app.llm import LLM
+from app.logger import logger
+from app.schema import ToolCall
+
+
+class ModelHealth:
+    """Sliding window of request latencies and failures for one model"""
+
+    def __init__(self, window_size: int = 100, window_seconds: float = 300.0):
+        self.window_seconds = window_seconds
+        # (finished_at, latency, ok)
+        self._samples: Deque[Tuple[float, float, bool]] = deque(maxlen=window_size)
+
+    def record(self, latency: float, ok: bool) -> None:
+        self._samples.append((time.monotonic(), latency, ok))
+
+    def _window(self) -> List[Tuple[float, float, bool]]:
+        cutoff = time.monotonic() - self.window_seconds
+        while self._samples and self._samples[0][0] < cutoff:
+            self._samples.popleft()
+        return list(self._samples)
+
+    @property
+    def samples(self) -> int:
+        return len(self._window())
+
+    @property
+    def error_rate(self) -> float:
+        window = self._window()
+        if not window:
+            return 0.0
+        return sum(1 for _, _, ok in window if not ok) / len(window)
+
+    def percentile(self, q: float) -> Optional[float]:
+        """Latency percentile of successful requests, None without data"""
+        latencies = sorted(latency for _, latency, ok in self._window() if ok)
+        if not latencies:
+            return None
+        if len(latencies) == 1:
+            return latencies[0]
+        return statistics.quantiles(latencies, n=100, method="inclusive")[
+            min(98, max(0, int(q * 100) - 1))
+        ]
+
+    @property
+    def p50(self) -> Optional[float]:
+        return self.percentile(0.5)
+
+    @property
+    def p95(self) -> Optional[float]:
+        return self.percentile(0.95)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "samples": self.samples,
+            "p50": self.p50,
+            "p95": self.p95,
+            "error_rate": self.error_rate,
+        }
+
+
+class RoutedLLM(LLM):
+    """LLM facade that routes requests over a pool of configured models.
+
+    Attributes that are not routing specific (model, token counter, limits)
+    are read from the first model in the pool, so the router can be used
+    anywhere an LLM is expected.
+    """
+
+    def __new__(cls, *args, **kwargs):
+        # Bypass the per-config-name singleton of LLM
+        return object.__new__(cls)
+
+    def __init__(self, settings: Optional[LLMRouterSettings] = None, *args, **kwargs):
+        if "members" in self.__dict__:  # Only initialize once
+            return
+        settings = settings if isinstance(settings, LLMRouterSettings) else None
+        self.settings = settings or config.llm_router
+        names = [name for name in self.settings.models if name in config.llm]
+        if not names:
+            raise ValueError("LLM router has no configured models")
+        self.members: Dict[str, LLM] = {
+            name: LLM(name, llm_config=config.llm) for name in names
+        }
+        self.health: Dict[str, ModelHealth] = {
+            name: ModelHealth(self.settings.window_size, self.settings.window_seconds)
+            for name in names
+        }
+        self.primary = self.members[names[0]]
+        self.hedged_requests = 0
+        self.fallbacks = 0
+
+    def __getattr__(self, name: str):
+        members = self.__dict__.get("members")
+        if name.startswith("__") or not members:
+            raise AttributeError(name)
+        return getattr(self.__dict__["primary"], name)
+
+    def _score(self, name: str, fallback_latency: float) -> float:
+        """Expected latency penalized by errors, divided by the model's weight"""
+        health = self.health[name]
+        latency = fallback_latency
+        if health.samples >= self.settings.min_samples:
+            latency = health.p95 or fallback_latency
+        weight = self.settings.weights.get(name, 1.0) or 1.0
+        return latency * (1.0 + 4.0 * health.error_rate) / weight
+
+    def rank(self) -> List[str]:
+        """Model names ordered from healthiest to least healthy.
+
+        Models without enough samples are assumed to be as slow as the slowest
+        known model, so the configured order decides until data is available.
+        Models above the error-rate threshold are moved to the end.
+        """
+        names = list(self.members)
+        known = [
+            self.health[name].p95
+            for name in names
+            if self.health[name].samples >= self.settings.min_samples
+        ]
+        fallback_latency = max((p for p in known if p is not None), default=1.0)
+
+        def key(item: Tuple[int, str]):
+            order, name = item
+            health = self.health[name]
+            unhealthy = (
+                health.samples >= self.settings.min_samples
+                and health.error_rate > self.settings.max_error_rate
+            )
+            return (unhealthy, self._score(name, fallback_latency), order)
+
+        return [name for _, name in sorted(enumerate(names), key=key)]
+
+    def _hedge_delay(self, name: str) -> Optional[float]:
+        """Seconds to wait for `name` before starting a hedged request"""
+        delay = self.settings.hedge_delay
+        if delay is None:
+            return None
+        health = self.health[name]
+        if self.settings.adaptive_hedge and health.samples >= self.settings.min_samples:
+            p95 = health.p95
+            if p95 is not None:
+                return min(delay, p95)
+        return delay
+
+    async def _call(self, name: str, method: str, *args, **kwargs):
+        """Call one member, recording its latency and outcome"""
+        member = self.members[name]
+        # Fail over to another model instead of retrying one model for minutes
+        call = getattr(LLM, method).retry_with(
+            stop=stop_after_attempt(self.settings.attempts_per_model)
+        )
+        started = time.monotonic()
+        # A cancelled hedge loser records nothing, its latency is unknown
+        try:
+            result = await call(member, *args, **kwargs)
+        except TokenLimitExceeded:
+            raise
+        except Exception:
+            self.health[name].record(time.monotonic() - started, ok=False)
+            raise
+        self.health[name].record(time.monotonic() - started, ok=True)
+        return result
+
+    async def _route(self, method: str, *args, **kwargs):
+        """Run a request on the best model with hedging and fallback"""
+        candidates = self.rank()
+        running: Dict[asyncio.Task, str] = {}
+        hedged = False
+        last_error: Optional[BaseException] = None
+
+        def start(name: str) -> None:
+            task = asyncio.create_task(self._call(name, method, *args, **kwargs))
+            running[task] = name
+
+        start(candidates.pop(0))
+        try:
+            while running:
+                timeout = None
+                if not hedged and candidates:
+                    timeout = self._hedge_delay(next(iter(running.values())))
+                done, _ = await asyncio.wait(
+                    running, timeout=timeout, return_when=asyncio.FIRST_COMPLETED
+                )
+
+                if not done:
+                    # The request is slow, race it against the next model
+                    hedged = True
+                    self.hedged_requests += 1
+                    name = candidates.pop(0)
+                    logger.info(f"Hedging slow LLM request with model '{name}'")
+                    start(name)
+                    continue
+
+                for task in done:
+                    name = running.pop(task)
+                    error = task.exception()
+                    if error is None:
+                        return task.result()
+                    if isinstance(error, TokenLimitExceeded):
+                        raise error
+                    last_error = error
+                    logger.warning(f"LLM model '{name}' failed: {error}")
+
+                if not running and candidates:
+                    self.fallbacks += 1
+                    start(candidates.pop(0))
+        finally:
+            # The first response wins, cancel the rest
+            for task in running:
+                task.cancel()
+
+        raise last_error
+
+    async def ask(self, *args, **kwargs) -> str:
+        return await self._route("ask", *args, **kwargs)
+
+    async def ask_with_images(self, *args, **kwargs) -> str:
+        return await self._route("ask_with_images", *args, **kwargs)
+
+    async def ask_tool(self, *args, **kwargs):
+        return await self._route("ask_tool", *args, **kwargs)
+
+    async def ask_tool_stream(
+        self, *args, **kwargs
+    ) -> AsyncIterator[Union[str, ToolCall]]:
+        """Stream from the best model, falling back while nothing was yielded.
+
+        Streams are not hedged, the latency recorded is the time to the first
+        item.
+        """
+        last_error: Optional[BaseException] = None
+        for name in self.rank():
+            started = time.monotonic()
+            yielded = False
+            try:
+                async for item in self.members[name].ask_tool_stream(*args, **kwargs):
+                    if not yielded:
+                        yielded = True
+                        self.health[name].record(time.monotonic() - started, ok=True)
+                    yield item
+                if not yielded:
+                    self.health[name].record(time.monotonic() - started, ok=True)
+                return
+            except TokenLimitExceeded:
+                raise
+            except Exception as e:
+                if yielded:
+                    raise
+                self.health[name].record(time.monotonic() - started, ok=False)
+                self.fallbacks += 1
+                last_error = e
+                logger.warning(f"LLM model '{name}' failed: {e}")
+        raise last_error
+
+    def stats(self) -> Dict[str, Any]:
+        """Return per-model health and routing counters"""
+        return {
+            "models": {name: health.stats() for name, health in self.health.items()},
+            "ranking": self.rank(),
+            "hedged_requests": self.hedged_requests,
+            "fallbacks": self.fallbacks,
+        }
+
+
+_router: Optional[RoutedLLM] = None
+_router_lock = threading.Lock()
+
+
+def get_router() -> RoutedLLM:
+    """Return the process-wide LLM router"""
+    global _router
+    if _router is None:
+        with _router_lock:
+            if _router is None:
+                _router = RoutedLLM(config.llm_router)
+                logger.info(f"LLM router enabled for models {list(_router.members)}")
+    return _router
@@ -0,0 +1,337 @@
+"""Adaptive rate limiting and request scheduling for LLM calls.
+
+Each model/provider pair gets one RequestScheduler. It keeps requests/minute
+and tokens/minute token buckets, honours Retry-After and rate-limit headers
+returned by the provider, and hands out request slots in priority order so
+interactive traffic is served before background work.
+"""
+
+import asyncio
+import heapq
+import itertools
+import re
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from email.utils import parsedate_to_datetime
+from enum import IntEnum
+from typing import Dict, List, Mapping, Optional, Tuple
+
+from app.logger import logger
+
+
+class Priority(IntEnum):
+    """Request priority, lower values are served first"""
+
+    INTERACTIVE = 0
+    DEFAULT = 1
+    BACKGROUND = 2
+
+
+_request_priority: ContextVar[Priority] = ContextVar(
+    "llm_request_priority", default=Priority.DEFAULT
+)
+
+
+@contextmanager
+def request_priority(priority: Priority):
+    """Run LLM calls made inside the block (and tasks it spawns) at a priority."""
+    token = _request_priority.set(priority)
+    try:
+        yield
+    finally:
+        _request_priority.reset(token)
+
+
+def current_priority() -> Priority:
+    return _request_priority.get()
+
+
+class TokenBucket:
+    """Token bucket refilled continuously at a per-minute rate.
+
+    The balance may go negative when a request turns out to cost more than
+    estimated; later requests then wait for the debt to be repaid.
+    """
+
+    def __init__(self, per_minute: float):
+        self.capacity = float(per_minute)
+        self.rate = self.capacity / 60.0
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def delay(self, amount: float) -> float:
+        """Seconds until `amount` can be consumed"""
+        self._refill()
+        amount = min(amount, self.capacity)
+        if self.tokens >= amount:
+            return 0.0
+        return (amount - self.tokens) / self.rate
+
+    def consume(self, amount: float) -> None:
+        self._refill()
+        self.tokens -= amount
+
+    def drain(self) -> None:
+        """Empty the bucket, e.g. after the provider reports no remaining quota"""
+        self._refill()
+        self.tokens = min(self.tokens, 0.0)
+
+    def scale(self, factor: float, maximum: float) -> None:
+        """Adjust the refill rate, keeping it between 1/minute and `maximum`"""
+        self.capacity = max(1.0, min(maximum, self.capacity * factor))
+        self.rate = self.capacity / 60.0
+        self.tokens = min(self.tokens, self.capacity)
+
+
+_DURATION_PART = re.compile(r"(\d+(?:\.\d+)?)(ms|s|m|h)")
+_DURATION_UNITS = {"ms": 0.001, "s": 1.0, "m": 60.0, "h": 3600.0}
+
+
+def parse_reset(value: Optional[str]) -> Optional[float]:
+    """Parse a rate-limit reset/Retry-After header into seconds from now.
+
+    Accepts plain seconds ("20"), durations ("1m30s", "250ms") and HTTP dates.
+    """
+    if not value:
+        return None
+    value = value.strip()
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    parts = _DURATION_PART.findall(value)
+    if parts and "".join(n + u for n, u in parts) == value:
+        return sum(float(n) * _DURATION_UNITS[u] for n, u in parts)
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+class RequestScheduler:
+    """Priority queue in front of one model/provider.
+
+    Requests wait in `acquire` until both buckets allow them, any provider
+    imposed pause has elapsed, and no higher-priority request is waiting.
+    Throttling responses halve the effective rate, which then recovers
+    gradually on successful responses.
+    """
+
+    RECOVERY_FACTOR = 1.05
+    THROTTLE_FACTOR = 0.5
+
+    def __init__(
+        self,
+        name: str,
+        requests_per_minute: Optional[int] = None,
+        tokens_per_minute: Optional[int] = None,
+    ):
+        self.name = name
+        self.requests_per_minute = requests_per_minute
+        self.tokens_per_minute = tokens_per_minute
+        self.request_bucket = (
+            TokenBucket(requests_per_minute) if requests_per_minute else None
+        )
+        self.token_bucket = (
+            TokenBucket(tokens_per_minute) if tokens_per_minute else None
+        )
+        self.paused_until = 0.0
+
+        self._waiters: List[Tuple[int, int]] = []
+        self._sequence = itertools.count()
+        self._condition: Optional[asyncio.Condition] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+
+        # Metrics
+        self.total_requests = 0
+        self.total_wait = 0.0
+        self.max_wait = 0.0
+        self.throttled = 0
+        self._consecutive_throttles = 0
+
+    @property
+    def queue_depth(self) -> int:
+        return len(self._waiters)
+
+    def stats(self) -> Dict[str, float]:
+        """Return queue depth and wait-time metrics"""
+        return {
+            "queue_depth": self.queue_depth,
+            "total_requests": self.total_requests,
+            "average_wait": (
+                self.total_wait / self.total_requests if self.total_requests else 0.0
+            ),
+            "max_wait": self.max_wait,
+            "throttled": self.throttled,
+        }
+
+    def _get_condition(self) -> asyncio.Condition:
+        # asyncio primitives are bound to one loop, rebuild them if it changed
+        loop = asyncio.get_running_loop()
+        if self._condition is None or self._loop is not loop:
+            self._condition = asyncio.Condition()
+            self._loop = loop
+            self._waiters = []
+        return self._condition
+
+    def _delay(self, tokens: int) -> float:
+        delay = max(0.0, self.paused_until - time.monotonic())
+        if self.request_bucket:
+            delay = max(delay, self.request_bucket.delay(1))
+        if self.token_bucket and tokens:
+            delay = max(delay, self.token_bucket.delay(tokens))
+        return delay
+
+    async def acquire(self, tokens: int = 0, priority: Optional[Priority] = None):
+        """Wait for a request slot, consuming one request and `tokens` tokens."""
+        priority = current_priority() if priority is None else priority
+        condition = self._get_condition()
+        entry = (int(priority), next(self._sequence))
+        started = time.monotonic()
+
+        async with condition:
+            heapq.heappush(self._waiters, entry)
+            try:
+                while True:
+                    if self._waiters[0] == entry:
+                        delay = self._delay(tokens)
+                        if delay <= 0:
+                            break
+                    else:
+                        delay = None
+                    try:
+                        await asyncio.wait_for(condition.wait(), delay)
+                    except asyncio.TimeoutError:
+                        pass
+            finally:
+                self._waiters.remove(entry)
+                heapq.heapify(self._waiters)
+                condition.notify_all()
+
+            if self.request_bucket:
+                self.request_bucket.consume(1)
+            if self.token_bucket and tokens:
+                self.token_bucket.consume(tokens)
+
+        waited = time.monotonic() - started
+        self.total_requests += 1
+        self.total_wait += waited
+        self.max_wait = max(self.max_wait, waited)
+        if waited >= 1:
+            logger.info(
+                f"LLM request for {self.name} waited {waited:.1f}s in queue "
+                f"(priority={priority.name}, depth={self.queue_depth})"
+            )
+
+    def record_usage(self, extra_tokens: int) -> None:
+        """Charge tokens that were not known when the slot was acquired"""
+        if self.token_bucket and extra_tokens > 0:
+            self.token_bucket.consume(extra_tokens)
+
+    def pause(self, seconds: float) -> None:
+        """Hold all requests for `seconds`"""
+        self.paused_until = max(self.paused_until, time.monotonic() + seconds)
+
+    def update_from_headers(
+        self, headers: Optional[Mapping[str, str]], throttled: bool = False
+    ) -> None:
+        """Adapt to rate-limit information returned by the provider"""
+        headers = {k.lower(): v for k, v in (headers or {}).items()}
+
+        retry_after = None
+        if "retry-after-ms" in headers:
+            retry_after = parse_reset(headers["retry-after-ms"] + "ms")
+        if retry_after is None:
+            retry_after = parse_reset(headers.get("retry-after"))
+
+        for kind, bucket in (
+            ("requests", self.request_bucket),
+            ("tokens", self.token_bucket),
+        ):
+            remaining = headers.get(f"x-ratelimit-remaining-{kind}") or headers.get(
+                f"anthropic-ratelimit-{kind}-remaining"
+            )
+            if remaining is None or not remaining.strip().isdigit():
+                continue
+            if int(remaining) == 0:
+                reset = parse_reset(
+                    headers.get(f"x-ratelimit-reset-{kind}")
+                    or headers.get(f"anthropic-ratelimit-{kind}-reset")
+                )
+                if reset:
+                    self.pause(reset)
+                if bucket:
+                    bucket.drain()
+
+        if retry_after is not None:
+            self.pause(retry_after)
+
+        if throttled:
+            self.throttled += 1
+            self._consecutive_throttles += 1
+            if retry_after is None and self.paused_until <= time.monotonic():
+                # No hint from the provider, back off exponentially
+                self.pause(min(60.0, 2.0 ** min(self._consecutive_throttles, 6)))
+            for bucket, limit in (
+                (self.request_bucket, self.requests_per_minute),
+                (self.token_bucket, self.tokens_per_minute),
+            ):
+                if bucket:
+                    bucket.scale(self.THROTTLE_FACTOR, limit)
+            logger.warning(
+                f"LLM provider throttled {self.name}, "
+                f"pausing {max(0.0, self.paused_until - time.monotonic()):.1f}s"
+            )
+        else:
+            self._consecutive_throttles = 0
+            for bucket, limit in (
+                (self.request_bucket, self.requests_per_minute),
+                (self.token_bucket, self.tokens_per_minute),
+            ):
+                if bucket and bucket.capacity < limit:
+                    bucket.scale(self.RECOVERY_FACTOR, limit)
+
+
+_schedulers: Dict[str, RequestScheduler] = {}
+
+
+def get_scheduler(
+    name: str,
+    requests_per_minute: Optional[int] = None,
+    tokens_per_minute: Optional[int] = None,
+) -> RequestScheduler:
+    """Return the shared scheduler for a model/provider key"""
+    if name not in _schedulers:
+        _schedulers[name] = RequestScheduler(
+            name, requests_per_minute, tokens_per_minute
+        )
+    return _schedulers[name]
+
+
+def scheduler_stats() -> Dict[str, Dict[str, float]]:
+    """Return metrics for every scheduler"""
+    return {name: scheduler.stats() for name, scheduler in _schedulers.items()}
+
+
+def retry_after_wait(fallback):
+    """Tenacity wait strategy that prefers the provider's Retry-After.
+
+    Rate-limit errors already pause the scheduler until the advertised time,
+    so they are retried immediately and wait in the queue instead.
+    """
+
+    def wait(retry_state) -> float:
+        outcome = retry_state.outcome
+        error = outcome.exception() if outcome is not None else None
+        response = getattr(error, "response", None)
+        if getattr(response, "status_code", None) == 429:
+            return 0.0
+        return fallback(retry_state)
+
+    return wait
@@ -0,0 +1,209 @@
+"""Response cache for repeatable LLM requests.
+
+Requests are keyed by their canonicalized parameters (model, messages, tools,
+tool choice, temperature), so an identical request can be answered without
+calling the provider. Entries are JSON-serializable dicts.
+"""
+
+import asyncio
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Dict, Optional, Tuple
+
+from app.config import PROJECT_ROOT, ResponseCacheSettings, config
+from app.logger import logger
+
+
+# Request fields that determine the response
+KEY_FIELDS = (
+    "model",
+    "messages",
+    "tools",
+    "tool_choice",
+    "temperature",
+    "max_tokens",
+    "max_completion_tokens",
+)
+
+
+def make_cache_key(params: Dict[str, Any], namespace: str = "") -> str:
+    """Build a stable key for a completion request."""
+    payload = {field: params.get(field) for field in KEY_FIELDS}
+    payload["namespace"] = namespace
+    canonical = json.dumps(
+        payload, sort_keys=True, ensure_ascii=False, separators=(",", ":"), default=str
+    )
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+
+class ResponseCache(ABC):
+    """Abstract response cache backend."""
+
+    def __init__(self, ttl: Optional[int] = None):
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+
+    def _expired(self, created_at: float) -> bool:
+        return bool(self.ttl) and time.time() - created_at > self.ttl
+
+    async def get(self, key: str) -> Optional[Dict[str, Any]]:
+        """Return the cached value for a key, or None on a miss."""
+        value = await self._get(key)
+        if value is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return value
+
+    async def set(self, key: str, value: Dict[str, Any]) -> None:
+        """Store a value under a key."""
+        await self._set(key, value)
+
+    @abstractmethod
+    async def _get(self, key: str) -> Optional[Dict[str, Any]]:
+        """Backend lookup, must honour the TTL."""
+
+    @abstractmethod
+    async def _set(self, key: str, value: Dict[str, Any]) -> None:
+        """Backend store."""
+
+    @abstractmethod
+    async def clear(self) -> None:
+        """Remove all entries."""
+
+
+class MemoryResponseCache(ResponseCache):
+    """In-process LRU response cache."""
+
+    def __init__(self, max_entries: int = 1024, ttl: Optional[int] = None):
+        super().__init__(ttl)
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, Tuple[float, Dict[str, Any]]]" = OrderedDict()
+
+    async def _get(self, key: str) -> Optional[Dict[str, Any]]:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        created_at, value = entry
+        if self._expired(created_at):
+            del self._entries[key]
+            return None
+        self._entries.move_to_end(key)
+        return value
+
+    async def _set(self, key: str, value: Dict[str, Any]) -> None:
+        self._entries[key] = (time.time(), value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    async def clear(self) -> None:
+        self._entries.clear()
+
+
+class SQLiteResponseCache(ResponseCache):
+    """On-disk response cache backed by a SQLite file.
+
+    Queries run in a worker thread so disk I/O does not block the event loop.
+    """
+
+    def __init__(
+        self,
+        path: Path,
+        max_entries: Optional[int] = None,
+        ttl: Optional[int] = None,
+    ):
+        super().__init__(ttl)
+        self.path = Path(path)
+        self.max_entries = max_entries
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(str(self.path), check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS responses ("
+            "key TEXT PRIMARY KEY, value TEXT NOT NULL, created_at REAL NOT NULL)"
+        )
+        self._conn.commit()
+
+    def _get_sync(self, key: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT value, created_at FROM responses WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                return None
+            value, created_at = row
+            if self._expired(created_at):
+                self._conn.execute("DELETE FROM responses WHERE key = ?", (key,))
+                self._conn.commit()
+                return None
+            return json.loads(value)
+
+    def _set_sync(self, key: str, value: Dict[str, Any]) -> None:
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO responses (key, value, created_at) "
+                "VALUES (?, ?, ?)",
+                (key, json.dumps(value, ensure_ascii=False), time.time()),
+            )
+            if self.max_entries:
+                self._conn.execute(
+                    "DELETE FROM responses WHERE key NOT IN ("
+                    "SELECT key FROM responses ORDER BY created_at DESC LIMIT ?)",
+                    (self.max_entries,),
+                )
+            self._conn.commit()
+
+    def _clear_sync(self) -> None:
+        with self._lock:
+            self._conn.execute("DELETE FROM responses")
+            self._conn.commit()
+
+    async def _get(self, key: str) -> Optional[Dict[str, Any]]:
+        return await asyncio.to_thread(self._get_sync, key)
+
+    async def _set(self, key: str, value: Dict[str, Any]) -> None:
+        await asyncio.to_thread(self._set_sync, key, value)
+
+    async def clear(self) -> None:
+        await asyncio.to_thread(self._clear_sync)
+
+
+_response_cache: Optional[ResponseCache] = None
+_response_cache_lock = threading.Lock()
+
+
+def create_response_cache(settings: ResponseCacheSettings) -> ResponseCache:
+    """Build a response cache backend from settings."""
+    if settings.backend == "memory":
+        return MemoryResponseCache(max_entries=settings.max_entries, ttl=settings.ttl)
+    if settings.backend == "sqlite":
+        path = Path(settings.path)
+        if not path.is_absolute():
+            path = PROJECT_ROOT / path
+        return SQLiteResponseCache(
+            path, max_entries=settings.max_entries, ttl=settings.ttl
+        )
+    raise ValueError(f"Unknown response cache backend: {settings.backend}")
+
+
+def get_response_cache() -> Optional[ResponseCache]:
+    """Return the process-wide response cache, or None if caching is disabled."""
+    global _response_cache
+    settings = config.response_cache
+    if not settings or not settings.enabled:
+        return None
+    if _response_cache is None:
+        with _response_cache_lock:
+            if _response_cache is None:
+                _response_cache = create_response_cache(settings)
+                logger.info(f"LLM response cache enabled ({settings.backend})")
+    return _response_cache
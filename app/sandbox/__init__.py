@@ -15,12 +15,16 @@ from app.sandbox.core.exceptions import (
     SandboxTimeoutError,
 )
 from app.sandbox.core.manager import SandboxManager
+from app.sandbox.core.pool import SandboxPool
 from app.sandbox.core.sandbox import DockerSandbox
+from app.sandbox.core.terminal import CommandResult
 
 
 __all__ = [
     "DockerSandbox",
+    "CommandResult",
     "SandboxManager",
+    "SandboxPool",
     "BaseSandboxClient",
     "LocalSandboxClient",
     "create_sandbox_client",
@@ -1,8 +1,10 @@
 from abc import ABC, abstractmethod
-from typing import Dict, Optional, Protocol
+from typing import Callable, Dict, List, Optional, Protocol
 
 from app.config import SandboxSettings
+from app.sandbox.core.pool import SandboxPool
 from app.sandbox.core.sandbox import DockerSandbox
+from app.sandbox.core.terminal import CommandResult
 
 
 class SandboxFileOperations(Protocol):
@@ -46,6 +48,25 @@ class SandboxFileOperations(Protocol):
         """
         ...
 
+    async def read_files(self, paths: List[str]) -> Dict[str, str]:
+        """Reads several files from container in one transfer.
+
+        Args:
+            paths: File paths in container.
+
+        Returns:
+            Dict[str, str]: Content of each file by path.
+        """
+        ...
+
+    async def write_files(self, files: Dict[str, str]) -> None:
+        """Writes several files to container in one transfer.
+
+        Args:
+            files: Content to write by path in container.
+        """
+        ...
+
 
 class BaseSandboxClient(ABC):
     """Base sandbox client interface."""
@@ -62,6 +83,15 @@ class BaseSandboxClient(ABC):
     async def run_command(self, command: str, timeout: Optional[int] = None) -> str:
         """Executes command."""
 
+    @abstractmethod
+    async def execute(
+        self,
+        command: str,
+        timeout: Optional[int] = None,
+        on_output: Optional[Callable[[str], None]] = None,
+    ) -> CommandResult:
+        """Executes command and returns its output, exit code and duration."""
+
     @abstractmethod
     async def copy_from(self, container_path: str, local_path: str) -> None:
         """Copies file from container."""
@@ -78,6 +108,14 @@ class BaseSandboxClient(ABC):
     async def write_file(self, path: str, content: str) -> None:
         """Writes file."""
 
+    @abstractmethod
+    async def read_files(self, paths: List[str]) -> Dict[str, str]:
+        """Reads several files."""
+
+    @abstractmethod
+    async def write_files(self, files: Dict[str, str]) -> None:
+        """Writes several files."""
+
     @abstractmethod
     async def cleanup(self) -> None:
         """Cleans up resources."""
@@ -86,9 +124,15 @@ class BaseSandboxClient(ABC):
 class LocalSandboxClient(BaseSandboxClient):
     """Local sandbox client implementation."""
 
-    def __init__(self):
-        """Initializes local sandbox client."""
+    def __init__(self, pool: Optional[SandboxPool] = None):
+        """Initializes local sandbox client.
+
+        Args:
+            pool: Warm sandbox pool used for sandboxes without volume bindings.
+        """
         self.sandbox: Optional[DockerSandbox] = None
+        self.pool = pool
+        self._pooled = False
 
     async def create(
         self,
@@ -104,6 +148,10 @@ class LocalSandboxClient(BaseSandboxClient):
         Raises:
             RuntimeError: If sandbox creation fails.
         """
+        if self.pool is not None and not volume_bindings:
+            self.sandbox = await self.pool.acquire(config)
+            self._pooled = True
+            return
         self.sandbox = DockerSandbox(config, volume_bindings)
         await self.sandbox.create()
 
@@ -124,6 +172,29 @@ class LocalSandboxClient(BaseSandboxClient):
             raise RuntimeError("Sandbox not initialized")
         return await self.sandbox.run_command(command, timeout)
 
+    async def execute(
+        self,
+        command: str,
+        timeout: Optional[int] = None,
+        on_output: Optional[Callable[[str], None]] = None,
+    ) -> CommandResult:
+        """Runs command in sandbox and returns its structured result.
+
+        Args:
+            command: Command to execute.
+            timeout: Execution timeout in seconds.
+            on_output: Called with each output line as soon as it is complete.
+
+        Returns:
+            CommandResult with the output, exit code and duration.
+
+        Raises:
+            RuntimeError: If sandbox not initialized.
+        """
+        if not self.sandbox:
+            raise RuntimeError("Sandbox not initialized")
+        return await self.sandbox.execute(command, timeout, on_output)
+
     async def copy_from(self, container_path: str, local_path: str) -> None:
         """Copies file from container to local.
 
@@ -182,20 +253,57 @@ class LocalSandboxClient(BaseSandboxClient):
             raise RuntimeError("Sandbox not initialized")
         await self.sandbox.write_file(path, content)
 
+    async def read_files(self, paths: List[str]) -> Dict[str, str]:
+        """Reads several files from container in a single archive.
+
+        Args:
+            paths: File paths in container.
+
+        Returns:
+            Content of each file by path.
+
+        Raises:
+            RuntimeError: If sandbox not initialized.
+        """
+        if not self.sandbox:
+            raise RuntimeError("Sandbox not initialized")
+        return await self.sandbox.read_files(paths)
+
+    async def write_files(self, files: Dict[str, str]) -> None:
+        """Writes several files to container in a single archive.
+
+        Args:
+            files: Content to write by path in container.
+
+        Raises:
+            RuntimeError: If sandbox not initialized.
+        """
+        if not self.sandbox:
+            raise RuntimeError("Sandbox not initialized")
+        await self.sandbox.write_files(files)
+
     async def cleanup(self) -> None:
-        """Cleans up resources."""
+        """Cleans up resources, pooled sandboxes are returned to the pool."""
         if self.sandbox:
-            await self.sandbox.cleanup()
-            self.sandbox = None
+            sandbox, self.sandbox = self.sandbox, None
+            if self._pooled:
+                self._pooled = False
+                await self.pool.release(sandbox)
+            else:
+                await sandbox.cleanup()
 
 
-def create_sandbox_client() -> LocalSandboxClient:
+def create_sandbox_client(pool: Optional[SandboxPool] = None) -> LocalSandboxClient:
     """Creates a sandbox client.
 
+    Args:
+        pool: Warm sandbox pool shared by the client.
+
     Returns:
         LocalSandboxClient: Sandbox client instance.
     """
-    return LocalSandboxClient()
+    return LocalSandboxClient(pool)
 
 
-SANDBOX_CLIENT = create_sandbox_client()
+SANDBOX_POOL = SandboxPool()
+SANDBOX_CLIENT = create_sandbox_client(SANDBOX_POOL)
@@ -4,10 +4,10 @@ from contextlib import asynccontextmanager
 from typing import Dict, Optional, Set
 
 import docker
-from docker.errors import APIError, ImageNotFound
 
 from app.config import SandboxSettings
 from app.logger import logger
+from app.sandbox.core.pool import SandboxPool, ensure_image
 from app.sandbox.core.sandbox import DockerSandbox
 
 
@@ -22,6 +22,7 @@ class SandboxManager:
         max_sandboxes: Maximum allowed number of sandboxes.
         idle_timeout: Sandbox idle timeout in seconds.
         cleanup_interval: Cleanup check interval in seconds.
+        pool: Warm sandbox pool that sandboxes without volume bindings come from.
         _sandboxes: Active sandbox instance mapping.
         _last_used: Last used time record for sandboxes.
     """
@@ -31,6 +32,7 @@ class SandboxManager:
         max_sandboxes: int = 100,
         idle_timeout: int = 3600,
         cleanup_interval: int = 300,
+        pool: Optional[SandboxPool] = None,
     ):
         """Initializes sandbox manager.
 
@@ -38,6 +40,7 @@ class SandboxManager:
             max_sandboxes: Maximum sandbox count limit.
             idle_timeout: Idle timeout in seconds.
             cleanup_interval: Cleanup check interval in seconds.
+            pool: Shared warm sandbox pool, a private one is created if None.
         """
         self.max_sandboxes = max_sandboxes
         self.idle_timeout = idle_timeout
@@ -46,9 +49,15 @@ class SandboxManager:
         # Docker client
         self._client = docker.from_env()
 
+        # Warm sandbox pool
+        self.pool = pool or SandboxPool()
+        self._owns_pool = pool is None
+
         # Resource mappings
         self._sandboxes: Dict[str, DockerSandbox] = {}
         self._last_used: Dict[str, float] = {}
+        self._pooled: Set[str] = set()
+        self._reserved = 0
 
         # Concurrency control
         self._locks: Dict[str, asyncio.Lock] = {}
@@ -71,19 +80,7 @@ class SandboxManager:
         Returns:
             bool: Whether image is available.
         """
-        try:
-            self._client.images.get(image)
-            return True
-        except ImageNotFound:
-            try:
-                logger.info(f"Pulling image {image}...")
-                await asyncio.get_event_loop().run_in_executor(
-                    None, self._client.images.pull, image
-                )
-                return True
-            except (APIError, Exception) as e:
-                logger.error(f"Failed to pull image {image}: {e}")
-                return False
+        return await ensure_image(self._client, image)
 
     @asynccontextmanager
     async def sandbox_operation(self, sandbox_id: str):
@@ -128,33 +125,48 @@ class SandboxManager:
         Raises:
             RuntimeError: If max sandbox count reached or creation fails.
         """
+        # Only the slot is reserved under the lock, sandboxes start concurrently
         async with self._global_lock:
-            if len(self._sandboxes) >= self.max_sandboxes:
+            if len(self._sandboxes) + self._reserved >= self.max_sandboxes:
                 raise RuntimeError(
                     f"Maximum number of sandboxes ({self.max_sandboxes}) reached"
                 )
+            self._reserved += 1
 
+        try:
             config = config or SandboxSettings()
-            if not await self.ensure_image(config.image):
-                raise RuntimeError(f"Failed to ensure Docker image: {config.image}")
-
-            sandbox_id = str(uuid.uuid4())
-            try:
+            if volume_bindings:
+                # Custom mounts are per sandbox, those cannot come from the pool
+                if not await self.ensure_image(config.image):
+                    raise RuntimeError(f"Failed to ensure Docker image: {config.image}")
                 sandbox = DockerSandbox(config, volume_bindings)
-                await sandbox.create()
-
-                self._sandboxes[sandbox_id] = sandbox
-                self._last_used[sandbox_id] = asyncio.get_event_loop().time()
-                self._locks[sandbox_id] = asyncio.Lock()
-
-                logger.info(f"Created sandbox {sandbox_id}")
-                return sandbox_id
+                try:
+                    await sandbox.create()
+                except Exception as e:
+                    logger.error(f"Failed to create sandbox: {e}")
+                    raise RuntimeError(f"Failed to create sandbox: {e}")
+            else:
+                try:
+                    sandbox = await self.pool.acquire(config)
+                except Exception as e:
+                    logger.error(f"Failed to create sandbox: {e}")
+                    raise RuntimeError(f"Failed to create sandbox: {e}")
+        except BaseException:
+            async with self._global_lock:
+                self._reserved -= 1
+            raise
+
+        sandbox_id = str(uuid.uuid4())
+        async with self._global_lock:
+            self._reserved -= 1
+            self._sandboxes[sandbox_id] = sandbox
+            self._last_used[sandbox_id] = asyncio.get_event_loop().time()
+            self._locks[sandbox_id] = asyncio.Lock()
+            if not volume_bindings:
+                self._pooled.add(sandbox_id)
 
-            except Exception as e:
-                logger.error(f"Failed to create sandbox: {e}")
-                if sandbox_id in self._sandboxes:
-                    await self.delete_sandbox(sandbox_id)
-                raise RuntimeError(f"Failed to create sandbox: {e}")
+        logger.info(f"Created sandbox {sandbox_id}")
+        return sandbox_id
 
     async def get_sandbox(self, sandbox_id: str) -> DockerSandbox:
         """Gets a sandbox instance.
@@ -238,6 +250,10 @@ class SandboxManager:
         self._last_used.clear()
         self._locks.clear()
         self._active_operations.clear()
+        self._pooled.clear()
+
+        if self._owns_pool:
+            await self.pool.close()
 
         logger.info("Manager cleanup completed")
 
@@ -271,6 +287,7 @@ class SandboxManager:
                     self._sandboxes.pop(sandbox_id, None)
                     self._last_used.pop(sandbox_id, None)
                     self._locks.pop(sandbox_id, None)
+                    self._pooled.discard(sandbox_id)
                     logger.info(f"Deleted sandbox {sandbox_id}")
         except Exception as e:
             logger.error(f"Error during cleanup of sandbox {sandbox_id}: {e}")
@@ -289,6 +306,29 @@ class SandboxManager:
         except Exception as e:
             logger.error(f"Failed to delete sandbox {sandbox_id}: {e}")
 
+    async def release_sandbox(self, sandbox_id: str) -> None:
+        """Returns a sandbox to the warm pool for reuse.
+
+        Pooled sandboxes are scrubbed before their next lease, sandboxes with
+        custom volume bindings are deleted.
+
+        Args:
+            sandbox_id: Sandbox ID.
+        """
+        if sandbox_id not in self._pooled:
+            await self.delete_sandbox(sandbox_id)
+            return
+
+        async with self.sandbox_operation(sandbox_id) as sandbox:
+            async with self._global_lock:
+                self._sandboxes.pop(sandbox_id, None)
+                self._last_used.pop(sandbox_id, None)
+                self._pooled.discard(sandbox_id)
+        self._locks.pop(sandbox_id, None)
+
+        await self.pool.release(sandbox)
+        logger.info(f"Released sandbox {sandbox_id}")
+
     async def __aenter__(self) -> "SandboxManager":
         """Async context manager entry."""
         return self
@@ -310,4 +350,5 @@ class SandboxManager:
             "idle_timeout": self.idle_timeout,
             "cleanup_interval": self.cleanup_interval,
             "is_shutting_down": self._is_shutting_down,
+            "pool": self.pool.get_stats(),
         }
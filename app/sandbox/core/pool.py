@@ -0,0 +1,201 @@
+import asyncio
+from typing import Dict, List, Optional, Set
+
+import docker
+from docker.errors import APIError, ImageNotFound
+
+from app.config import SandboxSettings
+from app.logger import logger
+from app.sandbox.core.sandbox import DockerSandbox
+
+
+async def ensure_image(client: docker.DockerClient, image: str) -> bool:
+    """Ensures a Docker image is available, pulling it if necessary.
+
+    Args:
+        client: Docker client.
+        image: Image name.
+
+    Returns:
+        bool: Whether image is available.
+    """
+    try:
+        await asyncio.to_thread(client.images.get, image)
+        return True
+    except ImageNotFound:
+        try:
+            logger.info(f"Pulling image {image}...")
+            await asyncio.to_thread(client.images.pull, image)
+            return True
+        except (APIError, Exception) as e:
+            logger.error(f"Failed to pull image {image}: {e}")
+            return False
+
+
+class SandboxPool:
+    """Pool of pre-started sandboxes, keyed by sandbox profile.
+
+    Sandboxes are leased with `acquire` and handed back with `release`, which
+    scrubs them (processes killed, working directory emptied, fresh terminal)
+    before the next lease. Each profile keeps between `pool_min_idle` and
+    `pool_max_idle` warm sandboxes; refills run in the background.
+
+    Attributes:
+        _idle: Warm sandboxes per profile key.
+        _refilling: Profile keys with a running refill task.
+    """
+
+    def __init__(self):
+        self._client: Optional[docker.DockerClient] = None
+        self._idle: Dict[str, List[DockerSandbox]] = {}
+        self._refilling: Set[str] = set()
+        self._tasks: Set[asyncio.Task] = set()
+        self._closed = False
+
+        # Metrics
+        self.hits = 0
+        self.misses = 0
+        self.recycled = 0
+
+    @staticmethod
+    def profile_key(config: SandboxSettings) -> str:
+        """Key of the settings that shape a container"""
+        return config.model_dump_json(
+            include={
+                "image",
+                "work_dir",
+                "memory_limit",
+                "cpu_limit",
+                "network_enabled",
+            }
+        )
+
+    @property
+    def client(self) -> docker.DockerClient:
+        if self._client is None:
+            self._client = docker.from_env()
+        return self._client
+
+    async def _create(self, config: SandboxSettings) -> DockerSandbox:
+        if not await ensure_image(self.client, config.image):
+            raise RuntimeError(f"Failed to ensure Docker image: {config.image}")
+        return await DockerSandbox(config).create()
+
+    async def acquire(self, config: Optional[SandboxSettings] = None) -> DockerSandbox:
+        """Leases a warm sandbox, creating one if none is idle.
+
+        Args:
+            config: Sandbox profile.
+
+        Returns:
+            DockerSandbox: A running sandbox owned by the caller until released.
+        """
+        config = config or SandboxSettings()
+        key = self.profile_key(config)
+        idle = self._idle.setdefault(key, [])
+
+        sandbox = None
+        while idle:
+            candidate = idle.pop()
+            if await candidate.is_running():
+                sandbox = candidate
+                break
+            self._spawn(candidate.cleanup())
+
+        if sandbox is not None:
+            self.hits += 1
+        else:
+            self.misses += 1
+            sandbox = await self._create(config)
+
+        self.warm(config)
+        return sandbox
+
+    async def release(self, sandbox: DockerSandbox) -> None:
+        """Scrubs a leased sandbox and keeps it warm, or destroys it.
+
+        Args:
+            sandbox: Sandbox obtained from `acquire`.
+        """
+        key = self.profile_key(sandbox.config)
+        idle = self._idle.setdefault(key, [])
+        max_idle = sandbox.config.pool_max_idle
+        if self._closed or len(idle) >= max_idle:
+            await sandbox.cleanup()
+            return
+
+        try:
+            await sandbox.reset()
+        except Exception as e:
+            logger.warning(f"Failed to reset sandbox, discarding it: {e}")
+            await sandbox.cleanup()
+            return
+
+        if self._closed or len(idle) >= max_idle:
+            await sandbox.cleanup()
+            return
+        idle.append(sandbox)
+        self.recycled += 1
+
+    def warm(self, config: Optional[SandboxSettings] = None) -> None:
+        """Starts a background refill of a profile up to `pool_min_idle`.
+
+        Args:
+            config: Sandbox profile.
+        """
+        config = config or SandboxSettings()
+        key = self.profile_key(config)
+        if self._closed or key in self._refilling:
+            return
+        if len(self._idle.get(key, [])) >= config.pool_min_idle:
+            return
+        self._refilling.add(key)
+        self._spawn(self._refill(key, config))
+
+    async def _refill(self, key: str, config: SandboxSettings) -> None:
+        try:
+            idle = self._idle.setdefault(key, [])
+            while not self._closed and len(idle) < config.pool_min_idle:
+                try:
+                    sandbox = await self._create(config)
+                except Exception as e:
+                    logger.error(f"Failed to pre-start sandbox: {e}")
+                    return
+                # Released sandboxes may have filled the profile meanwhile
+                if self._closed or len(idle) >= config.pool_max_idle:
+                    await sandbox.cleanup()
+                    return
+                idle.append(sandbox)
+        finally:
+            self._refilling.discard(key)
+
+    def _spawn(self, coro) -> None:
+        task = asyncio.create_task(coro)
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def close(self) -> None:
+        """Destroys all warm sandboxes and stops refills."""
+        self._closed = True
+        # Refills stop after the sandbox being created, cancelling could leak it
+        await asyncio.gather(*list(self._tasks), return_exceptions=True)
+
+        idle = [sandbox for sandboxes in self._idle.values() for sandbox in sandboxes]
+        self._idle.clear()
+        await asyncio.gather(
+            *(sandbox.cleanup() for sandbox in idle), return_exceptions=True
+        )
+
+    def get_stats(self) -> Dict:
+        """Gets pool statistics.
+
+        Returns:
+            Dict: Statistics information.
+        """
+        return {
+            "idle": sum(len(sandboxes) for sandboxes in self._idle.values()),
+            "profiles": len(self._idle),
+            "hits": self.hits,
+            "misses": self.misses,
+            "recycled": self.recycled,
+        }
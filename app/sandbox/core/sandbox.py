@@ -1,10 +1,14 @@
 import asyncio
 import io
 import os
+import posixpath
+import shlex
+import shutil
 import tarfile
 import tempfile
+import time
 import uuid
-from typing import Dict, Optional
+from typing import Callable, Dict, Iterable, List, Optional
 
 import docker
 from docker.errors import NotFound
@@ -12,7 +16,7 @@ from docker.models.containers import Container
 
 from app.config import SandboxSettings
 from app.sandbox.core.exceptions import SandboxTimeoutError
-from app.sandbox.core.terminal import AsyncDockerizedTerminal
+from app.sandbox.core.terminal import AsyncDockerizedTerminal, CommandResult
 
 
 class DockerSandbox:
@@ -137,32 +141,104 @@ class DockerSandbox:
         os.makedirs(host_path, exist_ok=True)
         return host_path
 
-    async def run_command(self, cmd: str, timeout: Optional[int] = None) -> str:
-        """Runs a command in the sandbox.
+    async def is_running(self) -> bool:
+        """Checks whether the container is still running.
+
+        Returns:
+            bool: Whether the sandbox can serve commands.
+        """
+        if not self.container or not self.terminal:
+            return False
+        try:
+            await asyncio.to_thread(self.container.reload)
+        except Exception:
+            return False
+        return self.container.status == "running"
+
+    async def reset(self) -> None:
+        """Scrubs the sandbox for reuse.
+
+        Kills every process except the container's init, empties the working
+        directory and /tmp, and opens a fresh terminal session.
+
+        Raises:
+            RuntimeError: If sandbox not initialized or scrubbing fails.
+        """
+        if not self.container:
+            raise RuntimeError("Sandbox not initialized")
+
+        if self.terminal:
+            await self.terminal.close()
+            self.terminal = None
+
+        work_dir = shlex.quote(self.config.work_dir)
+        script = (
+            "kill -9 -1 2>/dev/null; "
+            f"find {work_dir} /tmp -mindepth 1 -delete 2>/dev/null; "
+            f'test -z "$(ls -A {work_dir} /tmp)"'
+        )
+        result = await asyncio.to_thread(self.container.exec_run, ["sh", "-c", script])
+        if result.exit_code != 0:
+            raise RuntimeError(
+                f"Failed to scrub sandbox: {result.output.decode(errors='replace')}"
+            )
+
+        self.terminal = AsyncDockerizedTerminal(
+            self.container.id,
+            self.config.work_dir,
+            env_vars={"PYTHONUNBUFFERED": "1"},
+        )
+        await self.terminal.init()
+
+    async def execute(
+        self,
+        cmd: str,
+        timeout: Optional[int] = None,
+        on_output: Optional[Callable[[str], None]] = None,
+    ) -> CommandResult:
+        """Runs a command in the sandbox and returns its structured result.
 
         Args:
             cmd: Command to execute.
             timeout: Timeout in seconds.
+            on_output: Called with each output line as soon as it is complete.
 
         Returns:
-            Command output as string.
+            CommandResult with the output, exit code and duration.
 
         Raises:
             RuntimeError: If sandbox not initialized or command execution fails.
-            TimeoutError: If command execution times out.
+            SandboxTimeoutError: If command execution times out.
         """
         if not self.terminal:
             raise RuntimeError("Sandbox not initialized")
 
         try:
-            return await self.terminal.run_command(
-                cmd, timeout=timeout or self.config.timeout
+            return await self.terminal.execute(
+                cmd, timeout=timeout or self.config.timeout, on_output=on_output
             )
         except TimeoutError:
             raise SandboxTimeoutError(
                 f"Command execution timed out after {timeout or self.config.timeout} seconds"
             )
 
+    async def run_command(self, cmd: str, timeout: Optional[int] = None) -> str:
+        """Runs a command in the sandbox.
+
+        Args:
+            cmd: Command to execute.
+            timeout: Timeout in seconds.
+
+        Returns:
+            Command output as string.
+
+        Raises:
+            RuntimeError: If sandbox not initialized or command execution fails.
+            TimeoutError: If command execution times out.
+        """
+        result = await self.execute(cmd, timeout)
+        return result.stdout.strip()
+
     async def read_file(self, path: str) -> str:
         """Reads a file from the container.
 
@@ -186,8 +262,10 @@ class DockerSandbox:
                 self.container.get_archive, resolved_path
             )
 
-            # Read file content from tar stream
-            content = await self._read_from_tar(tar_stream)
+            # Read file content while the archive streams in
+            content = await asyncio.to_thread(
+                self._read_from_tar, tar_stream, self.config.max_read_size
+            )
             return content.decode("utf-8")
 
         except NotFound:
@@ -205,27 +283,76 @@ class DockerSandbox:
         Raises:
             RuntimeError: If write operation fails.
         """
+        await self.write_files({path: content})
+
+    async def read_files(self, paths: List[str]) -> Dict[str, str]:
+        """Reads several files from the container in a single archive.
+
+        Args:
+            paths: File paths.
+
+        Returns:
+            Mapping of each requested path to its contents.
+
+        Raises:
+            FileNotFoundError: If any of the files does not exist.
+            RuntimeError: If read operation fails.
+        """
         if not self.container:
             raise RuntimeError("Sandbox not initialized")
+        if not paths:
+            return {}
 
         try:
-            resolved_path = self._safe_resolve_path(path)
-            parent_dir = os.path.dirname(resolved_path)
+            names = {
+                posixpath.normpath(self._safe_resolve_path(path)).lstrip("/"): path
+                for path in paths
+            }
+            # One tar run packs every file, symlinks are followed like get_archive.
+            # tar exits with 2 when some files are missing, the rest is packed.
+            result = await asyncio.to_thread(
+                self.container.exec_run,
+                ["tar", "-chf", "-", "--no-recursion", "-C", "/", "--", *names],
+                stdout=True,
+                stderr=False,
+                stream=True,
+            )
+            contents = await asyncio.to_thread(
+                self._read_files_from_tar, result.output, self.config.max_read_size
+            )
+        except Exception as e:
+            raise RuntimeError(f"Failed to read files: {e}")
 
-            # Create parent directory
-            if parent_dir:
-                await self.run_command(f"mkdir -p {parent_dir}")
+        missing = [path for name, path in names.items() if name not in contents]
+        if missing:
+            raise FileNotFoundError(f"File not found: {', '.join(missing)}")
+        return {path: contents[name].decode("utf-8") for name, path in names.items()}
 
-            # Prepare file data
-            tar_stream = await self._create_tar_stream(
-                os.path.basename(path), content.encode("utf-8")
-            )
+    async def write_files(self, files: Dict[str, str]) -> None:
+        """Writes several files to the container in a single archive.
 
-            # Write file
-            await asyncio.to_thread(
-                self.container.put_archive, parent_dir or "/", tar_stream
-            )
+        The archive is extracted at the container root, which creates missing
+        parent directories, so the whole batch is one Docker API call.
+
+        Args:
+            files: Mapping of target path to file content.
+
+        Raises:
+            RuntimeError: If write operation fails.
+        """
+        if not self.container:
+            raise RuntimeError("Sandbox not initialized")
+        if not files:
+            return
 
+        try:
+            tar_stream = await self._create_tar_stream(
+                {
+                    self._safe_resolve_path(path).lstrip("/"): content.encode("utf-8")
+                    for path, content in files.items()
+                }
+            )
+            await asyncio.to_thread(self.container.put_archive, "/", tar_stream)
         except Exception as e:
             raise RuntimeError(f"Failed to write file: {e}")
 
@@ -275,37 +402,14 @@ class DockerSandbox:
                 self.container.get_archive, resolved_src
             )
 
-            # Create temporary directory to extract file
-            with tempfile.TemporaryDirectory() as tmp_dir:
-                # Write stream to temporary file
-                tar_path = os.path.join(tmp_dir, "temp.tar")
-                with open(tar_path, "wb") as f:
-                    for chunk in stream:
-                        f.write(chunk)
-
-                # Extract file
-                with tarfile.open(tar_path) as tar:
-                    members = tar.getmembers()
-                    if not members:
-                        raise FileNotFoundError(f"Source file is empty: {src_path}")
-
-                    # If destination is a directory, we should preserve relative path structure
-                    if os.path.isdir(dst_path):
-                        tar.extractall(dst_path)
-                    else:
-                        # If destination is a file, we only extract the source file's content
-                        if len(members) > 1:
-                            raise RuntimeError(
-                                f"Source path is a directory but destination is a file: {src_path}"
-                            )
-
-                        with open(dst_path, "wb") as dst:
-                            src_file = tar.extractfile(members[0])
-                            if src_file is None:
-                                raise RuntimeError(
-                                    f"Failed to extract file: {src_path}"
-                                )
-                            dst.write(src_file.read())
+            # Extract while the archive streams in, without a temporary copy
+            await asyncio.to_thread(
+                self._extract_archive,
+                stream,
+                src_path,
+                dst_path,
+                self.config.max_copy_size,
+            )
 
         except docker.errors.NotFound:
             raise FileNotFoundError(f"Source file not found: {src_path}")
@@ -375,52 +479,158 @@ class DockerSandbox:
             raise RuntimeError(f"Failed to copy file: {e}")
 
     @staticmethod
-    async def _create_tar_stream(name: str, content: bytes) -> io.BytesIO:
+    async def _create_tar_stream(files: Dict[str, bytes]) -> io.BytesIO:
         """Creates a tar file stream.
 
         Args:
-            name: Filename.
-            content: File content.
+            files: Mapping of archive member name to file content.
 
         Returns:
             Tar file stream.
         """
         tar_stream = io.BytesIO()
+        mtime = time.time()
         with tarfile.open(fileobj=tar_stream, mode="w") as tar:
-            tarinfo = tarfile.TarInfo(name=name)
-            tarinfo.size = len(content)
-            tar.addfile(tarinfo, io.BytesIO(content))
+            for name, content in files.items():
+                tarinfo = tarfile.TarInfo(name=name)
+                tarinfo.size = len(content)
+                tarinfo.mtime = mtime
+                tar.addfile(tarinfo, io.BytesIO(content))
         tar_stream.seek(0)
         return tar_stream
 
     @staticmethod
-    async def _read_from_tar(tar_stream) -> bytes:
-        """Reads file content from a tar stream.
+    def _read_files_from_tar(
+        chunks: Iterable[bytes], max_size: int
+    ) -> Dict[str, bytes]:
+        """Reads the regular files of a streamed tar archive.
+
+        tar stores a file that was already packed under another name (a hard
+        link, or a symlink and its target with -h) as a hard-link member.
+        Those get the content of the member they link to.
+
+        Args:
+            chunks: Archive data chunks.
+            max_size: Maximum size of each file.
+
+        Returns:
+            Mapping of normalized member name to file content.
+
+        Raises:
+            RuntimeError: If a file exceeds the size limit.
+        """
+        contents = {}
+        with tarfile.open(fileobj=_ChunkReader(chunks), mode="r|") as tar:
+            for member in tar:
+                if member.islnk():
+                    target = posixpath.normpath(member.linkname).lstrip("/")
+                    if target in contents:
+                        name = posixpath.normpath(member.name).lstrip("/")
+                        contents[name] = contents[target]
+                    continue
+                if not member.isfile():
+                    continue
+                if member.size > max_size:
+                    raise RuntimeError(
+                        f"File {member.name} exceeds the read limit of {max_size} bytes"
+                    )
+                name = posixpath.normpath(member.name).lstrip("/")
+                contents[name] = tar.extractfile(member).read()
+        return contents
+
+    @staticmethod
+    def _read_from_tar(chunks: Iterable[bytes], max_size: int) -> bytes:
+        """Reads the first file of a streamed tar archive.
 
         Args:
-            tar_stream: Tar file stream.
+            chunks: Archive data chunks.
+            max_size: Maximum file size.
 
         Returns:
             File content.
 
         Raises:
-            RuntimeError: If read operation fails.
+            RuntimeError: If read operation fails or the file is too large.
         """
-        with tempfile.NamedTemporaryFile() as tmp:
-            for chunk in tar_stream:
-                tmp.write(chunk)
-            tmp.seek(0)
+        with tarfile.open(fileobj=_ChunkReader(chunks), mode="r|") as tar:
+            member = tar.next()
+            if not member:
+                raise RuntimeError("Empty tar archive")
+            if member.size > max_size:
+                raise RuntimeError(
+                    f"File exceeds the read limit of {max_size} bytes: {member.size}"
+                )
+
+            file_content = tar.extractfile(member)
+            if not file_content:
+                raise RuntimeError("Failed to extract file content")
+
+            return file_content.read()
+
+    @staticmethod
+    def _extract_archive(
+        chunks: Iterable[bytes], src_path: str, dst_path: str, max_size: int
+    ) -> None:
+        """Extracts a streamed tar archive directly to its destination.
 
-            with tarfile.open(fileobj=tmp) as tar:
-                member = tar.next()
-                if not member:
-                    raise RuntimeError("Empty tar archive")
+        Member sizes are checked against the limit before anything is written.
 
-                file_content = tar.extractfile(member)
-                if not file_content:
-                    raise RuntimeError("Failed to extract file content")
+        Args:
+            chunks: Archive data chunks.
+            src_path: Source path (container), for error messages.
+            dst_path: Destination directory or file (host).
+            max_size: Maximum total size of the extracted files.
 
-                return file_content.read()
+        Raises:
+            FileNotFoundError: If the archive is empty.
+            RuntimeError: If extraction fails or the limit is exceeded.
+        """
+        total = 0
+        with tarfile.open(fileobj=_ChunkReader(chunks), mode="r|") as tar:
+            # If destination is a directory, we should preserve relative path structure
+            if os.path.isdir(dst_path):
+                extracted = False
+                for member in tar:
+                    total += member.size
+                    if total > max_size:
+                        raise RuntimeError(
+                            f"Archive exceeds the copy limit of {max_size} bytes"
+                        )
+                    tar.extract(member, dst_path, filter="data")
+                    extracted = True
+                if not extracted:
+                    raise FileNotFoundError(f"Source file is empty: {src_path}")
+                return
+
+            # If destination is a file, we only extract the source file's content
+            member = tar.next()
+            if member is None:
+                raise FileNotFoundError(f"Source file is empty: {src_path}")
+            if not member.isfile():
+                raise RuntimeError(
+                    f"Source path is a directory but destination is a file: {src_path}"
+                )
+            if member.size > max_size:
+                raise RuntimeError(
+                    f"File exceeds the copy limit of {max_size} bytes: {src_path}"
+                )
+
+            src_file = tar.extractfile(member)
+            if src_file is None:
+                raise RuntimeError(f"Failed to extract file: {src_path}")
+            with open(dst_path, "wb") as dst:
+                try:
+                    shutil.copyfileobj(src_file, dst)
+                except BaseException:
+                    dst.close()
+                    os.unlink(dst_path)
+                    raise
+
+            if tar.next() is not None:
+                os.unlink(dst_path)
+                raise RuntimeError(
+                    f"Source path is a directory but destination is a file: {src_path}"
+                )
 
     async def cleanup(self) -> None:
         """Cleans up sandbox resources."""
@@ -460,3 +670,25 @@ class DockerSandbox:
     async def __aexit__(self, exc_type, exc_val, exc_tb) -> None:
         """Async context manager exit."""
         await self.cleanup()
+
+
+class _ChunkReader(io.RawIOBase):
+    """Read-only file object over an iterator of byte chunks."""
+
+    def __init__(self, chunks: Iterable[bytes]):
+        self._chunks = iter(chunks)
+        self._pending = memoryview(b"")
+
+    def readable(self) -> bool:
+        return True
+
+    def readinto(self, buffer) -> int:
+        while not self._pending:
+            chunk = next(self._chunks, None)
+            if chunk is None:
+                return 0
+            self._pending = memoryview(chunk)
+        size = min(len(buffer), len(self._pending))
+        buffer[:size] = self._pending[:size]
+        self._pending = self._pending[size:]
+        return size
@@ -6,9 +6,12 @@ allowing interactive command execution with timeout control.
 """
 
 import asyncio
-import re
+import shlex
 import socket
-from typing import Dict, Optional, Tuple, Union
+import time
+import uuid
+from dataclasses import dataclass
+from typing import Callable, Dict, List, Optional, Tuple, Union
 
 import docker
 from docker import APIClient
@@ -16,6 +19,21 @@ from docker.errors import APIError
 from docker.models.containers import Container
 
 
+@dataclass
+class CommandResult:
+    """Result of a command run in a terminal session.
+
+    Attributes:
+        stdout: Command output. The session is a TTY, so stderr is included.
+        exit_code: Exit status of the command.
+        duration: Execution time in seconds.
+    """
+
+    stdout: str
+    exit_code: int
+    duration: float
+
+
 class DockerSession:
     def __init__(self, container_id: str) -> None:
         """Initializes a Docker session.
@@ -83,7 +101,7 @@ class DockerSession:
             if self.socket:
                 # Send exit command to close bash session
                 try:
-                    self.socket.sendall(b"exit\n")
+                    await asyncio.wait_for(self._send(b"exit\n"), 1)
                     # Allow time for command execution
                     await asyncio.sleep(0.1)
                 except:
@@ -114,6 +132,21 @@ class DockerSession:
             # Log error but don't raise, ensure cleanup continues
             print(f"Warning: Error during session cleanup: {e}")
 
+    async def _recv(self) -> bytes:
+        """Waits for the next chunk of output.
+
+        The socket is registered with the event loop, so the call returns as
+        soon as data arrives instead of polling.
+
+        Returns:
+            Received bytes, empty if the container closed the session.
+        """
+        return await asyncio.get_running_loop().sock_recv(self.socket, 4096)
+
+    async def _send(self, data: bytes) -> None:
+        """Writes to the session, waiting while the socket buffer is full."""
+        await asyncio.get_running_loop().sock_sendall(self.socket, data)
+
     async def _read_until_prompt(self) -> str:
         """Reads output until prompt is found.
 
@@ -121,30 +154,39 @@ class DockerSession:
             String containing output up to the prompt.
 
         Raises:
+            RuntimeError: If the session closes before the prompt.
             socket.error: If socket communication fails.
         """
-        buffer = b""
-        while b"$ " not in buffer:
-            try:
-                chunk = self.socket.recv(4096)
-                if chunk:
-                    buffer += chunk
-            except socket.error as e:
-                if e.errno == socket.EWOULDBLOCK:
-                    await asyncio.sleep(0.1)
-                    continue
-                raise
-        return buffer.decode("utf-8")
+        buffer = bytearray()
+        while True:
+            # Only the new data and one byte before it can complete the prompt
+            start = max(0, len(buffer) - 1)
+            chunk = await self._recv()
+            if not chunk:
+                raise RuntimeError("Session closed before prompt")
+            buffer += chunk
+            if buffer.find(b"$ ", start) != -1:
+                return buffer.decode("utf-8")
+
+    async def execute(
+        self,
+        command: str,
+        timeout: Optional[int] = None,
+        on_output: Optional[Callable[[str], None]] = None,
+    ) -> CommandResult:
+        """Executes a command framed by sentinels unique to this call.
 
-    async def execute(self, command: str, timeout: Optional[int] = None) -> str:
-        """Executes a command and returns cleaned output.
+        Everything before the start sentinel (echoed input, prompts, output
+        of an interrupted earlier command) is discarded. Reading stops at the
+        end sentinel, which carries the exit status.
 
         Args:
             command: Shell command to execute.
             timeout: Maximum execution time in seconds.
+            on_output: Called with each output line as soon as it is complete.
 
         Returns:
-            Command output as string with prompt markers removed.
+            CommandResult with the output, exit code and duration.
 
         Raises:
             RuntimeError: If session not initialized or execution fails.
@@ -153,68 +195,88 @@ class DockerSession:
         if not self.socket:
             raise RuntimeError("Session not initialized")
 
+        token = uuid.uuid4().hex
+        start_marker = f"__OPENHT_{token}_START__".encode()
+        end_marker = f"__OPENHT_{token}_END__:".encode()
+
         try:
             # Sanitize command to prevent shell injection
             sanitized_command = self._sanitize_command(command)
-            full_command = f"{sanitized_command}\necho $?\n"
-            self.socket.sendall(full_command.encode())
-
-            async def read_output() -> str:
-                buffer = b""
-                result_lines = []
-                command_sent = False
+            # Sentinels are printed from two halves so the echoed input never
+            # contains them, and the frame is a single input line so its echo
+            # precedes the start sentinel
+            framed_command = (
+                f"printf '%s%s\\n' __OPENHT_ {token}_START__; "
+                f"eval {shlex.quote(sanitized_command)}; "
+                f"printf '%s%s:%s\\n' __OPENHT_ {token}_END__ \"$?\"\n"
+            )
+            started = time.monotonic()
+            await self._send(framed_command.encode())
+
+            async def read_output() -> CommandResult:
+                buffer = bytearray()
+                output_lines: List[str] = []
+                in_output = False
+
+                def emit(line: bytes) -> None:
+                    text = line.decode("utf-8", errors="replace")
+                    output_lines.append(text)
+                    if on_output:
+                        on_output(text)
 
                 while True:
-                    try:
-                        chunk = self.socket.recv(4096)
-                        if not chunk:
-                            break
-
-                        buffer += chunk
-                        lines = buffer.split(b"\n")
-
-                        buffer = lines[-1]
-                        lines = lines[:-1]
-
-                        for line in lines:
-                            line = line.rstrip(b"\r")
+                    chunk = await self._recv()
+                    if not chunk:
+                        raise RuntimeError("Session closed while command was running")
 
-                            if not command_sent:
-                                command_sent = True
-                                continue
-
-                            if line.strip() == b"echo $?" or line.strip().isdigit():
-                                continue
-
-                            if line.strip():
-                                result_lines.append(line)
-
-                        if buffer.endswith(b"$ "):
-                            break
-
-                    except socket.error as e:
-                        if e.errno == socket.EWOULDBLOCK:
-                            await asyncio.sleep(0.1)
+                    start = len(buffer)
+                    buffer += chunk
+                    end = buffer.rfind(b"\n", start)
+                    if end == -1:
+                        continue
+                    lines = bytes(buffer[:end]).split(b"\n")
+                    del buffer[: end + 1]
+
+                    for line in lines:
+                        line = line.rstrip(b"\r")
+                        if not in_output:
+                            in_output = line.endswith(start_marker)
                             continue
-                        raise
 
-                output = b"\n".join(result_lines).decode("utf-8")
-                output = re.sub(r"\n\$ echo \$\$?.*$", "", output)
+                        index = line.find(end_marker)
+                        if index == -1:
+                            emit(line)
+                            continue
 
-                return output
+                        # Output without a trailing newline precedes the sentinel
+                        if index:
+                            emit(line[:index])
+                        return CommandResult(
+                            stdout="\n".join(output_lines),
+                            exit_code=int(line[index + len(end_marker) :]),
+                            duration=time.monotonic() - started,
+                        )
 
             if timeout:
-                result = await asyncio.wait_for(read_output(), timeout)
-            else:
-                result = await read_output()
-
-            return result.strip()
+                return await asyncio.wait_for(read_output(), timeout)
+            return await read_output()
 
         except asyncio.TimeoutError:
+            await self._interrupt()
             raise TimeoutError(f"Command execution timed out after {timeout} seconds")
         except Exception as e:
             raise RuntimeError(f"Failed to execute command: {e}")
 
+    async def _interrupt(self) -> None:
+        """Sends Ctrl-C so a timed out command does not block the session.
+
+        Its remaining output is skipped by the next command's start sentinel.
+        """
+        try:
+            await asyncio.wait_for(self._send(b"\x03"), 1)
+        except Exception:
+            pass
+
     def _sanitize_command(self, command: str) -> str:
         """Sanitizes the command string to prevent shell injection.
 
@@ -313,15 +375,21 @@ class AsyncDockerizedTerminal:
         )
         return result.exit_code, result.output.decode("utf-8")
 
-    async def run_command(self, cmd: str, timeout: Optional[int] = None) -> str:
-        """Runs a command in the container with timeout.
+    async def execute(
+        self,
+        cmd: str,
+        timeout: Optional[int] = None,
+        on_output: Optional[Callable[[str], None]] = None,
+    ) -> CommandResult:
+        """Runs a command in the container and returns its structured result.
 
         Args:
             cmd: Shell command to execute.
             timeout: Maximum execution time in seconds.
+            on_output: Called with each output line as soon as it is complete.
 
         Returns:
-            Command output as string.
+            CommandResult with the output, exit code and duration.
 
         Raises:
             RuntimeError: If terminal not initialized.
@@ -329,7 +397,25 @@ class AsyncDockerizedTerminal:
         if not self.session:
             raise RuntimeError("Terminal not initialized")
 
-        return await self.session.execute(cmd, timeout=timeout or self.default_timeout)
+        return await self.session.execute(
+            cmd, timeout=timeout or self.default_timeout, on_output=on_output
+        )
+
+    async def run_command(self, cmd: str, timeout: Optional[int] = None) -> str:
+        """Runs a command in the container with timeout.
+
+        Args:
+            cmd: Shell command to execute.
+            timeout: Maximum execution time in seconds.
+
+        Returns:
+            Command output as string.
+
+        Raises:
+            RuntimeError: If terminal not initialized.
+        """
+        result = await self.execute(cmd, timeout)
+        return result.stdout.strip()
 
     async def close(self) -> None:
         """Closes the terminal session."""
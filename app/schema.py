@@ -1,7 +1,21 @@
+import json
 from enum import Enum
-from typing import Any, List, Literal, Optional, Union
+from typing import (
+    Any,
+    Callable,
+    ClassVar,
+    Dict,
+    List,
+    Literal,
+    Optional,
+    Set,
+    Tuple,
+    Union,
+)
 
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, Field, PrivateAttr
+
+from app.logger import logger
 
 
 class Role(str, Enum):
@@ -160,23 +174,234 @@ class Memory(BaseModel):
     messages: List[Message] = Field(default_factory=list)
     max_messages: int = Field(default=100)
 
+    # Compaction settings
+    keep_recent_messages: int = Field(
+        default=6, description="Trailing messages that are never compacted"
+    )
+    observation_preview_chars: int = Field(
+        default=300, description="Characters kept from an elided tool observation"
+    )
+    keep_recent_images: int = Field(
+        default=1, description="Number of most recent screenshots kept in context"
+    )
+
+    _token_counts: Dict[int, Tuple[Message, int]] = PrivateAttr(default_factory=dict)
+    _elided: Set[int] = PrivateAttr(default_factory=set)
+
+    IMAGE_TOKENS: ClassVar[int] = 1024
+    ELISION_MARKER: ClassVar[str] = "[... {count} characters elided to save context]"
+    DROPPED_MARKER: ClassVar[
+        str
+    ] = "[{count} earlier messages were removed to save context]"
+
     def add_message(self, message: Message) -> None:
         """Add a message to memory"""
         self.messages.append(message)
-        # Optional: Implement message limit
-        if len(self.messages) > self.max_messages:
-            self.messages = self.messages[-self.max_messages :]
+        self._enforce_max_messages()
 
     def add_messages(self, messages: List[Message]) -> None:
         """Add multiple messages to memory"""
         self.messages.extend(messages)
-        # Optional: Implement message limit
-        if len(self.messages) > self.max_messages:
-            self.messages = self.messages[-self.max_messages :]
+        self._enforce_max_messages()
+
+    def _enforce_max_messages(self) -> None:
+        """Drop the oldest messages until at most `max_messages` remain"""
+        # The dropped-messages marker takes a slot too, so one pass may not do
+        while len(self.messages) > self.max_messages:
+            if not self._drop_oldest(len(self.messages) - self.max_messages):
+                break
+
+    def _units(self) -> List[List[int]]:
+        """Group message indices so tool results stay with their tool calls.
+
+        An assistant message with tool_calls forms one unit with the tool
+        messages answering it; tool messages without a parent are skipped.
+        """
+        units: List[List[int]] = []
+        pending: Set[str] = set()
+        for index, message in enumerate(self.messages):
+            if message.role == Role.TOOL:
+                if message.tool_call_id in pending and units:
+                    units[-1].append(index)
+                continue
+            pending = {call.id for call in message.tool_calls or []}
+            units.append([index])
+        return units
+
+    def _drop_oldest(self, count: int) -> int:
+        """Drop at least `count` of the oldest messages, whole units at a time.
+
+        Returns the number of messages removed. A single marker message records
+        how many messages were dropped so far.
+        """
+        previous = 0
+        marker_index = None
+        for index, message in enumerate(self.messages):
+            recorded = self._dropped_count(message)
+            if recorded is not None:
+                previous, marker_index = recorded, index
+                break
+
+        units = self._units()
+        keep_from = max(0, len(self.messages) - self.keep_recent_messages)
+        # System messages, the first user request and the marker are never dropped
+        pinned = {i for i, m in enumerate(self.messages) if m.role == Role.SYSTEM}
+        pinned.update(
+            next(([i] for i, m in enumerate(self.messages) if m.role == Role.USER), [])
+        )
+        pinned.add(marker_index)
+        dropped: Set[int] = set()
+        for unit in units:
+            if len(dropped) >= count:
+                break
+            if unit[-1] >= keep_from or pinned.intersection(unit):
+                continue
+            dropped.update(unit)
+
+        # Orphaned tool messages are invalid on their own, drop them as well
+        grouped = {index for unit in units for index in unit}
+        dropped.update(i for i in range(len(self.messages)) if i not in grouped)
+        if not dropped:
+            return 0
+
+        marker = Message.user_message(
+            self.DROPPED_MARKER.format(count=previous + len(dropped))
+        )
+        messages = []
+        for index, message in enumerate(self.messages):
+            if index == marker_index or index in dropped:
+                if marker is not None:
+                    messages.append(marker)
+                    marker = None
+                continue
+            messages.append(message)
+        self.messages = messages
+        return len(dropped)
+
+    def _dropped_count(self, message: Message) -> Optional[int]:
+        """Number recorded in a dropped-messages marker, None for other messages"""
+        if message.role != Role.USER:
+            return None
+        prefix, _, suffix = self.DROPPED_MARKER.partition("{count}")
+        content = message.content or ""
+        if content.startswith(prefix) and content.endswith(suffix):
+            number = content[len(prefix) : len(content) - len(suffix)]
+            if number.isdigit():
+                return int(number)
+        return None
+
+    def _message_tokens(
+        self, message: Message, token_counter: Optional[Callable[[dict], int]]
+    ) -> int:
+        """Token size of a message, cached until the message is replaced"""
+        cached = self._token_counts.get(id(message))
+        if cached is not None and cached[0] is message:
+            return cached[1]
+
+        data = message.to_dict()
+        data.pop("base64_image", None)
+        if token_counter is not None:
+            tokens = token_counter(data)
+        else:
+            # Rough estimate of 4 characters per token
+            tokens = len(json.dumps(data, ensure_ascii=False)) // 4
+        if message.base64_image:
+            tokens += self.IMAGE_TOKENS
+        self._token_counts[id(message)] = (message, tokens)
+        return tokens
+
+    def count_tokens(
+        self, token_counter: Optional[Callable[[dict], int]] = None
+    ) -> int:
+        """Estimate the token size of all messages in memory"""
+        live = {id(message) for message in self.messages}
+        for key in list(self._token_counts):
+            if key not in live:
+                del self._token_counts[key]
+        return sum(self._message_tokens(m, token_counter) for m in self.messages)
+
+    def compact(
+        self,
+        max_tokens: Optional[int],
+        token_counter: Optional[Callable[[dict], int]] = None,
+        trigger: float = 0.8,
+        target: float = 0.5,
+    ) -> int:
+        """Shrink memory once it grows past `trigger` * `max_tokens`.
+
+        Stale screenshots are always dropped. Over the trigger, the oldest tool
+        observations are elided and then whole tool_call/tool units are removed
+        until memory fits in `target` * `max_tokens`. The most recent
+        `keep_recent_messages` messages are left untouched.
+
+        Args:
+            max_tokens: Context budget in tokens, None to only drop screenshots
+            token_counter: Callable counting tokens of a message dict
+            trigger: Fraction of the budget at which compaction starts
+            target: Fraction of the budget compaction reduces memory to
+
+        Returns:
+            Number of tokens saved.
+        """
+        before = self.count_tokens(token_counter)
+        self._drop_stale_images()
+        total = self.count_tokens(token_counter)
+        if not max_tokens or total <= max_tokens * trigger:
+            return before - total
+
+        goal = max_tokens * target
+        keep_from = max(0, len(self.messages) - self.keep_recent_messages)
+        for index in range(keep_from):
+            if total <= goal:
+                break
+            message = self.messages[index]
+            if message.role != Role.TOOL or id(message) in self._elided:
+                continue
+            content = message.content or ""
+            # Already elided before the memory was persisted and restored
+            if content.endswith(self.ELISION_MARKER.partition("{count}")[2]):
+                continue
+            if len(content) <= self.observation_preview_chars:
+                continue
+            old_tokens = self._message_tokens(message, token_counter)
+            preview = content[: self.observation_preview_chars]
+            elided = message.model_copy(
+                update={
+                    "content": f"{preview}\n"
+                    + self.ELISION_MARKER.format(count=len(content) - len(preview))
+                }
+            )
+            self.messages[index] = elided
+            self._elided.add(id(elided))
+            total += self._message_tokens(elided, token_counter) - old_tokens
+
+        while total > goal and self._drop_oldest(1):
+            total = self.count_tokens(token_counter)
+
+        self._elided &= {id(message) for message in self.messages}
+        if total < before:
+            logger.info(
+                f"Compacted memory from {before} to {total} tokens "
+                f"({len(self.messages)} messages)"
+            )
+        return before - total
+
+    def _drop_stale_images(self) -> None:
+        """Remove screenshots older than the `keep_recent_images` newest ones"""
+        seen = 0
+        for index in range(len(self.messages) - 1, -1, -1):
+            message = self.messages[index]
+            if not message.base64_image:
+                continue
+            seen += 1
+            if seen > self.keep_recent_images:
+                self.messages[index] = message.model_copy(update={"base64_image": None})
 
     def clear(self) -> None:
         """Clear all messages"""
         self.messages.clear()
+        self._token_counts.clear()
+        self._elided.clear()
 
     def get_recent_messages(self, n: int) -> List[Message]:
         """Get n most recent messages"""
@@ -3,15 +3,22 @@ OpenHT - File Storage Handler
 Supabase Storage entegrasyonu veya local dosya depolama
 """
 
+import asyncio
+import base64
 import hashlib
 import os
 import uuid
 from datetime import datetime
 from pathlib import Path
-from typing import BinaryIO, List, Optional
+from typing import AsyncIterator, BinaryIO, List, Optional
 
+import aiofiles
+import aiofiles.os
 from loguru import logger
 
+from app.http_client import get_http_client
+from app.storage.index import StorageIndex
+
 # Supabase storage (opsiyonel)
 try:
     from supabase import create_client
@@ -68,13 +75,27 @@ class StorageHandler:
     }
 
     MAX_FILE_SIZE = 50 * 1024 * 1024  # 50MB
+    CHUNK_SIZE = 1024 * 1024  # 1MB
+    SIGNED_URL_TTL = 60  # seconds
 
     def __init__(self):
         self.local_storage_path = Path(os.getenv("STORAGE_PATH", "uploads"))
         self.supabase_client = None
         self.bucket_name = os.getenv("STORAGE_BUCKET", "attachments")
+        # Store identical content once under its SHA-256 digest
+        self.content_addressed = os.getenv("STORAGE_CONTENT_ADDRESSED", "").lower() in (
+            "1",
+            "true",
+            "yes",
+        )
+
+        # Internal files live next to the served root, never inside it
+        root = self.local_storage_path.resolve()
+        self.index_path = root.with_name(f"{root.name}.index.db")
+        self.staging_path = root.with_name(f"{root.name}.staging")
 
         self._initialize()
+        self.index = StorageIndex(self.index_path, self.local_storage_path)
 
     def _initialize(self):
         """Initialize storage backend"""
@@ -107,6 +128,11 @@ class StorageHandler:
         safe_name = hashlib.md5(filename.encode()).hexdigest()[:8]
         return f"{user_id}/{timestamp}/{safe_name}_{unique_id}{ext}"
 
+    def _blob_path(self, digest: str, filename: str) -> str:
+        """Content-addressed path of a blob"""
+        ext = Path(filename).suffix.lower()
+        return f"blobs/{digest[:2]}/{digest}{ext}"
+
     def _validate_file(self, filename: str, file_size: int) -> None:
         """Validate file before upload"""
         # Check extension
@@ -119,6 +145,14 @@ class StorageHandler:
             max_mb = self.MAX_FILE_SIZE // (1024 * 1024)
             raise ValueError(f"Dosya çok büyük. Maksimum: {max_mb}MB")
 
+    def _local_path(self, file_path: str) -> Path:
+        """Resolve a storage path, refusing paths outside the storage root"""
+        root = self.local_storage_path.resolve()
+        full_path = (root / file_path).resolve()
+        if not full_path.is_relative_to(root):
+            raise ValueError(f"Geçersiz dosya yolu: {file_path}")
+        return full_path
+
     async def upload_file(
         self, file_content: bytes, filename: str, user_id: str, content_type: str = None
     ) -> dict:
@@ -128,134 +162,346 @@ class StorageHandler:
         """
         self._validate_file(filename, len(file_content))
 
-        file_path = self._generate_file_path(user_id, filename)
+        async def single_chunk():
+            yield file_content
+
+        return await self.upload_stream(single_chunk(), filename, user_id, content_type)
+
+    async def upload_stream(
+        self,
+        chunks: AsyncIterator[bytes],
+        filename: str,
+        user_id: str,
+        content_type: str = None,
+    ) -> dict:
+        """
+        Upload file from an async iterator of chunks
+        The size limit is enforced while streaming, the file is never held
+        in memory as a whole.
+        Returns: {id, path, url, size, content_type}
+        """
+        self._validate_file(filename, 0)
         file_id = str(uuid.uuid4())
 
-        if self.is_supabase:
-            return await self._upload_to_supabase(
-                file_content, file_path, file_id, filename, content_type
+        # Stream to a staging file while hashing, Supabase uploads read from it
+        staging_path = self.staging_path / f"{file_id}.part"
+        staging_path.parent.mkdir(parents=True, exist_ok=True)
+        digest = hashlib.sha256()
+        size = 0
+        try:
+            async with aiofiles.open(staging_path, "wb") as f:
+                async for chunk in chunks:
+                    size += len(chunk)
+                    self._validate_file(filename, size)
+                    digest.update(chunk)
+                    await f.write(chunk)
+        except BaseException:
+            staging_path.unlink(missing_ok=True)
+            raise
+        digest = digest.hexdigest()
+
+        existing = self.index.find_blob(digest) if self.content_addressed else None
+        if existing:
+            # Same content is already stored, only add a reference
+            await aiofiles.os.remove(staging_path)
+            file_path, storage, url = (
+                existing["path"],
+                existing["storage"],
+                existing["url"],
             )
         else:
-            return await self._upload_to_local(
-                file_content, file_path, file_id, filename, content_type
-            )
+            if self.content_addressed:
+                file_path = self._blob_path(digest, filename)
+            else:
+                file_path = self._generate_file_path(user_id, filename)
+            full_path = self._local_path(file_path)
+            full_path.parent.mkdir(parents=True, exist_ok=True)
+            await aiofiles.os.replace(staging_path, full_path)
+
+            storage, url = "local", f"/api/files/{file_path}"
+            if self.is_supabase:
+                public_url = await self._upload_to_supabase(
+                    full_path, file_path, content_type
+                )
+                if public_url:
+                    storage, url = "supabase", public_url
+
+        self.index.add_file(
+            file_id,
+            user_id,
+            filename,
+            file_path,
+            size,
+            content_type,
+            storage,
+            url,
+            digest=digest,
+        )
+        return self._file_info(
+            file_id, file_path, filename, content_type, size, url=url, storage=storage
+        )
+
+    def _file_info(
+        self,
+        file_id: str,
+        path: str,
+        filename: str,
+        content_type: str,
+        size: int,
+        url: str = None,
+        storage: str = "local",
+    ) -> dict:
+        return {
+            "id": file_id,
+            "path": path,
+            "url": url or f"/api/files/{path}",
+            "filename": filename,
+            "size": size,
+            "content_type": content_type,
+            "storage": storage,
+        }
 
     async def _upload_to_supabase(
-        self, content: bytes, path: str, file_id: str, filename: str, content_type: str
-    ) -> dict:
-        """Upload to Supabase Storage"""
+        self, local_path: Path, path: str, content_type: str
+    ) -> Optional[str]:
+        """Upload a locally staged file to Supabase Storage, return its URL"""
+        bucket = self.supabase_client.storage.from_(self.bucket_name)
+        file_options = {"content-type": content_type or "application/octet-stream"}
+        if self.content_addressed:
+            # Concurrent uploads of the same blob write identical content
+            file_options["upsert"] = "true"
         try:
-            response = self.supabase_client.storage.from_(self.bucket_name).upload(
+            # storage3 is synchronous, keep it off the event loop
+            await asyncio.to_thread(
+                bucket.upload,
                 path=path,
-                file=content,
-                file_options={
-                    "content-type": content_type or "application/octet-stream"
-                },
+                file=str(local_path),
+                file_options=file_options,
             )
 
             # Get public URL
-            url = self.supabase_client.storage.from_(self.bucket_name).get_public_url(
-                path
-            )
-
-            return {
-                "id": file_id,
-                "path": path,
-                "url": url,
-                "filename": filename,
-                "size": len(content),
-                "content_type": content_type,
-                "storage": "supabase",
-            }
+            url = await asyncio.to_thread(bucket.get_public_url, path)
         except Exception as e:
             logger.error(f"Supabase upload failed: {e}")
-            # Fallback to local
-            return await self._upload_to_local(
-                content, path, file_id, filename, content_type
-            )
+            # Fallback to local, the staged file is kept
+            return None
 
-    async def _upload_to_local(
-        self, content: bytes, path: str, file_id: str, filename: str, content_type: str
-    ) -> dict:
-        """Upload to local filesystem"""
-        full_path = self.local_storage_path / path
-        full_path.parent.mkdir(parents=True, exist_ok=True)
+        local_path.unlink(missing_ok=True)
+        return url
 
-        full_path.write_bytes(content)
+    def can_read(self, file_path: str, user_id: str) -> bool:
+        """Whether a user may download a stored file
 
-        return {
-            "id": file_id,
-            "path": path,
-            "url": f"/api/files/{file_id}",
-            "filename": filename,
-            "size": len(content),
-            "content_type": content_type,
-            "storage": "local",
-        }
+        Hidden (dot-prefixed) paths are never served. Other files need a
+        reference of the user in the index, or must lie in the user's own
+        directory when they are not indexed.
+        """
+        parts = Path(file_path).parts
+        if not parts or any(part.startswith(".") for part in parts):
+            return False
+        if self.index.owns(file_path, user_id):
+            return True
+        return parts[0] == user_id and not self.index.references(file_path)
+
+    async def get_file_info(self, file_id: str) -> Optional[dict]:
+        """Look up an uploaded file by id"""
+        row = self.index.get_file(file_id)
+        if not row:
+            return None
+        return self._file_info(
+            row["id"],
+            row["path"],
+            row["filename"],
+            row["content_type"],
+            row["size"],
+            url=row["url"],
+            storage=row["storage"],
+        )
 
     async def get_file(self, file_path: str) -> Optional[bytes]:
-        """Get file content"""
-        if self.is_supabase:
-            try:
-                response = self.supabase_client.storage.from_(
-                    self.bucket_name
-                ).download(file_path)
-                return response
-            except Exception as e:
-                logger.error(f"Supabase download failed: {e}")
-                return None
-        else:
-            full_path = self.local_storage_path / file_path
-            if full_path.exists():
-                return full_path.read_bytes()
+        """Get file content (prefer `stream_file` for large files)"""
+        if await self.get_file_size(file_path) is None:
             return None
+        return b"".join([chunk async for chunk in self.stream_file(file_path)])
+
+    async def _signed_url(self, file_path: str) -> str:
+        bucket = self.supabase_client.storage.from_(self.bucket_name)
+        response = await asyncio.to_thread(
+            bucket.create_signed_url, file_path, self.SIGNED_URL_TTL
+        )
+        return response.get("signedURL") or response.get("signedUrl")
+
+    async def get_file_size(self, file_path: str) -> Optional[int]:
+        """Size of a stored file in bytes, None if it does not exist"""
+        try:
+            full_path = self._local_path(file_path)
+        except ValueError:
+            return None
+        if full_path.is_file():
+            return (await aiofiles.os.stat(full_path)).st_size
+        if not self.is_supabase:
+            return None
+
+        try:
+            response = await get_http_client().head(await self._signed_url(file_path))
+            response.raise_for_status()
+            return int(response.headers["content-length"])
+        except Exception as e:
+            logger.error(f"Supabase stat failed: {e}")
+            return None
+
+    async def stream_file(
+        self, file_path: str, start: int = 0, end: Optional[int] = None
+    ) -> AsyncIterator[bytes]:
+        """Yield the bytes `start`..`end` (inclusive) of a file in chunks"""
+        full_path = self._local_path(file_path)
+        if full_path.is_file() or not self.is_supabase:
+            async with aiofiles.open(full_path, "rb") as f:
+                await f.seek(start)
+                remaining = None if end is None else end - start + 1
+                while remaining is None or remaining > 0:
+                    size = self.CHUNK_SIZE
+                    if remaining is not None:
+                        size = min(size, remaining)
+                    chunk = await f.read(size)
+                    if not chunk:
+                        return
+                    if remaining is not None:
+                        remaining -= len(chunk)
+                    yield chunk
+            return
+
+        # Supabase: stream the requested range over a short-lived signed URL
+        headers = {}
+        if start or end is not None:
+            headers["Range"] = f"bytes={start}-{'' if end is None else end}"
+        url = await self._signed_url(file_path)
+        async with get_http_client().stream("GET", url, headers=headers) as response:
+            response.raise_for_status()
+            async for chunk in response.aiter_bytes(self.CHUNK_SIZE):
+                yield chunk
+
+    async def delete_file(self, file_path: str, user_id: str) -> bool:
+        """Delete a user's file from storage
+
+        Only that user's references are removed; shared content-addressed
+        blobs are deleted with their last reference. Files that are not
+        indexed can only be deleted from the user's own directory.
+        """
+        removed = self.index.remove_path(file_path, user_id)
+        if self.index.references(file_path):
+            return removed > 0
+        if not removed and not file_path.startswith(f"{user_id}/"):
+            return False
 
-    async def delete_file(self, file_path: str) -> bool:
-        """Delete file from storage"""
+        full_path = self._local_path(file_path)
+        if full_path.is_file():
+            await aiofiles.os.remove(full_path)
+            return True
         if self.is_supabase:
             try:
-                self.supabase_client.storage.from_(self.bucket_name).remove([file_path])
+                await asyncio.to_thread(
+                    self.supabase_client.storage.from_(self.bucket_name).remove,
+                    [file_path],
+                )
                 return True
             except Exception as e:
                 logger.error(f"Supabase delete failed: {e}")
                 return False
-        else:
-            full_path = self.local_storage_path / file_path
-            if full_path.exists():
-                full_path.unlink()
-                return True
-            return False
-
-    async def list_user_files(self, user_id: str) -> List[dict]:
-        """List all files for a user"""
-        if self.is_supabase:
+        return False
+
+    @staticmethod
+    def file_cursor(file: dict) -> str:
+        """Opaque cursor for the page after `file`"""
+        key = f"{file['modified']}|{file['id']}"
+        return base64.urlsafe_b64encode(key.encode()).decode()
+
+    async def list_user_files(
+        self,
+        user_id: str,
+        limit: Optional[int] = None,
+        cursor: Optional[str] = None,
+        extensions: Optional[List[str]] = None,
+        newest_first: bool = True,
+    ) -> List[dict]:
+        """
+        List a user's files from the index, sorted by modification time
+        Pass the `file_cursor` of the last file to get the next page.
+        """
+        after = None
+        if cursor:
             try:
-                response = self.supabase_client.storage.from_(self.bucket_name).list(
-                    user_id
+                modified, file_id = (
+                    base64.urlsafe_b64decode(cursor).decode().split("|", 1)
                 )
-                return response
+            except Exception:
+                raise ValueError("Geçersiz sayfalama imleci")
+            after = (modified, file_id)
+
+        if self.is_supabase and not self.index.has_files(user_id):
+            # Files uploaded before the index existed are only in the bucket
+            try:
+                files = await asyncio.to_thread(self._list_bucket_files, user_id)
             except Exception as e:
                 logger.error(f"Supabase list failed: {e}")
                 return []
-        else:
-            user_path = self.local_storage_path / user_id
-            if not user_path.exists():
-                return []
-
-            files = []
-            for file in user_path.rglob("*"):
-                if file.is_file():
-                    files.append(
-                        {
-                            "name": file.name,
-                            "path": str(file.relative_to(self.local_storage_path)),
-                            "size": file.stat().st_size,
-                            "modified": datetime.fromtimestamp(
-                                file.stat().st_mtime
-                            ).isoformat(),
-                        }
-                    )
-            return files
+            if extensions:
+                wanted = {ext.lower().lstrip(".") for ext in extensions}
+                files = [
+                    f
+                    for f in files
+                    if Path(f["name"]).suffix.lower().lstrip(".") in wanted
+                ]
+            key = lambda f: (f["modified"], f["id"])
+            files.sort(key=key, reverse=newest_first)
+            if after:
+                if newest_first:
+                    files = [f for f in files if key(f) < after]
+                else:
+                    files = [f for f in files if key(f) > after]
+            return files if limit is None else files[:limit]
+
+        rows = self.index.list_files(user_id, limit, after, extensions, newest_first)
+        return [
+            {
+                "id": row["id"],
+                "name": row["filename"],
+                "path": row["path"],
+                "url": row["url"],
+                "size": row["size"],
+                "content_type": row["content_type"],
+                "modified": row["created_at"],
+            }
+            for row in rows
+        ]
+
+    def _list_bucket_files(self, user_id: str) -> List[dict]:
+        """All files under a user's bucket folder, in the indexed listing's shape"""
+        bucket = self.supabase_client.storage.from_(self.bucket_name)
+        files, folders = [], [user_id]
+        while folders:
+            folder = folders.pop()
+            for entry in bucket.list(folder):
+                path = f"{folder}/{entry['name']}"
+                # Folders have no id
+                if not entry.get("id"):
+                    folders.append(path)
+                    continue
+                metadata = entry.get("metadata") or {}
+                files.append(
+                    {
+                        "id": entry["id"],
+                        "name": entry["name"],
+                        "path": path,
+                        "url": bucket.get_public_url(path),
+                        "size": metadata.get("size", 0),
+                        "content_type": metadata.get("mimetype"),
+                        "modified": entry.get("updated_at")
+                        or entry.get("created_at")
+                        or "",
+                    }
+                )
+        return files
 
 
 # Singleton instance
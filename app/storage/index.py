@@ -0,0 +1,203 @@
+"""
+OpenHT - Storage Index
+Yüklenen dosyaların SQLite üzerindeki referans indeksi
+"""
+
+import mimetypes
+import sqlite3
+import threading
+import uuid
+from datetime import datetime
+from pathlib import Path
+from typing import List, Optional, Sequence, Tuple
+
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS files (
+    id TEXT PRIMARY KEY,
+    user_id TEXT NOT NULL,
+    filename TEXT NOT NULL,
+    extension TEXT NOT NULL,
+    path TEXT NOT NULL,
+    digest TEXT,
+    size INTEGER NOT NULL,
+    content_type TEXT,
+    storage TEXT NOT NULL,
+    url TEXT NOT NULL,
+    created_at TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_files_digest ON files (digest);
+CREATE INDEX IF NOT EXISTS idx_files_path ON files (path);
+CREATE INDEX IF NOT EXISTS idx_files_user ON files (user_id, created_at);
+CREATE INDEX IF NOT EXISTS idx_files_user_extension
+    ON files (user_id, extension, created_at);
+"""
+
+SCHEMA_VERSION = 1
+
+# Storage entries that are not user files
+_INTERNAL_DIRS = {"blobs"}
+
+
+class StorageIndex:
+    """Maps file ids to stored paths and content digests.
+
+    Every upload adds a reference row. In content-addressed mode several
+    references share one blob, which is deleted with its last reference.
+    """
+
+    def __init__(self, db_path: Path, root: Path):
+        db_path.parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(str(db_path), check_same_thread=False)
+        self._conn.row_factory = sqlite3.Row
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._lock = threading.Lock()
+        with self._lock, self._conn:
+            self._conn.executescript(SCHEMA)
+        self._backfill(root)
+
+    def _backfill(self, root: Path) -> None:
+        """Index files stored before the index existed (once)"""
+        with self._lock:
+            if self._conn.execute("PRAGMA user_version").fetchone()[0]:
+                return
+            indexed = {row[0] for row in self._conn.execute("SELECT path FROM files")}
+
+        rows = []
+        for user_dir in root.iterdir() if root.is_dir() else []:
+            if not user_dir.is_dir() or user_dir.name in _INTERNAL_DIRS:
+                continue
+            for file in user_dir.rglob("*"):
+                path = file.relative_to(root).as_posix()
+                if not file.is_file() or path in indexed:
+                    continue
+                stat = file.stat()
+                rows.append(
+                    (
+                        str(uuid.uuid4()),
+                        user_dir.name,
+                        file.name,
+                        file.suffix.lower().lstrip("."),
+                        path,
+                        None,
+                        stat.st_size,
+                        mimetypes.guess_type(file.name)[0],
+                        "local",
+                        f"/api/files/{path}",
+                        datetime.fromtimestamp(stat.st_mtime).isoformat(),
+                    )
+                )
+
+        with self._lock, self._conn:
+            self._conn.executemany(
+                "INSERT INTO files VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)", rows
+            )
+            self._conn.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+
+    def add_file(
+        self,
+        file_id: str,
+        user_id: str,
+        filename: str,
+        path: str,
+        size: int,
+        content_type: Optional[str],
+        storage: str,
+        url: str,
+        digest: Optional[str] = None,
+    ) -> None:
+        """Record a reference to a stored file"""
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT INTO files VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (
+                    file_id,
+                    user_id,
+                    filename,
+                    Path(filename).suffix.lower().lstrip("."),
+                    path,
+                    digest,
+                    size,
+                    content_type,
+                    storage,
+                    url,
+                    datetime.now().isoformat(),
+                ),
+            )
+
+    def get_file(self, file_id: str) -> Optional[dict]:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT * FROM files WHERE id = ?", (file_id,)
+            ).fetchone()
+        return dict(row) if row else None
+
+    def find_blob(self, digest: str) -> Optional[dict]:
+        """Any reference to content with this digest"""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT * FROM files WHERE digest = ? LIMIT 1", (digest,)
+            ).fetchone()
+        return dict(row) if row else None
+
+    def list_files(
+        self,
+        user_id: str,
+        limit: Optional[int] = None,
+        after: Optional[Tuple[str, str]] = None,
+        extensions: Optional[Sequence[str]] = None,
+        newest_first: bool = True,
+    ) -> List[dict]:
+        """A page of a user's files ordered by modification time.
+
+        `after` is the (created_at, id) key of the last row of the previous
+        page.
+        """
+        query, params = "SELECT * FROM files WHERE user_id = ?", [user_id]
+        if extensions:
+            query += f" AND extension IN ({', '.join('?' * len(extensions))})"
+            params.extend(ext.lower().lstrip(".") for ext in extensions)
+        if after:
+            query += f" AND (created_at, id) {'<' if newest_first else '>'} (?, ?)"
+            params.extend(after)
+        direction = "DESC" if newest_first else "ASC"
+        query += f" ORDER BY created_at {direction}, id {direction}"
+        if limit is not None:
+            query += " LIMIT ?"
+            params.append(limit)
+        with self._lock:
+            rows = self._conn.execute(query, params).fetchall()
+        return [dict(row) for row in rows]
+
+    def has_files(self, user_id: str) -> bool:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT 1 FROM files WHERE user_id = ? LIMIT 1", (user_id,)
+            ).fetchone()
+        return row is not None
+
+    def remove_path(self, path: str, user_id: str) -> int:
+        """Remove a user's references to a path, return the count"""
+        with self._lock, self._conn:
+            return self._conn.execute(
+                "DELETE FROM files WHERE path = ? AND user_id = ?", (path, user_id)
+            ).rowcount
+
+    def owns(self, path: str, user_id: str) -> bool:
+        """Whether the user has a reference to the path"""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT 1 FROM files WHERE path = ? AND user_id = ? LIMIT 1",
+                (path, user_id),
+            ).fetchone()
+        return row is not None
+
+    def references(self, path: str) -> int:
+        with self._lock:
+            return self._conn.execute(
+                "SELECT COUNT(*) FROM files WHERE path = ?", (path,)
+            ).fetchone()[0]
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
@@ -88,12 +88,14 @@ class BaseTool(ABC, BaseModel):
         name (str): Tool name
         description (str): Tool description
         parameters (dict): Tool parameters schema
+        concurrency_safe (bool): Whether calls may run alongside other tool calls
         _schemas (Dict[str, List[ToolSchema]]): Registered method schemas
     """
 
     name: str
     description: str
     parameters: Optional[dict] = None
+    concurrency_safe: bool = False
     # _schemas: Dict[str, List[ToolSchema]] = {}
 
     class Config:
@@ -21,6 +21,7 @@ class Crawl4aiTool(BaseTool):
     """
 
     name: str = "crawl4ai"
+    concurrency_safe: bool = True
     description: str = """Web crawler that extracts clean, AI-ready content from web pages.
 
     Features:
@@ -4,7 +4,7 @@ import asyncio
 from pathlib import Path
 from typing import Optional, Protocol, Tuple, Union, runtime_checkable
 
-from app.config import SandboxSettings
+from app.config import config
 from app.exceptions import ToolError
 from app.sandbox.client import SANDBOX_CLIENT
 
@@ -102,7 +102,7 @@ class SandboxFileOperator(FileOperator):
     async def _ensure_sandbox_initialized(self):
         """Ensure sandbox is initialized."""
         if not self.sandbox_client.sandbox:
-            await self.sandbox_client.create(config=SandboxSettings())
+            await self.sandbox_client.create(config=config.sandbox)
 
     async def read_file(self, path: PathLike) -> str:
         """Read content from a file in sandbox."""
@@ -142,13 +142,13 @@ class SandboxFileOperator(FileOperator):
         """Run a command in sandbox environment."""
         await self._ensure_sandbox_initialized()
         try:
-            stdout = await self.sandbox_client.run_command(
+            result = await self.sandbox_client.execute(
                 cmd, timeout=int(timeout) if timeout else None
             )
             return (
-                0,  # Always return 0 since we don't have explicit return code from sandbox
-                stdout,
-                "",  # No stderr capture in the current sandbox implementation
+                result.exit_code,
+                result.stdout,
+                "",  # The sandbox terminal is a TTY, stderr is part of stdout
             )
         except TimeoutError as exc:
             raise TimeoutError(
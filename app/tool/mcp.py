@@ -46,6 +46,9 @@ class MCPClients(ToolCollection):
     def __init__(self):
         super().__init__()  # Initialize with empty tools list
         self.name = "mcp"  # Keep name for backward compatibility
+        # Per-instance connections, pooled agents must not share sessions
+        self.sessions = {}
+        self.exit_stacks = {}
 
     async def connect_sse(self, server_url: str, server_id: str = "") -> None:
         """Connect to an MCP server using SSE transport."""
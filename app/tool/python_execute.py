@@ -1,3 +1,4 @@
+import asyncio
 import multiprocessing
 import sys
 from io import StringIO
@@ -10,6 +11,7 @@ class PythonExecute(BaseTool):
     """A tool for executing Python code with timeout and safety restrictions."""
 
     name: str = "python_execute"
+    concurrency_safe: bool = True
     description: str = "Executes Python code string. Note: Only print outputs are visible, function return values are not captured. Use print statements to see results."
     parameters: dict = {
         "type": "object",
@@ -51,7 +53,13 @@ class PythonExecute(BaseTool):
         Returns:
             Dict: Contains 'output' with execution output or error message and 'success' status.
         """
+        # Run the blocking process management off the event loop so other
+        # tool calls can proceed in the meantime
+        return await asyncio.get_running_loop().run_in_executor(
+            None, self._execute_in_process, code, timeout
+        )
 
+    def _execute_in_process(self, code: str, timeout: int) -> Dict:
         with multiprocessing.Manager() as manager:
             result = manager.dict({"observation": "", "success": False})
             if isinstance(__builtins__, dict):
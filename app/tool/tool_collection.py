@@ -1,5 +1,5 @@
 """Collection classes for managing multiple tools."""
-from typing import Any, Dict, List
+from typing import Any, Dict, List, Optional, Tuple
 
 from app.exceptions import ToolError
 from app.logger import logger
@@ -15,12 +15,18 @@ class ToolCollection:
     def __init__(self, *tools: BaseTool):
         self.tools = tools
         self.tool_map = {tool.name: tool for tool in tools}
+        self._params_cache: Optional[Tuple[Tuple[BaseTool, ...], List[Dict]]] = None
 
     def __iter__(self):
         return iter(self.tools)
 
     def to_params(self) -> List[Dict[str, Any]]:
-        return [tool.to_param() for tool in self.tools]
+        """Return tool schemas, memoized until the tool tuple is replaced."""
+        cached = getattr(self, "_params_cache", None)
+        if cached is None or cached[0] is not self.tools:
+            cached = (self.tools, [tool.to_param() for tool in self.tools])
+            self._params_cache = cached
+        return cached[1]
 
     async def execute(
         self, *, name: str, tool_input: Dict[str, Any] = None
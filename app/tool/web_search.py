@@ -1,12 +1,12 @@
 import asyncio
 from typing import Any, Dict, List, Optional
 
-import requests
 from bs4 import BeautifulSoup
 from pydantic import BaseModel, ConfigDict, Field, model_validator
 from tenacity import retry, stop_after_attempt, wait_exponential
 
 from app.config import config
+from app.http_client import get_http_client
 from app.logger import logger
 from app.tool.base import BaseTool, ToolResult
 from app.tool.search import (
@@ -123,9 +123,9 @@ class WebContentFetcher:
         }
 
         try:
-            # Use asyncio to run requests in a thread pool
-            response = await asyncio.get_event_loop().run_in_executor(
-                None, lambda: requests.get(url, headers=headers, timeout=timeout)
+            # Reuse pooled connections from the shared HTTP client
+            response = await get_http_client().get(
+                url, headers=headers, timeout=timeout
             )
 
             if response.status_code != 200:
@@ -157,6 +157,7 @@ class WebSearch(BaseTool):
     """Search the web for information using various search engines."""
 
     name: str = "web_search"
+    concurrency_safe: bool = True
     description: str = """Search the web for real-time information about any topic.
     This tool returns comprehensive search results with relevant information, URLs, titles, and descriptions.
     If the primary search engine fails, it automatically falls back to alternative engines."""
@@ -0,0 +1,35 @@
+-- =====================================================
+-- OpenHT - Batched message writes
+-- Run this in Supabase SQL Editor after 001_init_schema.sql
+-- =====================================================
+
+-- Inserts a batch of messages and touches their conversations in a single
+-- round-trip. Messages that already exist are skipped, so a retried batch
+-- does not fail on the primary key.
+CREATE OR REPLACE FUNCTION append_messages(batch JSONB)
+RETURNS VOID AS $$
+BEGIN
+    INSERT INTO messages (id, conversation_id, role, content, created_at)
+    SELECT m.id, m.conversation_id, m.role, m.content, m.created_at
+    FROM jsonb_to_recordset(batch) AS m(
+        id UUID,
+        conversation_id UUID,
+        role TEXT,
+        content TEXT,
+        created_at TIMESTAMPTZ
+    )
+    ON CONFLICT (id) DO NOTHING;
+
+    UPDATE conversations c
+    SET updated_at = latest.created_at
+    FROM (
+        SELECT m.conversation_id, MAX(m.created_at) AS created_at
+        FROM jsonb_to_recordset(batch) AS m(
+            conversation_id UUID,
+            created_at TIMESTAMPTZ
+        )
+        GROUP BY m.conversation_id
+    ) latest
+    WHERE c.id = latest.conversation_id;
+END;
+$$ language 'plpgsql';
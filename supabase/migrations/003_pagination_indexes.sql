@@ -0,0 +1,12 @@
+-- =====================================================
+-- OpenHT - Keyset pagination indexes
+-- Run this in Supabase SQL Editor after 001_init_schema.sql
+-- =====================================================
+
+-- Conversation list: WHERE user_id = ? ORDER BY updated_at DESC, id DESC
+CREATE INDEX IF NOT EXISTS idx_conversations_user_updated
+    ON conversations (user_id, updated_at DESC, id DESC);
+
+-- Message windows: WHERE conversation_id = ? ORDER BY created_at
+CREATE INDEX IF NOT EXISTS idx_messages_conversation_created
+    ON messages (conversation_id, created_at);
@@ -0,0 +1,124 @@
+import asyncio
+import json
+
+import pytest
+
+from app.agent.openht import OpenHT
+from app.agent.pool import AgentPool
+from app.llm import LLM, TokenCounter
+from app.schema import Function, Message, Role, ToolCall
+
+
+class _WordTokenizer:
+    """Tokenizer stand-in that needs no downloaded encodings."""
+
+    def encode(self, text: str):
+        return text.split()
+
+
+class FakeLLM(LLM):
+    """LLM that finishes every request with a terminate call."""
+
+    def __new__(cls):
+        return object.__new__(cls)
+
+    def __init__(self):
+        self.model = "fake"
+        self.max_input_tokens = None
+        self.token_counter = TokenCounter(_WordTokenizer())
+
+    async def ask_tool(self, *args, **kwargs) -> Message:
+        call = ToolCall(
+            id="terminate",
+            function=Function(
+                name="terminate", arguments=json.dumps({"status": "success"})
+            ),
+        )
+        return Message(role=Role.ASSISTANT, content="done", tool_calls=[call])
+
+
+@pytest.fixture
+def mcp_calls(monkeypatch):
+    """Counts MCP connects and disconnects instead of starting servers."""
+    calls = {"connect": 0, "disconnect": 0}
+
+    async def initialize_mcp_servers(self):
+        calls["connect"] += 1
+        self.connected_servers["fake"] = "fake"
+        self.mcp_clients.sessions["fake"] = object()
+
+    async def disconnect_mcp_server(self, server_id: str = ""):
+        calls["disconnect"] += 1
+        self.connected_servers.clear()
+        self.mcp_clients.sessions.clear()
+
+    monkeypatch.setattr(OpenHT, "initialize_mcp_servers", initialize_mcp_servers)
+    monkeypatch.setattr(OpenHT, "disconnect_mcp_server", disconnect_mcp_server)
+    return calls
+
+
+@pytest.mark.asyncio
+async def test_pooled_agent_keeps_mcp_sessions_between_runs(mcp_calls):
+    """Tests that runs of a pooled agent reuse its MCP connections."""
+    pool = AgentPool(lambda: OpenHT.create(llm=FakeLLM()), max_size=1)
+    try:
+        for request in ("first request", "second request"):
+            async with pool.agent() as agent:
+                await agent.run(request)
+                assert agent.is_healthy()
+
+        assert pool.stats()["created"] == 1
+        assert mcp_calls == {"connect": 1, "disconnect": 0}
+    finally:
+        await pool.close()
+
+    # The pool's lifecycle task cleans up on close
+    assert mcp_calls["disconnect"] == 1
+
+
+@pytest.mark.asyncio
+async def test_unpooled_agent_cleans_up_after_run(mcp_calls):
+    """Tests that standalone agents still release resources after a run."""
+    agent = await OpenHT.create(llm=FakeLLM())
+    await agent.run("request")
+    assert mcp_calls == {"connect": 1, "disconnect": 1}
+
+
+class SlowClosingAgent:
+    """Minimal pooled agent whose cleanup takes a moment."""
+
+    name = "slow-closing"
+
+    def __init__(self, closed: list, delay: float):
+        self.closed = closed
+        self.delay = delay
+
+    def is_healthy(self) -> bool:
+        return True
+
+    async def reset(self) -> None:
+        pass
+
+    async def cleanup(self) -> None:
+        await asyncio.sleep(self.delay)
+        self.closed.append(self)
+
+
+@pytest.mark.asyncio
+async def test_close_waits_for_replaced_agents():
+    """Tests that agents replaced in the background are closed with the pool."""
+    closed = []
+    delays = iter([0.2, 0.0])
+
+    async def factory():
+        # The replaced agent closes slower than the idle one
+        return SlowClosingAgent(closed, next(delays))
+
+    pool = AgentPool(factory, max_size=2, max_uses=1)
+    for _ in range(2):
+        async with pool.agent():
+            pass
+    await pool.close()
+
+    assert pool.stats()["created"] == 2
+    assert len(closed) == 2
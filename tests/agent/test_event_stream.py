@@ -0,0 +1,85 @@
+import asyncio
+
+import pytest
+
+from app.event_stream import (
+    EventStream,
+    EventType,
+    emit,
+    event_stream,
+    streaming_enabled,
+)
+
+
+async def drain(stream: EventStream):
+    return [event.to_dict() async for event in stream]
+
+
+def summary(events):
+    return [(e["type"], e.get("content") or e.get("name")) for e in events]
+
+
+@pytest.mark.asyncio
+async def test_full_queue_blocks_other_events():
+    """Tests that a slow consumer holds back non-token events."""
+    stream = EventStream(max_size=2)
+    await stream.publish(EventType.STEP_START, name="1")
+    await stream.publish(EventType.STEP_START, name="2")
+
+    blocked = asyncio.create_task(stream.publish(EventType.STEP_START, name="3"))
+    await asyncio.sleep(0.01)
+    assert not blocked.done()
+
+    await stream.__anext__()
+    await asyncio.wait_for(blocked, 1)
+    stream.close()
+    assert summary(await drain(stream)) == [("step_start", "2"), ("step_start", "3")]
+
+
+@pytest.mark.asyncio
+async def test_tokens_are_coalesced_while_full():
+    """Tests that token deltas never block and keep their order."""
+    stream = EventStream(max_size=1)
+    await stream.publish(EventType.STEP_START, name="step")
+    for token in ("Hel", "lo", "!"):
+        await asyncio.wait_for(stream.publish(EventType.TOKEN, content=token), 1)
+
+    assert stream.coalesced == 3
+    await stream.__anext__()
+    publish_end = asyncio.create_task(stream.publish(EventType.STEP_END, name="step"))
+    assert summary([(await stream.__anext__()).to_dict()]) == [("token", "Hello!")]
+    await asyncio.wait_for(publish_end, 1)
+    stream.close()
+    assert summary(await drain(stream)) == [("step_end", "step")]
+
+
+@pytest.mark.asyncio
+async def test_close_releases_producer_and_consumer():
+    """Tests that closing wakes a blocked producer and ends iteration."""
+    stream = EventStream(max_size=1)
+    await stream.publish(EventType.STEP_START, name="queued")
+    blocked = asyncio.create_task(stream.publish(EventType.STEP_END, name="lost"))
+    await asyncio.sleep(0.01)
+
+    stream.close()
+    await asyncio.wait_for(blocked, 1)
+    await stream.publish(EventType.STEP_START, name="after close")
+
+    # Queued events are still delivered, later ones are dropped
+    assert summary(await drain(stream)) == [("step_start", "queued")]
+
+
+@pytest.mark.asyncio
+async def test_emit_publishes_to_the_current_stream():
+    """Tests that emit only publishes inside event_stream()."""
+    stream = EventStream()
+    await emit(EventType.TOKEN, content="outside")
+    assert not streaming_enabled()
+
+    with event_stream(stream):
+        assert streaming_enabled()
+        await emit(EventType.TOKEN, content="inside")
+
+    stream.close()
+    assert not streaming_enabled()
+    assert summary(await drain(stream)) == [("token", "inside")]
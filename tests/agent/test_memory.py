@@ -0,0 +1,132 @@
+from typing import List
+
+from app.schema import Function, Memory, Message, Role, ToolCall
+
+
+def tool_round(step: int, output: str, image: str = None) -> List[Message]:
+    """An assistant tool call followed by its observation."""
+    call = ToolCall(id=f"call-{step}", function=Function(name="run", arguments="{}"))
+    return [
+        Message.from_tool_calls(tool_calls=[call], content=f"step {step}"),
+        Message.tool_message(
+            output, name="run", tool_call_id=call.id, base64_image=image
+        ),
+    ]
+
+
+def make_memory(rounds: int, output: str = "ok", **settings) -> Memory:
+    memory = Memory(**settings)
+    memory.add_messages(
+        [Message.system_message("system"), Message.user_message("request")]
+    )
+    for step in range(rounds):
+        memory.add_messages(tool_round(step, output))
+    return memory
+
+
+def assert_tool_results_follow_calls(memory: Memory) -> None:
+    open_calls = set()
+    for message in memory.messages:
+        if message.role == Role.TOOL:
+            assert message.tool_call_id in open_calls
+        else:
+            open_calls = {call.id for call in message.tool_calls or []}
+
+
+def test_overflow_drops_whole_tool_rounds():
+    """Tests that max_messages drops tool calls together with their results."""
+    memory = make_memory(3, max_messages=8, keep_recent_messages=2)
+
+    memory.add_messages(tool_round(3, "ok"))
+
+    contents = [m.content for m in memory.messages]
+    # The marker takes a slot as well, so two rounds go
+    assert contents[:3] == [
+        "system",
+        "request",
+        "[4 earlier messages were removed to save context]",
+    ]
+    assert contents[3::2] == ["step 2", "step 3"]
+    assert len(memory.messages) <= 8
+    assert_tool_results_follow_calls(memory)
+
+
+def test_drop_marker_counts_all_dropped_messages():
+    """Tests that repeated drops update a single marker."""
+    memory = make_memory(3, max_messages=8, keep_recent_messages=2)
+
+    memory.add_messages(tool_round(3, "ok"))
+    memory.add_messages(tool_round(4, "ok"))
+
+    markers = [m.content for m in memory.messages if "removed" in (m.content or "")]
+    assert markers == ["[6 earlier messages were removed to save context]"]
+    assert len(memory.messages) <= 8
+
+
+def test_compact_under_trigger_keeps_messages():
+    """Tests that memory below the trigger is left as it is."""
+    memory = make_memory(3, output="x" * 1000)
+    before = memory.to_dict_list()
+
+    assert memory.compact(max_tokens=100_000) == 0
+    assert memory.to_dict_list() == before
+
+
+def test_compact_elides_old_observations():
+    """Tests that old observations shrink to a preview, recent ones stay."""
+    memory = make_memory(
+        4, output="x" * 4000, keep_recent_messages=2, observation_preview_chars=100
+    )
+    total = memory.count_tokens()
+
+    saved = memory.compact(max_tokens=total, trigger=0.5, target=0.5)
+
+    tool_outputs = [m.content for m in memory.messages if m.role == Role.TOOL]
+    assert saved > 0
+    assert memory.count_tokens() <= total * 0.5
+    assert tool_outputs[0].startswith("x" * 100 + "\n[... 3900 characters elided")
+    assert tool_outputs[-1] == "x" * 4000
+    assert len(memory.messages) == 10
+
+
+def test_compact_drops_rounds_when_eliding_is_not_enough():
+    """Tests that whole rounds are dropped once every observation is elided."""
+    memory = make_memory(6, output="x" * 4000, keep_recent_messages=2)
+    total = memory.count_tokens()
+
+    memory.compact(max_tokens=total, trigger=0.5, target=0.1)
+
+    # Only the pinned messages and the recent round are left
+    contents = [m.content for m in memory.messages]
+    assert contents == [
+        "system",
+        "request",
+        "[10 earlier messages were removed to save context]",
+        "step 5",
+        "x" * 4000,
+    ]
+    assert_tool_results_follow_calls(memory)
+
+
+def test_compact_is_stable_once_it_fits():
+    """Tests that compacting again does not elide further."""
+    memory = make_memory(4, output="x" * 4000, keep_recent_messages=2)
+    memory.compact(max_tokens=memory.count_tokens(), trigger=0.5, target=0.5)
+    compacted = memory.to_dict_list()
+
+    memory.compact(max_tokens=memory.count_tokens() * 2, trigger=0.5, target=0.5)
+
+    assert memory.to_dict_list() == compacted
+
+
+def test_only_newest_screenshots_are_kept():
+    """Tests that stale screenshots are dropped even without a budget."""
+    memory = make_memory(0, keep_recent_images=1)
+    for step in range(3):
+        memory.add_messages(tool_round(step, "ok", image=f"image-{step}"))
+
+    saved = memory.compact(max_tokens=None)
+
+    images = [m.base64_image for m in memory.messages if m.role == Role.TOOL]
+    assert images == [None, None, "image-2"]
+    assert saved == 2 * Memory.IMAGE_TOKENS
@@ -0,0 +1,122 @@
+import asyncio
+import json
+from typing import List
+
+import pytest
+from pydantic import Field
+
+from app.agent.toolcall import ToolCallAgent
+from app.llm import LLM, TokenCounter
+from app.schema import Function, Role, ToolCall
+from app.tool import ToolCollection
+from app.tool.base import BaseTool
+
+
+class _WordTokenizer:
+    """Tokenizer stand-in that needs no downloaded encodings."""
+
+    def encode(self, text: str):
+        return text.split()
+
+
+class FakeLLM(LLM):
+    """LLM that is never asked, act() only runs tools."""
+
+    def __new__(cls):
+        return object.__new__(cls)
+
+    def __init__(self):
+        self.model = "fake"
+        self.max_input_tokens = None
+        self.token_counter = TokenCounter(_WordTokenizer())
+
+
+class RecordingTool(BaseTool):
+    """Sleeps for the given time and logs when each call starts and ends."""
+
+    description: str = "Records its calls."
+    parameters: dict = {"type": "object", "properties": {}}
+    log: List[str] = Field(default_factory=list)
+
+    async def execute(self, label: str, delay: float = 0.0) -> str:
+        self.log.append(f"start {label}")
+        await asyncio.sleep(delay)
+        self.log.append(f"end {label}")
+        return label
+
+
+def make_agent(log: List[str], **settings) -> ToolCallAgent:
+    tools = ToolCollection(
+        RecordingTool(name="safe", concurrency_safe=True),
+        RecordingTool(name="serial"),
+    )
+    for tool in tools:
+        # Validation would copy the list, share it afterwards
+        tool.log = log
+    settings.setdefault("parallel_tool_calls", True)
+    settings.setdefault("max_parallel_tool_calls", 4)
+    return ToolCallAgent(llm=FakeLLM(), available_tools=tools, **settings)
+
+
+def call(tool: str, label: str, delay: float = 0.0) -> ToolCall:
+    arguments = json.dumps({"label": label, "delay": delay})
+    return ToolCall(id=label, function=Function(name=tool, arguments=arguments))
+
+
+def tool_results(agent: ToolCallAgent) -> List[str]:
+    return [m.tool_call_id for m in agent.memory.messages if m.role == Role.TOOL]
+
+
+@pytest.mark.asyncio
+async def test_safe_calls_overlap_and_keep_call_order():
+    """Tests that concurrency-safe calls run together, results in call order."""
+    log = []
+    agent = make_agent(log)
+    agent.tool_calls = [call("safe", "a", 0.05), call("safe", "b", 0.01)]
+
+    await agent.act()
+
+    assert log == ["start a", "start b", "end b", "end a"]
+    assert tool_results(agent) == ["a", "b"]
+
+
+@pytest.mark.asyncio
+async def test_unsafe_call_is_a_barrier():
+    """Tests that other tools wait for earlier calls and hold back later ones."""
+    log = []
+    agent = make_agent(log)
+    agent.tool_calls = [
+        call("safe", "a", 0.02),
+        call("serial", "b", 0.01),
+        call("safe", "c"),
+    ]
+
+    await agent.act()
+
+    assert log == ["start a", "end a", "start b", "end b", "start c", "end c"]
+    assert tool_results(agent) == ["a", "b", "c"]
+
+
+@pytest.mark.asyncio
+async def test_parallel_calls_are_bounded():
+    """Tests that max_parallel_tool_calls limits the overlapping calls."""
+    log = []
+    agent = make_agent(log, max_parallel_tool_calls=1)
+    agent.tool_calls = [call("safe", "a", 0.02), call("safe", "b")]
+
+    await agent.act()
+
+    assert log == ["start a", "end a", "start b", "end b"]
+
+
+@pytest.mark.asyncio
+async def test_calls_run_in_order_when_disabled():
+    """Tests that calls run one by one without parallel_tool_calls."""
+    log = []
+    agent = make_agent(log, parallel_tool_calls=False)
+    agent.tool_calls = [call("safe", "a", 0.02), call("safe", "b")]
+
+    await agent.act()
+
+    assert log == ["start a", "end a", "start b", "end b"]
+    assert tool_results(agent) == ["a", "b"]
@@ -0,0 +1,119 @@
+import asyncio
+import json
+from typing import List
+
+import pytest
+from pydantic import Field
+
+from app.agent.toolcall import ToolCallAgent
+from app.event_stream import EventStream, event_stream
+from app.llm import LLM, TokenCounter
+from app.schema import Function, ToolCall
+from app.tool import Terminate, ToolCollection
+from app.tool.base import BaseTool
+
+
+class _WordTokenizer:
+    """Tokenizer stand-in that needs no downloaded encodings."""
+
+    def encode(self, text: str):
+        return text.split()
+
+
+class StreamingLLM(LLM):
+    """LLM that streams the given items, raising exceptions among them."""
+
+    def __new__(cls, items):
+        return object.__new__(cls)
+
+    def __init__(self, items):
+        self.model = "fake"
+        self.max_input_tokens = None
+        self.token_counter = TokenCounter(_WordTokenizer())
+        self.items = items
+
+    async def ask_tool_stream(self, *args, **kwargs):
+        for item in self.items:
+            await asyncio.sleep(0.02)
+            if isinstance(item, Exception):
+                raise item
+            yield item
+
+
+class SlowTool(BaseTool):
+    """Records its start and end around a pause."""
+
+    name: str = "slow"
+    description: str = "Waits a moment."
+    parameters: dict = {"type": "object", "properties": {}}
+    concurrency_safe: bool = True
+    log: List[str] = Field(default_factory=list)
+
+    async def execute(self) -> str:
+        self.log.append("start")
+        await asyncio.sleep(0.2)
+        self.log.append("end")
+        return "slow done"
+
+
+def make_agent(items, log: List[str]) -> ToolCallAgent:
+    tool = SlowTool()
+    # Validation would copy the list, share it afterwards
+    tool.log = log
+    return ToolCallAgent(
+        llm=StreamingLLM(items),
+        available_tools=ToolCollection(tool, Terminate()),
+        stream_tool_calls=True,
+        parallel_tool_calls=True,
+        max_steps=1,
+    )
+
+
+def call(name: str, arguments: dict) -> ToolCall:
+    return ToolCall(
+        id=f"{name}-call", function=Function(name=name, arguments=json.dumps(arguments))
+    )
+
+
+@pytest.mark.asyncio
+async def test_tool_starts_while_response_streams():
+    """Tests that a call starts before the model finished its response."""
+    log = []
+    agent = make_agent(["Looking", call("slow", {}), " it up", " now"], log)
+
+    assert await agent.think()
+    # The tool was started when the call arrived, two chunks ago
+    assert log == ["start"]
+
+    await agent.act()
+    assert log == ["start", "end"]
+    assert agent.messages[-1].content.endswith("slow done")
+
+
+@pytest.mark.asyncio
+async def test_failed_stream_cancels_started_tools():
+    """Tests that calls launched before a stream error are cancelled."""
+    log = []
+    agent = make_agent([call("slow", {}), RuntimeError("connection reset")], log)
+
+    with pytest.raises(RuntimeError):
+        await agent.think()
+    await asyncio.sleep(0.25)
+
+    assert log == ["start"]
+    assert not agent._started_tool_calls
+
+
+@pytest.mark.asyncio
+async def test_agent_events_are_streamed():
+    """Tests the token, tool and step events of a streamed run."""
+    log = []
+    agent = make_agent(["Done", call("terminate", {"status": "success"})], log)
+    stream = EventStream()
+
+    with event_stream(stream):
+        await agent.run("request")
+    stream.close()
+
+    events = [event.type async for event in stream]
+    assert events == ["step_start", "token", "tool_start", "tool_end", "step_end"]
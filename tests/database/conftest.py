@@ -0,0 +1,217 @@
+import json
+import os
+import re
+import uuid
+from datetime import datetime, timezone
+from typing import Dict, List, Optional
+
+import httpx
+import pytest
+from postgrest import AsyncPostgrestClient
+
+
+FAKE_URL = "http://postgrest.test"
+
+
+def _now() -> str:
+    return datetime.now(timezone.utc).isoformat()
+
+
+class FakePostgREST:
+    """In-memory stand-in for the PostgREST API used by SupabaseClient.
+
+    Covers the requests the client sends: equality and range filters,
+    `or=(...)` keyset filters, ordering, limits, single-object reads,
+    `messages(count)` embedding, inserts with ignore-duplicates upserts,
+    updates, deletes and the `append_messages` function of
+    supabase/migrations. Conversations get `updated_at = now()` on every
+    update, like the trigger of the init migration.
+
+    Args:
+        append_rpc: Whether the append_messages function exists
+    """
+
+    def __init__(self, append_rpc: bool = True):
+        self.append_rpc = append_rpc
+        self.tables: Dict[str, List[dict]] = {
+            "users": [],
+            "conversations": [],
+            "messages": [],
+        }
+        self.requests: List[str] = []
+
+    # ----- Filters -----
+
+    @staticmethod
+    def _split(expression: str) -> List[str]:
+        """Split a comma-separated condition list, keeping nested groups"""
+        parts, depth, quoted, current = [], 0, False, ""
+        for char in expression:
+            if char == '"':
+                quoted = not quoted
+            elif not quoted and char == "(":
+                depth += 1
+            elif not quoted and char == ")":
+                depth -= 1
+            elif not quoted and char == "," and depth == 0:
+                parts.append(current)
+                current = ""
+                continue
+            current += char
+        return parts + [current]
+
+    def _condition(self, expression: str):
+        match = re.fullmatch(r"(and|or)\((.*)\)", expression)
+        if match:
+            combine = all if match.group(1) == "and" else any
+            conditions = [self._condition(c) for c in self._split(match.group(2))]
+            return lambda row: combine(c(row) for c in conditions)
+        column, op, value = expression.split(".", 2)
+        return self._compare(column, op, value.strip('"'))
+
+    @staticmethod
+    def _compare(column: str, op: str, value: str):
+        ops = {
+            "eq": lambda a: a == value,
+            "gt": lambda a: a > value,
+            "lt": lambda a: a < value,
+        }
+        return lambda row: row.get(column) is not None and ops[op](str(row[column]))
+
+    def _filters(self, params: httpx.QueryParams):
+        conditions = []
+        for key, value in params.multi_items():
+            if key in ("select", "order", "limit", "on_conflict", "columns"):
+                continue
+            if key == "or":
+                conditions.append(self._condition(f"or{value}"))
+            else:
+                op, _, operand = value.partition(".")
+                conditions.append(self._compare(key, op, operand))
+        return lambda row: all(c(row) for c in conditions)
+
+    # ----- Rows -----
+
+    def _insert(self, table: str, rows: List[dict], ignore_duplicates: bool):
+        stored = self.tables[table]
+        ids = {row["id"] for row in stored}
+        inserted = []
+        for row in rows:
+            row = {"id": str(uuid.uuid4()), "created_at": _now(), **row}
+            if table == "conversations":
+                row.setdefault("updated_at", row["created_at"])
+            if row["id"] in ids:
+                if ignore_duplicates:
+                    continue
+                return None
+            ids.add(row["id"])
+            stored.append(row)
+            inserted.append(row)
+        return inserted
+
+    def _update(self, table: str, match, data: dict) -> List[dict]:
+        updated = []
+        for row in self.tables[table]:
+            if match(row):
+                row.update(data)
+                if table == "conversations":
+                    row["updated_at"] = _now()
+                updated.append(row)
+        return updated
+
+    def _select(self, table: str, params: httpx.QueryParams) -> List[dict]:
+        rows = [dict(row) for row in self.tables[table] if self._filters(params)(row)]
+        for order in reversed(params.get("order", "").split(",")):
+            if order:
+                column, _, direction = order.partition(".")
+                rows.sort(key=lambda row: row[column], reverse=direction == "desc")
+        if "limit" in params:
+            rows = rows[: int(params["limit"])]
+        if "messages(count)" in params.get("select", ""):
+            for row in rows:
+                count = sum(
+                    m["conversation_id"] == row["id"] for m in self.tables["messages"]
+                )
+                row["messages"] = [{"count": count}]
+        return rows
+
+    # ----- Transport -----
+
+    def handle(self, request: httpx.Request) -> httpx.Response:
+        path = request.url.path.strip("/")
+        self.requests.append(f"{request.method} {path}")
+        body = json.loads(request.content) if request.content else None
+
+        if path == "rpc/append_messages":
+            if not self.append_rpc:
+                return httpx.Response(
+                    404,
+                    json={
+                        "code": "PGRST202",
+                        "message": "Could not find the function append_messages",
+                    },
+                )
+            batch = body["batch"]
+            self._insert("messages", batch, ignore_duplicates=True)
+            for conv_id in {row["conversation_id"] for row in batch}:
+                self._update("conversations", lambda r: r["id"] == conv_id, {})
+            return httpx.Response(204)
+
+        params = request.url.params
+        if request.method == "GET":
+            rows = self._select(path, params)
+        elif request.method == "POST":
+            prefer = request.headers.get("prefer", "")
+            rows = self._insert(
+                path,
+                body if isinstance(body, list) else [body],
+                "ignore-duplicates" in prefer,
+            )
+            if rows is None:
+                return httpx.Response(
+                    409,
+                    json={
+                        "code": "23505",
+                        "message": "duplicate key value violates unique constraint",
+                    },
+                )
+        elif request.method == "PATCH":
+            rows = self._update(path, self._filters(params), body)
+        else:
+            match = self._filters(params)
+            rows = [row for row in self.tables[path] if match(row)]
+            self.tables[path] = [row for row in self.tables[path] if not match(row)]
+
+        if request.headers.get("accept") == "application/vnd.pgrst.object+json":
+            if len(rows) != 1:
+                return httpx.Response(
+                    406,
+                    json={"code": "PGRST116", "message": f"{len(rows)} rows returned"},
+                )
+            return httpx.Response(200, json=rows[0])
+        return httpx.Response(200, json=rows)
+
+
+@pytest.fixture
+def postgrest(monkeypatch) -> Optional[FakePostgREST]:
+    """Routes the PostgREST client to a stand-in server.
+
+    With POSTGREST_URL set, the tests run against that server (its database
+    needs the schema from supabase/migrations) and None is returned.
+    Otherwise an in-memory FakePostgREST answers the requests.
+    """
+    if os.getenv("POSTGREST_URL"):
+        return None
+
+    server = FakePostgREST()
+    monkeypatch.setenv("POSTGREST_URL", FAKE_URL)
+
+    def create_session(self, base_url, headers, timeout, verify=True, proxy=None):
+        return httpx.AsyncClient(
+            base_url=base_url,
+            headers=headers,
+            transport=httpx.MockTransport(server.handle),
+        )
+
+    monkeypatch.setattr(AsyncPostgrestClient, "create_session", create_session)
+    return server
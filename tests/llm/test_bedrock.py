@@ -0,0 +1,184 @@
+import asyncio
+import time
+
+import pytest
+
+from app.bedrock import ChatCompletions
+
+
+MESSAGES = [{"role": "user", "content": "hello"}]
+
+EVENTS = [
+    {"messageStart": {"role": "assistant"}},
+    {"contentBlockDelta": {"contentBlockIndex": 0, "delta": {"text": "Let me "}}},
+    {"contentBlockDelta": {"contentBlockIndex": 0, "delta": {"text": "check."}}},
+    {
+        "contentBlockStart": {
+            "contentBlockIndex": 1,
+            "start": {"toolUse": {"toolUseId": "tool-1", "name": "web_search"}},
+        }
+    },
+    {
+        "contentBlockDelta": {
+            "contentBlockIndex": 1,
+            "delta": {"toolUse": {"input": '{"query": '}},
+        }
+    },
+    {
+        "contentBlockDelta": {
+            "contentBlockIndex": 1,
+            "delta": {"toolUse": {"input": '"news"}'}},
+        }
+    },
+    {"contentBlockStop": {"contentBlockIndex": 1}},
+    {"messageStop": {"stopReason": "tool_use"}},
+    {
+        "metadata": {
+            "usage": {
+                "inputTokens": 10,
+                "outputTokens": 5,
+                "totalTokens": 15,
+                "cacheReadInputTokens": 4,
+            }
+        }
+    },
+]
+
+
+class BlockingEventStream:
+    """botocore EventStream stand-in whose reads block like network reads."""
+
+    def __init__(self, events, delay: float = 0.0):
+        self.events = events
+        self.delay = delay
+        self.closed = False
+
+    def __iter__(self):
+        for event in self.events:
+            time.sleep(self.delay)
+            yield event
+
+    def close(self):
+        self.closed = True
+
+
+class FakeBedrock:
+    """Blocking boto3 bedrock-runtime client stand-in."""
+
+    def __init__(self, delay: float = 0.0, events=EVENTS):
+        self.delay = delay
+        self.events = events
+        self.streams = []
+
+    def converse(self, **request):
+        time.sleep(self.delay)
+        return {
+            "output": {"message": {"role": "assistant", "content": [{"text": "hi"}]}},
+            "stopReason": "end_turn",
+            "usage": {"inputTokens": 1, "outputTokens": 1, "totalTokens": 2},
+        }
+
+    def converse_stream(self, **request):
+        stream = BlockingEventStream(self.events, self.delay)
+        self.streams.append(stream)
+        return {"stream": stream}
+
+
+async def create(client: FakeBedrock, stream: bool):
+    return await ChatCompletions(client).create(
+        model="m", messages=MESSAGES, max_tokens=10, temperature=0, stream=stream
+    )
+
+
+async def ticks_during(coro) -> int:
+    """Run coro while counting event loop ticks."""
+    ticks = 0
+    done = asyncio.Event()
+
+    async def tick():
+        nonlocal ticks
+        while not done.is_set():
+            ticks += 1
+            await asyncio.sleep(0.005)
+
+    ticker = asyncio.create_task(tick())
+    try:
+        await coro
+    finally:
+        done.set()
+        await ticker
+    return ticks
+
+
+@pytest.mark.asyncio
+async def test_converse_does_not_block_the_loop():
+    """Tests that a blocking converse call runs off the event loop."""
+    client = FakeBedrock(delay=0.1)
+
+    ticks = await ticks_during(create(client, stream=False))
+
+    assert ticks >= 5
+
+
+@pytest.mark.asyncio
+async def test_stream_reads_do_not_block_the_loop():
+    """Tests that each blocking stream read runs off the event loop."""
+    client = FakeBedrock(delay=0.02)
+
+    async def consume():
+        async for _ in await create(client, stream=True):
+            pass
+
+    ticks = await ticks_during(consume())
+
+    assert ticks >= 10
+
+
+@pytest.mark.asyncio
+async def test_stream_events_become_openai_chunks():
+    """Tests the conversion of Bedrock stream events to OpenAI chunks."""
+    chunks = [chunk async for chunk in await create(FakeBedrock(), stream=True)]
+
+    content = "".join(c.choices[0].delta.content or "" for c in chunks if c.choices)
+    tool_deltas = [
+        call
+        for c in chunks
+        if c.choices and c.choices[0].delta.tool_calls
+        for call in c.choices[0].delta.tool_calls
+    ]
+    finish_reasons = [c.choices[0].finish_reason for c in chunks if c.choices]
+
+    assert chunks[0].choices[0].delta.role == "assistant"
+    assert content == "Let me check."
+    assert [d.index for d in tool_deltas] == [0, 0, 0]
+    assert tool_deltas[0].id == "tool-1"
+    assert tool_deltas[0].function.name == "web_search"
+    assert "".join(d.function.arguments for d in tool_deltas) == '{"query": "news"}'
+    assert finish_reasons[-1] == "tool_calls"
+    # The usage chunk comes last and has no choices, like include_usage
+    assert chunks[-1].choices == []
+    assert chunks[-1].usage.prompt_tokens == 10
+    assert chunks[-1].usage.prompt_tokens_details.cached_tokens == 4
+
+
+@pytest.mark.asyncio
+async def test_stopping_early_closes_the_stream():
+    """Tests that the HTTP stream is released when the consumer stops early."""
+    client = FakeBedrock()
+    chunks = (await create(client, stream=True)).__aiter__()
+
+    await chunks.__anext__()
+    await chunks.aclose()
+
+    assert client.streams[0].closed
+
+
+@pytest.mark.asyncio
+async def test_finished_stream_is_not_closed_again():
+    """Tests that a fully read stream is left to botocore."""
+    client = FakeBedrock()
+
+    async for _ in await create(client, stream=True):
+        pass
+
+    assert not client.streams[0].closed
@@ -0,0 +1,30 @@
+import asyncio
+
+from app.http_client import close_http_client, get_http_client
+
+
+async def _client_twice():
+    client = get_http_client()
+    assert get_http_client() is client
+    return client
+
+
+def test_each_event_loop_gets_its_own_client():
+    """Tests that a client is not shared across event loops."""
+    first = asyncio.run(_client_twice())
+    second = asyncio.run(_client_twice())
+
+    assert first is not second
+
+
+def test_close_releases_the_loop_client():
+    """Tests that closing hands out a fresh client afterwards."""
+
+    async def run():
+        client = get_http_client()
+        await close_http_client()
+        assert client.is_closed
+        assert get_http_client() is not client
+        await close_http_client()
+
+    asyncio.run(run())
@@ -0,0 +1,50 @@
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+from tenacity import retry, stop_after_attempt
+
+from app.config import LLMRouterSettings
+from app.llm import LLM
+from app.llm_router import ModelHealth, RoutedLLM
+
+
+@retry(stop=stop_after_attempt(1), reraise=True)
+async def _slow_ask(self, *args, **kwargs) -> str:
+    await asyncio.sleep(self.delay)
+    return self.model
+
+
+def make_router(delays, **settings) -> RoutedLLM:
+    """Creates a router over fake members that answer after `delays`."""
+    settings = LLMRouterSettings(models=list(delays), **settings)
+    router = RoutedLLM.__new__(RoutedLLM)
+    router.__dict__.update(
+        settings=settings,
+        members={
+            name: SimpleNamespace(model=name, delay=delay)
+            for name, delay in delays.items()
+        },
+        health={name: ModelHealth() for name in delays},
+        hedged_requests=0,
+        fallbacks=0,
+    )
+    router.__dict__["primary"] = router.members[next(iter(delays))]
+    return router
+
+
+@pytest.mark.asyncio
+async def test_hedge_loser_records_no_latency(monkeypatch):
+    """Tests that a cancelled hedge loser leaves its latency stats alone."""
+    monkeypatch.setattr(LLM, "ask", _slow_ask)
+    router = make_router(
+        {"slow": 1.0, "fast": 0.01}, hedge_delay=0.05, adaptive_hedge=False
+    )
+
+    assert await router.ask([]) == "fast"
+    # Let the cancelled loser finish unwinding
+    await asyncio.sleep(0.01)
+
+    assert router.hedged_requests == 1
+    assert router.health["fast"].samples == 1
+    assert router.health["slow"].samples == 0
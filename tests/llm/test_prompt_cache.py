@@ -0,0 +1,182 @@
+from types import SimpleNamespace
+
+import pytest
+
+from app.bedrock import ChatCompletions
+from app.llm import LLM
+
+
+def make_llm(model: str = "anthropic/claude-sonnet-4", **settings) -> LLM:
+    llm = object.__new__(LLM)
+    llm.__dict__.update(
+        model=model,
+        api_type="openai",
+        prompt_caching=True,
+        total_cached_input_tokens=0,
+        total_cache_write_tokens=0,
+        cache_hits=0,
+        cache_misses=0,
+    )
+    llm.__dict__.update(settings)
+    return llm
+
+
+def request(*messages: dict) -> dict:
+    return {"model": "m", "messages": list(messages)}
+
+
+SYSTEM = {"role": "system", "content": "You are helpful."}
+USER = {"role": "user", "content": "hello"}
+
+
+def test_claude_marks_last_system_message():
+    """Tests that the cache breakpoint goes on the last system message."""
+    first = {"role": "system", "content": "rules"}
+    params = request(first, SYSTEM, USER)
+    original = list(params["messages"])
+
+    make_llm().apply_prompt_cache(params)
+
+    assert params["messages"][0] is first
+    assert params["messages"][1]["content"] == [
+        {
+            "type": "text",
+            "text": "You are helpful.",
+            "cache_control": {"type": "ephemeral"},
+        }
+    ]
+    assert params["messages"][2] is USER
+    # The caller's messages keep their original content
+    assert original[1] is SYSTEM and SYSTEM["content"] == "You are helpful."
+
+
+def test_breakpoint_goes_on_last_content_block():
+    """Tests that list content gets the breakpoint on its last block."""
+    system = {
+        "role": "system",
+        "content": [{"type": "text", "text": "a"}, {"type": "text", "text": "b"}],
+    }
+    params = request(system, USER)
+
+    make_llm().apply_prompt_cache(params)
+
+    content = params["messages"][0]["content"]
+    assert "cache_control" not in content[0]
+    assert content[1]["cache_control"] == {"type": "ephemeral"}
+    assert "cache_control" not in system["content"][1]
+
+
+@pytest.mark.parametrize(
+    "llm",
+    [
+        make_llm(model="gpt-4o"),
+        make_llm(prompt_caching=False),
+    ],
+    ids=["other-provider", "disabled"],
+)
+def test_request_is_left_untouched(llm):
+    """Tests that only enabled Claude requests are changed."""
+    params = request(SYSTEM, USER)
+
+    llm.apply_prompt_cache(params)
+
+    assert params == request(SYSTEM, USER)
+
+
+def test_bedrock_request_is_flagged():
+    """Tests that Bedrock requests are marked for conversion."""
+    params = make_llm(model="claude", api_type="aws").apply_prompt_cache(
+        request(SYSTEM, USER)
+    )
+
+    assert params["prompt_caching"] is True
+    assert params["messages"] == [SYSTEM, USER]
+
+
+def test_cache_stats_count_hits_and_misses():
+    """Tests that cache reads and writes are recorded from usage blocks."""
+    llm = make_llm()
+    write = SimpleNamespace(
+        prompt_tokens_details=SimpleNamespace(cached_tokens=0),
+        cache_creation_input_tokens=900,
+    )
+    read = SimpleNamespace(
+        prompt_tokens_details=SimpleNamespace(cached_tokens=900),
+        cache_creation_input_tokens=0,
+    )
+
+    llm.update_cache_stats(write)
+    llm.update_cache_stats(read)
+
+    assert (llm.cache_hits, llm.cache_misses) == (1, 1)
+    assert llm.total_cached_input_tokens == 900
+    assert llm.total_cache_write_tokens == 900
+
+
+class FakeBedrock:
+    """Records converse requests and answers with cache usage."""
+
+    def __init__(self):
+        self.requests = []
+
+    def converse(self, **request):
+        self.requests.append(request)
+        return {
+            "output": {"message": {"role": "assistant", "content": [{"text": "hi"}]}},
+            "stopReason": "end_turn",
+            "usage": {
+                "inputTokens": 1000,
+                "outputTokens": 1,
+                "totalTokens": 1001,
+                "cacheReadInputTokens": 900,
+                "cacheWriteInputTokens": 0,
+            },
+        }
+
+
+TOOLS = [
+    {
+        "type": "function",
+        "function": {"name": "terminate", "description": "Stop", "parameters": {}},
+    }
+]
+
+
+@pytest.mark.asyncio
+async def test_bedrock_adds_cache_points():
+    """Tests that Bedrock gets cache points after the system prompt and tools."""
+    client = FakeBedrock()
+
+    response = await ChatCompletions(client).create(
+        model="m",
+        messages=[SYSTEM, USER],
+        max_tokens=10,
+        temperature=0,
+        stream=False,
+        tools=TOOLS,
+        prompt_caching=True,
+    )
+
+    sent = client.requests[0]
+    assert sent["system"][-1] == {"cachePoint": {"type": "default"}}
+    assert sent["toolConfig"]["tools"][-1] == {"cachePoint": {"type": "default"}}
+    assert response.usage.prompt_tokens_details.cached_tokens == 900
+
+
+@pytest.mark.asyncio
+async def test_bedrock_without_prompt_caching():
+    """Tests that Bedrock requests have no cache points by default."""
+    client = FakeBedrock()
+
+    await ChatCompletions(client).create(
+        model="m",
+        messages=[SYSTEM, USER],
+        max_tokens=10,
+        temperature=0,
+        stream=False,
+        tools=TOOLS,
+    )
+
+    sent = client.requests[0]
+    assert sent["system"] == [{"text": "You are helpful."}]
+    assert all("cachePoint" not in tool for tool in sent["toolConfig"]["tools"])
@@ -0,0 +1,174 @@
+from types import SimpleNamespace
+
+import pytest
+
+from app import response_cache
+from app.config import ResponseCacheSettings, config
+from app.llm import LLM, TokenCounter
+from app.response_cache import MemoryResponseCache, SQLiteResponseCache, make_cache_key
+from app.schema import Message
+
+
+class _WordTokenizer:
+    """Tokenizer stand-in that needs no downloaded encodings."""
+
+    def encode(self, text: str):
+        return text.split()
+
+
+class FakeClock:
+    """Replaces time.time() in the cache module."""
+
+    def __init__(self, monkeypatch):
+        self.now = 1000.0
+        monkeypatch.setattr(response_cache.time, "time", lambda: self.now)
+
+
+class FakeCompletions:
+    """Answers every request with the same message and counts the calls."""
+
+    def __init__(self):
+        self.calls = 0
+
+    async def create(self, **params):
+        self.calls += 1
+        return SimpleNamespace(
+            choices=[SimpleNamespace(message=SimpleNamespace(content="answer"))],
+            usage=SimpleNamespace(
+                prompt_tokens=1, completion_tokens=1, prompt_tokens_details=None
+            ),
+        )
+
+
+class FakeScheduler:
+    async def acquire(self, input_tokens: int = 0) -> None:
+        pass
+
+    def record_usage(self, completion_tokens: int) -> None:
+        pass
+
+
+def make_llm(model: str = "gpt-4o", **settings) -> LLM:
+    llm = object.__new__(LLM)
+    llm.__dict__.update(
+        model=model,
+        api_type="openai",
+        base_url="https://api.test/v1",
+        max_tokens=100,
+        temperature=0.0,
+        max_input_tokens=None,
+        prompt_caching=False,
+        total_input_tokens=0,
+        total_completion_tokens=0,
+        token_counter=TokenCounter(_WordTokenizer()),
+        response_cache=MemoryResponseCache(),
+        scheduler=FakeScheduler(),
+        client=SimpleNamespace(chat=SimpleNamespace(completions=FakeCompletions())),
+    )
+    llm.__dict__.update(settings)
+    return llm
+
+
+@pytest.fixture(autouse=True)
+def cache_settings(monkeypatch):
+    """Uses the default cache settings whatever config.toml says."""
+    settings = ResponseCacheSettings(enabled=True)
+    monkeypatch.setattr(config._config, "response_cache_config", settings)
+    return settings
+
+
+PARAMS = {"model": "gpt-4o", "messages": [{"role": "user", "content": "hi"}]}
+
+
+def test_cache_key_ignores_field_order():
+    """Tests that equal requests get the same key whatever their dict order."""
+    reordered = {"messages": PARAMS["messages"], "model": "gpt-4o", "stream": True}
+
+    assert make_cache_key(PARAMS) == make_cache_key(reordered)
+    assert make_cache_key(PARAMS) != make_cache_key({**PARAMS, "temperature": 0.5})
+    assert make_cache_key(PARAMS) != make_cache_key(PARAMS, namespace="other")
+
+
+@pytest.mark.asyncio
+async def test_memory_entries_expire(monkeypatch):
+    """Tests that memory entries are dropped once their TTL has passed."""
+    clock = FakeClock(monkeypatch)
+    cache = MemoryResponseCache(ttl=60)
+    await cache.set("key", {"content": "answer"})
+
+    clock.now += 59
+    assert await cache.get("key") == {"content": "answer"}
+    clock.now += 2
+    assert await cache.get("key") is None
+    assert (cache.hits, cache.misses) == (1, 1)
+
+
+@pytest.mark.asyncio
+async def test_sqlite_entries_expire(monkeypatch, tmp_path):
+    """Tests that SQLite entries persist and honour the TTL."""
+    clock = FakeClock(monkeypatch)
+    path = tmp_path / "responses.sqlite"
+    await SQLiteResponseCache(path, ttl=60).set("key", {"content": "answer"})
+
+    cache = SQLiteResponseCache(path, ttl=60)
+    assert await cache.get("key") == {"content": "answer"}
+    clock.now += 61
+    assert await cache.get("key") is None
+
+
+@pytest.mark.asyncio
+async def test_memory_cache_evicts_least_recently_used():
+    """Tests that the memory cache keeps at most max_entries values."""
+    cache = MemoryResponseCache(max_entries=2)
+    await cache.set("a", {"content": "a"})
+    await cache.set("b", {"content": "b"})
+    await cache.get("a")
+
+    await cache.set("c", {"content": "c"})
+
+    assert await cache.get("b") is None
+    assert await cache.get("a") == {"content": "a"}
+
+
+@pytest.mark.parametrize(
+    "model, params, use_cache",
+    [
+        ("gpt-4o", {**PARAMS, "temperature": 0.7}, True),
+        ("gpt-4o", {**PARAMS, "temperature": 0}, False),
+        # Reasoning models are sent without a temperature
+        ("o1", {**PARAMS, "max_completion_tokens": 100}, True),
+        ("o1", {**PARAMS, "temperature": 0}, True),
+    ],
+    ids=["sampled", "bypassed", "reasoning", "reasoning-temperature-0"],
+)
+def test_nondeterministic_requests_are_not_cached(model, params, use_cache):
+    """Tests that only greedy requests of regular models get a cache key."""
+    assert make_llm(model)._response_cache_key(params, use_cache) is None
+
+
+def test_greedy_request_is_cached():
+    """Tests that temperature 0 requests are cacheable."""
+    assert make_llm()._response_cache_key({**PARAMS, "temperature": 0}, True)
+
+
+def test_nondeterministic_requests_can_be_cached(cache_settings):
+    """Tests that cache_nondeterministic caches sampled requests for replays."""
+    cache_settings.cache_nondeterministic = True
+
+    assert make_llm()._response_cache_key({**PARAMS, "temperature": 0.7}, True)
+    assert make_llm("o1")._response_cache_key(PARAMS, True)
+
+
+@pytest.mark.asyncio
+async def test_ask_serves_repeated_request_from_cache():
+    """Tests that a repeated greedy request does not reach the provider."""
+    llm = make_llm()
+    messages = [Message.user_message("hi")]
+
+    assert await llm.ask(messages, stream=False) == "answer"
+    assert await llm.ask(messages, stream=False) == "answer"
+    assert llm.client.chat.completions.calls == 1
+
+    await llm.ask(messages, stream=False, use_cache=False)
+    await llm.ask(messages, stream=False, temperature=0.7)
+    assert llm.client.chat.completions.calls == 3
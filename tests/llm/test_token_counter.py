@@ -0,0 +1,79 @@
+from app.llm import TokenCounter
+
+
+class _CountingTokenizer:
+    """Word tokenizer that records how often it is called."""
+
+    def __init__(self):
+        self.calls = 0
+
+    def encode(self, text: str):
+        self.calls += 1
+        return text.split()
+
+
+def test_repeated_messages_are_counted_once():
+    """Tests that unchanged messages are served from the cache."""
+    tokenizer = _CountingTokenizer()
+    counter = TokenCounter(tokenizer)
+    messages = [
+        {"role": "system", "content": "be brief"},
+        {"role": "user", "content": "hello there"},
+    ]
+
+    first = counter.count_message_tokens(messages)
+    calls = tokenizer.calls
+    second = counter.count_message_tokens(messages)
+
+    assert first == second
+    assert tokenizer.calls == calls
+    assert (counter.cache_hits, counter.cache_misses) == (2, 2)
+
+
+def test_changed_message_is_counted_again():
+    """Tests that the cache key follows the message content."""
+    counter = TokenCounter(_CountingTokenizer())
+    before = counter.count_message_tokens([{"role": "user", "content": "one"}])
+
+    after = counter.count_message_tokens([{"role": "user", "content": "one two"}])
+
+    assert after == before + 1
+    assert counter.cache_misses == 2
+
+
+def test_least_recently_used_entry_is_evicted():
+    """Tests that the cache keeps at most cache_size entries."""
+    counter = TokenCounter(_CountingTokenizer(), cache_size=2)
+    a, b, c = ({"role": "user", "content": text} for text in "abc")
+
+    counter.count_message_tokens([a, b])
+    counter.count_message_tokens([a])
+    counter.count_message_tokens([c])
+
+    # b was the least recently used entry when c was added
+    counter.count_message_tokens([a])
+    assert (counter.cache_hits, counter.cache_misses) == (2, 3)
+    counter.count_message_tokens([b])
+    assert (counter.cache_hits, counter.cache_misses) == (2, 4)
+
+
+def test_tool_schemas_are_cached():
+    """Tests that tool schema counts are cached like messages."""
+    tokenizer = _CountingTokenizer()
+    counter = TokenCounter(tokenizer)
+    tools = [{"type": "function", "function": {"name": "terminate"}}]
+
+    assert counter.count_tools(tools) == counter.count_tools(tools)
+    assert tokenizer.calls == 1
+
+
+def test_zero_cache_size_disables_caching():
+    """Tests that a zero-sized cache stores nothing."""
+    counter = TokenCounter(_CountingTokenizer(), cache_size=0)
+    messages = [{"role": "user", "content": "hello"}]
+
+    counter.count_message_tokens(messages)
+    counter.count_message_tokens(messages)
+
+    assert counter.cache_hits == 0
+    assert counter.cache_misses == 2
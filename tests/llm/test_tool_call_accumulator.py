@@ -0,0 +1,57 @@
+from types import SimpleNamespace
+
+from app.llm import ToolCallAccumulator
+
+
+def delta(index=None, id=None, name=None, arguments=None):
+    return SimpleNamespace(
+        index=index, id=id, function=SimpleNamespace(name=name, arguments=arguments)
+    )
+
+
+def test_call_is_emitted_when_its_arguments_close():
+    """Tests that a call completes as soon as its arguments parse."""
+    calls = ToolCallAccumulator()
+
+    assert calls.add([delta(0, "call-1", "web_search", '{"query": ')]) == []
+    completed = calls.add([delta(0, arguments='"a}b"}')])
+
+    assert [(c.id, c.function.name) for c in completed] == [("call-1", "web_search")]
+    assert completed[0].function.arguments == '{"query": "a}b"}'
+    assert calls.flush() == []
+
+
+def test_next_call_completes_the_previous_one():
+    """Tests that a new index finishes calls whose JSON never closed."""
+    calls = ToolCallAccumulator()
+    calls.add([delta(0, "call-1", "bash", '{"cmd": "ls"')])
+
+    completed = calls.add([delta(1, "call-2", "terminate", "")])
+
+    assert [c.id for c in completed] == ["call-1"]
+    assert [c.id for c in calls.flush()] == ["call-2"]
+
+
+def test_chunks_with_several_calls():
+    """Tests deltas of several calls in one chunk, with and without index."""
+    calls = ToolCallAccumulator()
+
+    completed = calls.add(
+        [
+            delta(None, "call-1", "terminate", '{"status": "success"}'),
+            delta(None, "call-2", "terminate", '{"status": "failure"}'),
+        ]
+    )
+
+    assert [c.id for c in completed] == ["call-1", "call-2"]
+    assert calls.flush() == []
+
+
+def test_arguments_need_id_and_name():
+    """Tests that a call is held back until its id and name arrived."""
+    calls = ToolCallAccumulator()
+
+    assert calls.add([delta(0, arguments="{}")]) == []
+    completed = calls.add([delta(0, "call-1", "terminate")])
+
+    assert [c.id for c in completed] == ["call-1"]
@@ -1,5 +1,7 @@
 """Tests for the AsyncDockerizedTerminal implementation."""
 
+import time
+
 import docker
 import pytest
 import pytest_asyncio
@@ -81,6 +83,63 @@ class TestAsyncDockerizedTerminal:
         assert "First" in cmd1
         assert "Second" in cmd2
 
+    @pytest.mark.asyncio
+    async def test_exit_code(self, terminal):
+        """Test that the exit status of each command is reported."""
+        assert (await terminal.execute("true")).exit_code == 0
+        assert (
+            await terminal.execute("exit_with() { return $1; }; exit_with 3")
+        ).exit_code == 3
+
+    @pytest.mark.asyncio
+    async def test_output_is_not_filtered(self, terminal):
+        """Test that numeric lines and prompt-like output are kept."""
+        result = await terminal.execute("seq 1 3; printf '$ '; echo done")
+        assert result.stdout == "1\n2\n3\n$ done"
+        assert result.exit_code == 0
+        assert result.duration >= 0
+
+    @pytest.mark.asyncio
+    async def test_streaming_output(self, terminal):
+        """Test that output lines are delivered before the command finishes."""
+        lines = []
+        result = await terminal.execute(
+            "echo first; sleep 1; echo second",
+            on_output=lambda line: lines.append((line, time.monotonic())),
+        )
+        assert [line for line, _ in lines] == ["first", "second"]
+        assert lines[1][1] - lines[0][1] >= 0.9
+        assert result.stdout == "first\nsecond"
+
+    @pytest.mark.asyncio
+    async def test_session_usable_after_timeout(self, docker_container):
+        """Test that a timed out command does not leak into the next one."""
+        terminal = AsyncDockerizedTerminal(docker_container, default_timeout=1)
+        await terminal.init()
+        try:
+            with pytest.raises(TimeoutError):
+                await terminal.run_command("sleep 5; echo late")
+            result = await terminal.execute("echo next", timeout=10)
+            assert result.stdout == "next"
+        finally:
+            await terminal.close()
+
+    @pytest.mark.asyncio
+    async def test_short_command_latency(self, terminal):
+        """Test that output is read as soon as it arrives, without polling."""
+        start = time.perf_counter()
+        for _ in range(10):
+            await terminal.run_command("true")
+        assert (time.perf_counter() - start) / 10 < 0.1
+
+    @pytest.mark.asyncio
+    async def test_large_output(self, terminal):
+        """Test that output spanning many reads is assembled line by line."""
+        result = await terminal.run_command("seq -f 'line %g' 1 5000")
+        lines = result.splitlines()
+        assert len(lines) == 5000
+        assert lines[-1] == "line 5000"
+
     @pytest.mark.asyncio
     async def test_session_cleanup(self, docker_container):
         """Test proper cleanup of resources."""
@@ -1,3 +1,6 @@
+import io
+import tarfile
+
 import pytest
 import pytest_asyncio
 
@@ -86,6 +89,92 @@ async def test_sandbox_file_persistence(sandbox):
         assert content.strip() == expected_content
 
 
+@pytest.mark.asyncio
+async def test_sandbox_batched_file_transfer(sandbox):
+    """Tests writing and reading many files in one transfer each."""
+    files = {f"batch/pkg{i % 3}/module{i}.py": f"VALUE = {i}\n" for i in range(50)}
+    files["/tmp/batch/absolute.txt"] = "absolute path"
+
+    await sandbox.write_files(files)
+    assert await sandbox.read_files(list(files)) == files
+
+    # Parent directories are created by the archive itself
+    result = await sandbox.terminal.run_command("ls /workspace/batch")
+    assert result.split() == ["pkg0", "pkg1", "pkg2"]
+
+
+@pytest.mark.asyncio
+async def test_sandbox_read_files_missing(sandbox):
+    """Tests that missing files are reported by read_files."""
+    await sandbox.write_file("/workspace/present.txt", "here")
+    with pytest.raises(FileNotFoundError, match="absent.txt"):
+        await sandbox.read_files(["/workspace/present.txt", "/workspace/absent.txt"])
+
+
+@pytest.mark.asyncio
+async def test_sandbox_read_files_links(sandbox):
+    """Tests reading a file together with a symlink and a hard link to it."""
+    await sandbox.write_file("/workspace/links/a.txt", "linked")
+    await sandbox.run_command(
+        "cd /workspace/links && ln -sf a.txt s.txt && ln -f a.txt h.txt"
+    )
+
+    paths = [f"/workspace/links/{name}" for name in ("a.txt", "s.txt", "h.txt")]
+    assert await sandbox.read_files(paths) == {path: "linked" for path in paths}
+
+
+def test_read_files_from_tar_resolves_hard_links():
+    """Tests that hard-link members get the content of their target."""
+    buffer = io.BytesIO()
+    with tarfile.open(fileobj=buffer, mode="w") as tar:
+        target = tarfile.TarInfo("workspace/a.txt")
+        target.size = 6
+        tar.addfile(target, io.BytesIO(b"linked"))
+        link = tarfile.TarInfo("workspace/h.txt")
+        link.type = tarfile.LNKTYPE
+        link.linkname = "workspace/a.txt"
+        tar.addfile(link)
+
+    contents = DockerSandbox._read_files_from_tar([buffer.getvalue()], 1024)
+
+    assert contents == {"workspace/a.txt": b"linked", "workspace/h.txt": b"linked"}
+
+
+@pytest.mark.asyncio
+async def test_sandbox_copy_from_streams_to_destination(sandbox, tmp_path):
+    """Tests copying a file and a directory out of the sandbox."""
+    await sandbox.run_command(
+        "mkdir -p /workspace/out/sub && head -c 3000000 /dev/urandom > /workspace/out/sub/blob.bin"
+    )
+    await sandbox.write_file("/workspace/out/notes.txt", "notes")
+
+    await sandbox.copy_from("/workspace/out/sub/blob.bin", str(tmp_path / "blob.bin"))
+    assert (tmp_path / "blob.bin").stat().st_size == 3000000
+
+    await sandbox.copy_from("/workspace/out", str(tmp_path))
+    assert (tmp_path / "out" / "notes.txt").read_text() == "notes"
+    assert (tmp_path / "out" / "sub" / "blob.bin").stat().st_size == 3000000
+
+
+@pytest.mark.asyncio
+async def test_sandbox_transfer_size_limits(sandbox, tmp_path):
+    """Tests that size limits are enforced before data is written."""
+    await sandbox.write_file("/workspace/large.txt", "x" * 2048)
+    read_limit, copy_limit = sandbox.config.max_read_size, sandbox.config.max_copy_size
+    sandbox.config.max_read_size = sandbox.config.max_copy_size = 1024
+    try:
+        with pytest.raises(RuntimeError, match="read limit"):
+            await sandbox.read_file("/workspace/large.txt")
+        with pytest.raises(RuntimeError, match="copy limit"):
+            await sandbox.copy_from("/workspace/large.txt", str(tmp_path / "large.txt"))
+        assert not (tmp_path / "large.txt").exists()
+    finally:
+        sandbox.config.max_read_size, sandbox.config.max_copy_size = (
+            read_limit,
+            copy_limit,
+        )
+
+
 @pytest.mark.asyncio
 async def test_sandbox_python_environment(sandbox):
     """Tests Python environment configuration."""
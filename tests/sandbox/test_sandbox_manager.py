@@ -100,6 +100,27 @@ async def test_sandbox_cleanup(manager):
     assert sandbox_id not in manager._last_used
 
 
+@pytest.mark.asyncio
+async def test_release_sandbox_reuses_container(manager):
+    """Tests that released sandboxes are scrubbed and handed out again."""
+    sandbox_id = await manager.create_sandbox()
+    sandbox = await manager.get_sandbox(sandbox_id)
+    container_id = sandbox.container.id
+    await sandbox.write_file("leftover.txt", "data")
+
+    await manager.release_sandbox(sandbox_id)
+    assert sandbox_id not in manager._sandboxes
+    assert manager.get_stats()["pool"]["idle"] == 1
+
+    reused_id = await manager.create_sandbox()
+    reused = await manager.get_sandbox(reused_id)
+    assert reused.container.id == container_id
+    assert manager.pool.hits == 1
+
+    result = await reused.run_command("ls -A")
+    assert "leftover.txt" not in result
+
+
 @pytest.mark.asyncio
 async def test_idle_sandbox_cleanup(manager):
     """Tests automatic cleanup of idle sandboxes."""
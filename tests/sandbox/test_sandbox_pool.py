@@ -0,0 +1,107 @@
+import asyncio
+from typing import AsyncGenerator
+
+import pytest
+import pytest_asyncio
+
+from app.config import SandboxSettings
+from app.sandbox.core.pool import SandboxPool
+
+
+@pytest.fixture
+def sandbox_config():
+    """Creates a sandbox configuration that keeps up to one idle sandbox."""
+    return SandboxSettings(
+        image="python:3.12-slim",
+        work_dir="/workspace",
+        memory_limit="512m",
+        cpu_limit=0.5,
+        pool_min_idle=0,
+        pool_max_idle=1,
+    )
+
+
+@pytest_asyncio.fixture(scope="function")
+async def pool() -> AsyncGenerator[SandboxPool, None]:
+    """Creates a sandbox pool and destroys its sandboxes afterwards."""
+    pool = SandboxPool()
+    try:
+        yield pool
+    finally:
+        await pool.close()
+
+
+async def wait_for_idle(pool: SandboxPool, count: int, timeout: float = 60) -> None:
+    """Waits until background refills have warmed `count` sandboxes."""
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + timeout
+    while pool.get_stats()["idle"] < count:
+        assert loop.time() < deadline, "Pool was not refilled in time"
+        await asyncio.sleep(0.1)
+
+
+@pytest.mark.asyncio
+async def test_warm_pool_hit(pool, sandbox_config):
+    """Tests that a pre-started sandbox is leased without a cold start."""
+    sandbox_config.pool_min_idle = 1
+    pool.warm(sandbox_config)
+    await wait_for_idle(pool, 1)
+
+    sandbox = await pool.acquire(sandbox_config)
+    try:
+        assert pool.hits == 1
+        assert pool.misses == 0
+        result = await sandbox.run_command("echo 'warm'")
+        assert result.strip() == "warm"
+    finally:
+        await pool.release(sandbox)
+
+
+@pytest.mark.asyncio
+async def test_release_scrubs_sandbox(pool, sandbox_config):
+    """Tests that state from a previous lease does not leak into the next one."""
+    sandbox = await pool.acquire(sandbox_config)
+    await sandbox.write_file("/workspace/secret.txt", "secret")
+    await sandbox.write_file("/tmp/scratch.txt", "scratch")
+    await sandbox.run_command("export LEAKED=1")
+
+    await pool.release(sandbox)
+    assert pool.recycled == 1
+
+    reused = await pool.acquire(sandbox_config)
+    assert reused is sandbox
+    assert pool.hits == 1
+    assert (await reused.run_command("ls -A /workspace /tmp")).split() == [
+        "/tmp:",
+        "/workspace:",
+    ]
+    assert (await reused.run_command("echo ${LEAKED:-unset}")).strip() == "unset"
+    await pool.release(reused)
+
+
+@pytest.mark.asyncio
+async def test_release_over_capacity_destroys(pool, sandbox_config):
+    """Tests that sandboxes beyond `pool_max_idle` are not kept."""
+    first = await pool.acquire(sandbox_config)
+    second = await pool.acquire(sandbox_config)
+
+    await pool.release(first)
+    await pool.release(second)
+
+    assert pool.get_stats()["idle"] == sandbox_config.pool_max_idle
+    assert second.container is None
+
+
+@pytest.mark.asyncio
+async def test_pool_close(pool, sandbox_config):
+    """Tests that closing the pool destroys idle sandboxes."""
+    sandbox_config.pool_min_idle = 1
+    pool.warm(sandbox_config)
+    await wait_for_idle(pool, 1)
+
+    await pool.close()
+    assert pool.get_stats()["idle"] == 0
+
+
+if __name__ == "__main__":
+    pytest.main(["-v", __file__])
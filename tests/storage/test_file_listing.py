@@ -0,0 +1,108 @@
+from typing import AsyncGenerator
+
+import pytest
+import pytest_asyncio
+
+from app.storage import StorageHandler
+
+
+@pytest_asyncio.fixture(scope="function")
+async def storage(tmp_path, monkeypatch) -> AsyncGenerator[StorageHandler, None]:
+    """Creates a local storage handler in a temporary directory."""
+    for name in ("SUPABASE_URL", "SUPABASE_SERVICE_KEY", "SUPABASE_ANON_KEY"):
+        monkeypatch.delenv(name, raising=False)
+    monkeypatch.delenv("STORAGE_CONTENT_ADDRESSED", raising=False)
+    monkeypatch.setenv("STORAGE_PATH", str(tmp_path / "uploads"))
+    handler = StorageHandler()
+    try:
+        yield handler
+    finally:
+        handler.index.close()
+
+
+async def upload(storage: StorageHandler, user_id: str, *names: str) -> list:
+    return [
+        await storage.upload_file(name.encode(), name, user_id, "text/plain")
+        for name in names
+    ]
+
+
+async def all_pages(storage: StorageHandler, user_id: str, **kwargs) -> list:
+    pages, cursor = [], None
+    while True:
+        page = await storage.list_user_files(user_id, limit=2, cursor=cursor, **kwargs)
+        if not page:
+            return pages
+        pages.append([f["name"] for f in page])
+        cursor = storage.file_cursor(page[-1])
+
+
+@pytest.mark.asyncio
+async def test_pages_cover_every_file_once(storage):
+    """Tests that cursor pages list all files newest first without repeats."""
+    await upload(storage, "u1", "a.txt", "b.txt", "c.txt", "d.txt", "e.txt")
+
+    pages = await all_pages(storage, "u1")
+
+    assert pages == [["e.txt", "d.txt"], ["c.txt", "b.txt"], ["a.txt"]]
+
+
+@pytest.mark.asyncio
+async def test_pages_oldest_first(storage):
+    """Tests ascending order with the same cursors."""
+    await upload(storage, "u1", "a.txt", "b.txt", "c.txt")
+
+    pages = await all_pages(storage, "u1", newest_first=False)
+
+    assert pages == [["a.txt", "b.txt"], ["c.txt"]]
+
+
+@pytest.mark.asyncio
+async def test_listing_filters_by_extension_and_user(storage):
+    """Tests that only the user's files with the wanted extensions are listed."""
+    await upload(storage, "u1", "a.txt", "b.pdf", "c.TXT", "d.md")
+    await upload(storage, "u2", "other.txt")
+
+    files = await storage.list_user_files("u1", extensions=[".txt", "md"])
+
+    assert [f["name"] for f in files] == ["d.md", "c.TXT", "a.txt"]
+
+
+@pytest.mark.asyncio
+async def test_deleted_file_is_not_listed(storage):
+    """Tests that deleting a file removes it from the listing."""
+    first, second = await upload(storage, "u1", "a.txt", "b.txt")
+
+    assert await storage.delete_file(first["path"], "u1")
+
+    assert [f["id"] for f in await storage.list_user_files("u1")] == [second["id"]]
+
+
+@pytest.mark.asyncio
+async def test_invalid_cursor_is_rejected(storage):
+    """Tests that a malformed cursor raises ValueError."""
+    with pytest.raises(ValueError):
+        await storage.list_user_files("u1", cursor="not a cursor")
+
+
+def test_existing_files_are_indexed_once(tmp_path, monkeypatch):
+    """Tests the backfill of files stored before the index existed."""
+    monkeypatch.delenv("SUPABASE_URL", raising=False)
+    monkeypatch.setenv("STORAGE_PATH", str(tmp_path / "uploads"))
+    user_dir = tmp_path / "uploads" / "u1" / "20240101"
+    user_dir.mkdir(parents=True)
+    (user_dir / "old.txt").write_text("old")
+    blobs = tmp_path / "uploads" / "blobs" / "ab"
+    blobs.mkdir(parents=True)
+    (blobs / "abcd.txt").write_text("blob")
+
+    StorageHandler().index.close()
+    handler = StorageHandler()
+    try:
+        files = handler.index.list_files("u1")
+        assert [(f["filename"], f["path"]) for f in files] == [
+            ("old.txt", "u1/20240101/old.txt")
+        ]
+        assert not handler.index.has_files("blobs")
+    finally:
+        handler.index.close()
@@ -4,15 +4,25 @@ REST API ve WebSocket endpoint'leri
 """
 
 import asyncio
+import mimetypes
 import os
 import sys
 import uuid
 from datetime import datetime
 from pathlib import Path
-from typing import Dict, List, Optional
-
-from fastapi import Depends, FastAPI, HTTPException, WebSocket, WebSocketDisconnect
-from fastapi.responses import FileResponse, JSONResponse
+from typing import Dict, List, Optional, Tuple
+
+from fastapi import (
+    Depends,
+    FastAPI,
+    Header,
+    HTTPException,
+    Query,
+    Request,
+    WebSocket,
+    WebSocketDisconnect,
+)
+from fastapi.responses import FileResponse, JSONResponse, StreamingResponse
 from fastapi.staticfiles import StaticFiles
 from loguru import logger
 from pydantic import BaseModel, EmailStr
@@ -22,8 +32,14 @@ project_root = Path(__file__).parent.parent
 sys.path.insert(0, str(project_root))
 
 from app.agent.openht import OpenHT
+from app.agent.pool import AgentPool
 from app.config import config
-from web.session import Conversation, Message, session_manager
+from app.event_stream import EventStream, event_stream
+from app.http_client import close_http_client
+from app.rate_limiter import Priority, request_priority, scheduler_stats
+from app.sandbox.client import SANDBOX_POOL
+from app.storage import get_storage
+from web.session import Conversation, Message, encode_cursor, session_manager
 
 # Auth modüllerini import et (opsiyonel - yoksa çalışmaya devam eder)
 try:
@@ -41,6 +57,11 @@ except ImportError:
     AUTH_AVAILABLE = False
     logger.warning("Auth modülü yüklenemedi. Authentication devre dışı.")
 
+    async def require_auth():
+        # Kullanıcı doğrulanamıyorsa korumalı endpoint'ler kapalı
+        raise HTTPException(status_code=401, detail="Giriş yapmanız gerekiyor")
+
+
 # Database modülünü import et (opsiyonel)
 try:
     from app.database import get_db
@@ -56,6 +77,15 @@ app = FastAPI(title="OpenHT Web UI", version="1.0.0")
 # Static dosyaları serve et
 app.mount("/static", StaticFiles(directory="web/static"), name="static")
 
+# Mesaj başına OpenHT.create() yerine yeniden kullanılan hazır agent havuzu
+agent_pool = AgentPool(
+    OpenHT.create,
+    max_size=config.agent_pool.max_size,
+    min_idle=config.agent_pool.min_idle,
+    idle_timeout=config.agent_pool.idle_timeout,
+    max_uses=config.agent_pool.max_uses,
+)
+
 
 @app.on_event("startup")
 async def startup_event():
@@ -70,6 +100,33 @@ async def startup_event():
         except Exception as e:
             logger.error(f"Veritabanı başlatma hatası: {e}")
 
+    # Agent havuzunu ısıt, MCP sunucuları bir kez bağlanır
+    await agent_pool.start()
+
+    # Sandbox havuzunu arka planda ısıt, agent'lar hazır konteyner alır
+    if config.sandbox.use_sandbox:
+        SANDBOX_POOL.warm(config.sandbox)
+
+
+@app.on_event("shutdown")
+async def shutdown_event():
+    """Uygulama kapanırken çalışacak işlemler"""
+    # Havuzdaki agent'ları ve MCP bağlantılarını kapat
+    await agent_pool.close()
+
+    # Havuzdaki hazır sandbox konteynerlerini kaldır
+    await SANDBOX_POOL.close()
+
+    # Paylaşılan HTTP bağlantı havuzunu kapat
+    await close_http_client()
+
+    # Bekleyen konuşma yazımlarını diske yaz
+    session_manager.close()
+
+    # Veritabanı bağlantı havuzunu kapat
+    if DB_AVAILABLE:
+        await get_db().close()
+
 
 # ===================== Pydantic Modeller =====================
 
@@ -284,6 +341,10 @@ AVAILABLE_MODELS = [
 # Varsayılan görsel üretim modeli
 DEFAULT_IMAGE_MODEL = "openai/gpt-image-1"
 
+# Konuşma listesi ve mesaj penceresi için sayfa boyutları
+CONVERSATION_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 200
+
 
 # ===================== REST API Endpoints =====================
 
@@ -300,6 +361,13 @@ async def health_check():
         "version": "1.0.0",
         "database": "connected" if DB_AVAILABLE else "local_mode",
         "auth": "enabled" if AUTH_AVAILABLE else "disabled",
+        # Arka planda yazılan mesajların kuyruk ve hata metrikleri
+        "storage": {
+            "sessions": session_manager.store.stats(),
+            "database": get_db().message_writer.stats() if DB_AVAILABLE else None,
+        },
+        # Model başına LLM istek kuyruğu derinliği ve bekleme süreleri
+        "rate_limits": scheduler_stats(),
     }
 
 
@@ -391,9 +459,19 @@ async def get_models():
 
 
 @app.get("/api/conversations")
-async def list_conversations():
-    """Tüm konuşmaları listele"""
-    conversations = session_manager.list_conversations()
+async def list_conversations(
+    limit: int = Query(CONVERSATION_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = None,
+):
+    """Konuşmaları sayfa sayfa listele (en son güncellenen önce)"""
+    try:
+        conversations = session_manager.list_conversations(limit + 1, cursor)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    # Bir fazlası okunarak sonraki sayfanın varlığı anlaşılır
+    page = conversations[:limit]
+    has_more = len(conversations) > limit
     return {
         "conversations": [
             {
@@ -401,10 +479,11 @@ async def list_conversations():
                 "title": c.title,
                 "updated_at": c.updated_at,
                 "model": c.model,
-                "message_count": len(c.messages),
+                "message_count": c.message_count,
             }
-            for c in conversations
-        ]
+            for c in page
+        ],
+        "next_cursor": encode_cursor(page[-1]) if has_more else None,
     }
 
 
@@ -416,16 +495,30 @@ async def create_conversation(request: NewConversationRequest):
 
 
 @app.get("/api/conversations/{conv_id}")
-async def get_conversation(conv_id: str):
-    """Konuşma detaylarını getir"""
-    conv = session_manager.get_conversation(conv_id)
+async def get_conversation(
+    conv_id: str,
+    since: Optional[int] = Query(None, ge=0),
+    before: Optional[int] = Query(None, ge=0),
+    limit: Optional[int] = Query(None, ge=1, le=MAX_PAGE_SIZE),
+):
+    """Konuşma detaylarını getir.
+
+    Parametre verilmezse tüm mesajlar döner. `limit` ile son mesajlar,
+    `before` ile daha eskileri, `since` ile yeni gelenler alınır.
+    """
+    conv = await session_manager.get_conversation(conv_id, load_messages=False)
     if not conv:
         raise HTTPException(status_code=404, detail="Konuşma bulunamadı")
 
+    start, messages = await session_manager.get_messages(conv_id, since, before, limit)
     return {
         "id": conv.id,
         "title": conv.title,
-        "messages": [m.model_dump() for m in conv.messages],
+        "messages": [m.model_dump() for m in messages],
+        "message_count": conv.message_count,
+        "start": start,
+        # Daha eski mesajlar için `before` olarak gönderilecek sıra
+        "prev_cursor": start if start > 0 else None,
         "model": conv.model,
         "settings": conv.settings,
         "created_at": conv.created_at,
@@ -450,6 +543,94 @@ async def update_settings(conv_id: str, settings: SettingsUpdate):
     raise HTTPException(status_code=404, detail="Konuşma bulunamadı")
 
 
+# ===================== Dosya İndirme =====================
+
+
+def parse_range(header: Optional[str], size: int) -> Optional[Tuple[int, int]]:
+    """Tek aralıklı `Range: bytes=...` başlığını (başlangıç, bitiş) olarak çözümle.
+
+    Başlık yoksa veya çözümlenemezse None döner (tüm dosya gönderilir),
+    karşılanamayan aralıklar için ValueError fırlatılır.
+    """
+    if not header or not header.startswith("bytes=") or "," in header:
+        return None
+    start, _, end = header[len("bytes=") :].strip().partition("-")
+    try:
+        if not start:
+            # Son N bayt
+            length = int(end)
+            if length <= 0:
+                raise ValueError("Geçersiz aralık")
+            return max(0, size - length), size - 1
+        start = int(start)
+        end = int(end) if end else size - 1
+    except (TypeError, ValueError):
+        return None
+    if start >= size or end < start:
+        raise ValueError("Geçersiz aralık")
+    return start, min(end, size - 1)
+
+
+@app.post("/api/files")
+async def upload_file(
+    request: Request,
+    filename: str = Query(..., min_length=1),
+    user=Depends(require_auth),
+):
+    """Dosyayı istek gövdesinden parça parça yükle, gövde bellekte tutulmaz"""
+    storage = get_storage()
+    content_type = request.headers.get("content-type")
+    try:
+        # Boyut sınırı akış sırasında denetlenir
+        return await storage.upload_stream(
+            request.stream(), filename, user.user_id, content_type
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
+@app.get("/api/files/{file_path:path}")
+async def download_file(
+    file_path: str,
+    range_header: Optional[str] = Header(None, alias="Range"),
+    user=Depends(require_auth),
+):
+    """Kullanıcının kendi dosyasını parça parça indir (HTTP Range destekli)"""
+    storage = get_storage()
+    # Başka kullanıcıların dosyaları ve iç dosyalar var olmayan dosya gibi görünür
+    if not storage.can_read(file_path, user.user_id):
+        raise HTTPException(status_code=404, detail="Dosya bulunamadı")
+    size = await storage.get_file_size(file_path)
+    if size is None:
+        raise HTTPException(status_code=404, detail="Dosya bulunamadı")
+
+    headers = {"Accept-Ranges": "bytes"}
+    try:
+        byte_range = parse_range(range_header, size)
+    except ValueError:
+        raise HTTPException(
+            status_code=416,
+            detail="İstenen aralık karşılanamıyor",
+            headers={"Content-Range": f"bytes */{size}"},
+        )
+
+    status_code = 200
+    start, end = 0, size - 1
+    if byte_range:
+        start, end = byte_range
+        status_code = 206
+        headers["Content-Range"] = f"bytes {start}-{end}/{size}"
+    headers["Content-Length"] = str(end - start + 1)
+
+    media_type = mimetypes.guess_type(file_path)[0] or "application/octet-stream"
+    return StreamingResponse(
+        storage.stream_file(file_path, start, end),
+        status_code=status_code,
+        media_type=media_type,
+        headers=headers,
+    )
+
+
 # ===================== WebSocket Chat =====================
 
 
@@ -494,7 +675,7 @@ async def websocket_chat(websocket: WebSocket, client_id: str):
                 continue
 
             # Konuşmayı kontrol et
-            conv = session_manager.get_conversation(conv_id)
+            conv = await session_manager.get_conversation(conv_id)
             if not conv:
                 await manager.send_message(
                     client_id, {"type": "error", "message": "Konuşma bulunamadı"}
@@ -510,23 +691,38 @@ async def websocket_chat(websocket: WebSocket, client_id: str):
             )
 
             try:
-                # OpenHT agent'ı oluştur ve çalıştır
-                agent = await OpenHT.create()
-
-                # Geçmiş mesajları prompt'a ekle
-                history = "\n".join(
-                    [
-                        f"{'Kullanıcı' if m.role == 'user' else 'Asistan'}: {m.content}"
-                        for m in conv.messages[:-1]  # Son mesaj hariç (yeni eklenen)
-                    ]
-                )
-
-                full_prompt = message
-                if history:
-                    full_prompt = f"Önceki konuşma:\n{history}\n\nKullanıcı: {message}"
-
-                # Agent'ı çalıştır
-                response = await agent.run(full_prompt)
+                # Konuşmanın yapılandırılmış hafızası, yalnızca yeni tur eklenir
+                history = await session_manager.load_memory(conv_id)
+
+                # Agent olaylarını (token, araç, adım) oluştukça istemciye aktar
+                stream = EventStream()
+
+                async def forward_events():
+                    try:
+                        async for event in stream:
+                            await manager.send_message(
+                                client_id,
+                                {**event.to_dict(), "conversation_id": conv_id},
+                            )
+                    finally:
+                        # İstemci koptuysa agent'ın beklemesini engelle
+                        stream.close()
+
+                forwarder = asyncio.create_task(forward_events())
+
+                # Havuzdan hazır bir agent al ve çalıştır (etkileşimli istekler
+                # kuyrukta önceliklidir)
+                try:
+                    async with agent_pool.agent() as agent:
+                        agent.memory.add_messages(history)
+                        with request_priority(Priority.INTERACTIVE), event_stream(
+                            stream
+                        ):
+                            response = await agent.run(message)
+                        session_manager.save_memory(conv_id, agent.memory.messages)
+                finally:
+                    stream.close()
+                    await asyncio.gather(forwarder, return_exceptions=True)
 
                 # Yanıtı kaydet
                 if response:
@@ -542,9 +738,6 @@ async def websocket_chat(websocket: WebSocket, client_id: str):
                         },
                     )
 
-                # Agent'ı temizle
-                await agent.cleanup()
-
             except Exception as e:
                 await manager.send_message(
                     client_id, {"type": "error", "message": f"Hata: {str(e)}"}
@@ -565,7 +758,7 @@ async def websocket_chat(websocket: WebSocket, client_id: str):
 @app.post("/api/chat")
 async def simple_chat(request: ChatRequest):
     """Basit chat endpoint (WebSocket kullanmadan)"""
-    conv = session_manager.get_conversation(request.conversation_id)
+    conv = await session_manager.get_conversation(request.conversation_id)
     if not conv:
         raise HTTPException(status_code=404, detail="Konuşma bulunamadı")
 
@@ -573,11 +766,14 @@ async def simple_chat(request: ChatRequest):
     session_manager.add_message(request.conversation_id, "user", request.message)
 
     try:
-        # OpenHT agent'ı oluştur ve çalıştır
-        agent = await OpenHT.create()
-
-        # Agent'ı çalıştır
-        response = await agent.run(request.message)
+        # Havuzdan hazır bir OpenHT agent'ı al ve çalıştır
+        async with agent_pool.agent() as agent:
+            agent.memory.add_messages(
+                await session_manager.load_memory(request.conversation_id)
+            )
+            with request_priority(Priority.INTERACTIVE):
+                response = await agent.run(request.message)
+            session_manager.save_memory(request.conversation_id, agent.memory.messages)
 
         # Yanıtı kaydet
         if response:
@@ -585,9 +781,6 @@ async def simple_chat(request: ChatRequest):
                 request.conversation_id, "assistant", str(response)
             )
 
-        # Agent'ı temizle
-        await agent.cleanup()
-
         return {
             "response": str(response) if response else "",
             "conversation_id": request.conversation_id,
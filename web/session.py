@@ -3,14 +3,21 @@ OpenHT Web UI - Session Manager
 Konuşma ve mesaj yönetimi
 """
 
-import json
+import asyncio
+import base64
+import bisect
 import uuid
 from datetime import datetime
 from pathlib import Path
-from typing import Dict, List, Optional
+from typing import Dict, List, Optional, Set, Tuple
 
+from loguru import logger
 from pydantic import BaseModel, Field
 
+from app.config import config
+from app.schema import Message as AgentMessage
+from web.session_store import SessionStore
+
 
 class Message(BaseModel):
     """Tek bir mesaj"""
@@ -27,6 +34,7 @@ class Conversation(BaseModel):
     id: str = Field(default_factory=lambda: str(uuid.uuid4()))
     title: str = "Yeni Sohbet"
     messages: List[Message] = Field(default_factory=list)
+    message_count: int = 0
     created_at: str = Field(default_factory=lambda: datetime.now().isoformat())
     updated_at: str = Field(default_factory=lambda: datetime.now().isoformat())
     model: str = "anthropic/claude-sonnet-4"
@@ -39,64 +47,163 @@ class Conversation(BaseModel):
     )
 
 
+def encode_cursor(conv: Conversation) -> str:
+    """Sayfalama için konuşmanın sıralama anahtarından opak imleç üret"""
+    key = f"{conv.updated_at}|{conv.id}".encode()
+    return base64.urlsafe_b64encode(key).decode()
+
+
+def decode_cursor(cursor: str) -> Tuple[str, str]:
+    """İmleci (updated_at, id) anahtarına çevir"""
+    try:
+        updated_at, conv_id = base64.urlsafe_b64decode(cursor).decode().split("|", 1)
+    except Exception:
+        raise ValueError("Geçersiz sayfalama imleci")
+    return updated_at, conv_id
+
+
 class SessionManager:
-    """Konuşma oturumlarını yönetir"""
+    """Konuşma oturumlarını yönetir.
 
-    def __init__(self, storage_path: str = "web/conversations.json"):
+    Açılışta yalnızca konuşma bilgileri yüklenir, mesajlar konuşma ilk
+    istendiğinde okunur. Değişiklikler depoya eklenerek toplu halde yazılır.
+    """
+
+    def __init__(
+        self,
+        storage_path: str = "web/conversations.db",
+        flush_interval: float = 0.5,
+        batch_size: int = 100,
+        max_retries: int = 3,
+    ):
         self.storage_path = Path(storage_path)
+        self.store = SessionStore(storage_path, flush_interval, batch_size, max_retries)
         self.conversations: Dict[str, Conversation] = {}
+        # Mesajları yüklenmiş konuşmalar
+        self._loaded: Set[str] = set()
+        # Konuşma başına depodaki agent hafızası; yalnızca değişen kısım yazılır
+        self._memories: Dict[str, List[Dict]] = {}
+        # (updated_at, id) anahtarlarına göre artan sırada tutulan indeks
+        self._index: List[Tuple[str, str]] = []
         self._load()
 
     def _load(self):
-        """Konuşmaları dosyadan yükle"""
-        if self.storage_path.exists():
-            try:
-                data = json.loads(self.storage_path.read_text())
-                for conv_id, conv_data in data.items():
-                    self.conversations[conv_id] = Conversation(**conv_data)
-            except Exception:
-                self.conversations = {}
-
-    def _save(self):
-        """Konuşmaları dosyaya kaydet"""
-        self.storage_path.parent.mkdir(parents=True, exist_ok=True)
-        data = {
-            conv_id: conv.model_dump() for conv_id, conv in self.conversations.items()
-        }
-        self.storage_path.write_text(json.dumps(data, ensure_ascii=False, indent=2))
+        """Konuşma bilgilerini depodan yükle (mesajlar hariç)"""
+        for conv_data in self.store.load_conversations():
+            conv = Conversation(**conv_data)
+            self.conversations[conv.id] = conv
+        self._index = sorted((c.updated_at, c.id) for c in self.conversations.values())
+
+    def _unindex(self, conv: Conversation) -> None:
+        position = bisect.bisect_left(self._index, (conv.updated_at, conv.id))
+        if position < len(self._index) and self._index[position][1] == conv.id:
+            del self._index[position]
+
+    def _touch(self, conv: Conversation) -> None:
+        """Güncellenme zamanını yenile ve indeksteki yerini taşı"""
+        self._unindex(conv)
+        conv.updated_at = datetime.now().isoformat()
+        bisect.insort(self._index, (conv.updated_at, conv.id))
 
     def create_conversation(self, title: str = "Yeni Sohbet") -> Conversation:
         """Yeni konuşma oluştur"""
         conv = Conversation(title=title)
         self.conversations[conv.id] = conv
-        self._save()
+        self._loaded.add(conv.id)
+        bisect.insort(self._index, (conv.updated_at, conv.id))
+        self.store.save_conversation(conv.model_dump(exclude={"messages"}))
+        return conv
+
+    async def get_conversation(
+        self, conv_id: str, load_messages: bool = True
+    ) -> Optional[Conversation]:
+        """Konuşmayı getir (mesajlar ilk erişimde yüklenir).
+
+        Depo okumaları olay döngüsünü bloklamamak için ayrı thread'de yapılır.
+        """
+        conv = self.conversations.get(conv_id)
+        if not conv or not load_messages:
+            return conv
+        messages: List[Message] = []
+        # Okuma sürerken eklenen mesajlar da alınana kadar devam et
+        while conv_id not in self._loaded and len(messages) < conv.message_count:
+            rows = await asyncio.to_thread(
+                self.store.load_messages, conv_id, offset=len(messages)
+            )
+            if not rows:
+                break
+            messages.extend(Message(**m) for m in rows)
+        if conv_id not in self._loaded:
+            conv.messages = messages
+            conv.message_count = len(messages)
+            self._loaded.add(conv_id)
         return conv
 
-    def get_conversation(self, conv_id: str) -> Optional[Conversation]:
-        """Konuşmayı getir"""
-        return self.conversations.get(conv_id)
+    def list_conversations(
+        self, limit: Optional[int] = None, cursor: Optional[str] = None
+    ) -> List[Conversation]:
+        """Konuşmaları en son güncellenen önce listele.
+
+        `cursor` verilirse yalnızca o imleçten daha eski konuşmalar döner.
+        """
+        end = len(self._index)
+        if cursor:
+            end = bisect.bisect_left(self._index, decode_cursor(cursor))
+        start = 0 if limit is None else max(0, end - limit)
+        page = self._index[start:end]
+        return [self.conversations[conv_id] for _, conv_id in reversed(page)]
 
-    def list_conversations(self) -> List[Conversation]:
-        """Tüm konuşmaları listele (en son güncellenen önce)"""
-        return sorted(
-            self.conversations.values(), key=lambda c: c.updated_at, reverse=True
+    async def get_messages(
+        self,
+        conv_id: str,
+        since: Optional[int] = None,
+        before: Optional[int] = None,
+        limit: Optional[int] = None,
+    ) -> Optional[Tuple[int, List[Message]]]:
+        """Konuşmanın bir mesaj penceresini ve ilk mesajın sırasını döndür.
+
+        `since` o sıradan sonraki mesajları, `before` o sıradan önceki son
+        `limit` mesajı döndürür; ikisi de yoksa son `limit` mesaj döner.
+        Mesajları yüklenmemiş konuşmalarda yalnızca pencere okunur.
+        """
+        conv = self.conversations.get(conv_id)
+        if not conv:
+            return None
+
+        total = conv.message_count
+        if since is not None:
+            start = min(max(0, since), total)
+            end = total if limit is None else min(total, start + limit)
+        else:
+            end = total if before is None else min(max(0, before), total)
+            start = 0 if limit is None else max(0, end - limit)
+
+        if conv_id in self._loaded:
+            return start, conv.messages[start:end]
+        rows = await asyncio.to_thread(
+            self.store.load_messages, conv_id, offset=start, limit=end - start
         )
+        return start, [Message(**m) for m in rows]
 
     def add_message(self, conv_id: str, role: str, content: str) -> Optional[Message]:
-        """Konuşmaya mesaj ekle"""
+        """Konuşmaya mesaj ekle (mesajları yüklenmemişse yalnızca depoya yazılır)"""
         conv = self.conversations.get(conv_id)
         if not conv:
             return None
 
         message = Message(role=role, content=content)
-        conv.messages.append(message)
-        conv.updated_at = datetime.now().isoformat()
+        if conv_id in self._loaded:
+            conv.messages.append(message)
+        conv.message_count += 1
+        self._touch(conv)
 
         # İlk kullanıcı mesajından başlık oluştur
-        if len(conv.messages) == 1 and role == "user":
+        if conv.message_count == 1 and role == "user":
             conv.title = content[:50] + ("..." if len(content) > 50 else "")
 
-        self._save()
+        self.store.append_message(
+            conv.model_dump(exclude={"messages"}), message.model_dump()
+        )
         return message
 
     def update_settings(self, conv_id: str, settings: Dict) -> bool:
@@ -108,17 +215,88 @@ class SessionManager:
         conv.settings.update(settings)
         if "model" in settings:
             conv.model = settings["model"]
-        self._save()
+        self.store.save_conversation(conv.model_dump(exclude={"messages"}))
         return True
 
     def delete_conversation(self, conv_id: str) -> bool:
         """Konuşmayı sil"""
         if conv_id in self.conversations:
-            del self.conversations[conv_id]
-            self._save()
+            self._unindex(self.conversations.pop(conv_id))
+            self._loaded.discard(conv_id)
+            self._memories.pop(conv_id, None)
+            self.store.delete_conversation(conv_id)
             return True
         return False
 
+    def flush(self) -> None:
+        """Bekleyen yazımları diske yaz"""
+        self.store.flush()
+
+    def close(self) -> None:
+        """Bekleyen yazımları diske yaz ve depoyu kapat"""
+        self.store.close()
+
+    async def load_memory(self, conv_id: str) -> List[AgentMessage]:
+        """Konuşmanın agent hafızasını yükle.
+
+        Hafızası kaydedilmemiş eski konuşmalar için metin geçmişinden
+        (son kullanıcı mesajı hariç) yapılandırılmış mesajlar üretilir.
+        """
+        conv = await self.get_conversation(conv_id)
+        if not conv:
+            return []
+
+        try:
+            data = await asyncio.to_thread(self.store.load_memory, conv_id)
+            messages = [AgentMessage(**message) for message in data]
+        except Exception as e:
+            # Bozuk hafıza bir sonraki kayıtta baştan yazılır
+            logger.error(f"Agent hafızası okunamadı ({conv_id}): {e}")
+            data, messages = [], []
+        self._memories[conv_id] = data
+        if messages:
+            return messages
+
+        history = conv.messages[:-1] if conv.messages else []
+        return [
+            (
+                AgentMessage.user_message(m.content)
+                if m.role == "user"
+                else AgentMessage.assistant_message(m.content)
+            )
+            for m in history
+        ]
+
+    def save_memory(self, conv_id: str, messages: List[AgentMessage]) -> None:
+        """Konuşmanın agent hafızasını kaydet (eski ekran görüntüleri hariç).
+
+        Depodaki hafızayla ortak baştaki mesajlar atlanır; normal bir turda
+        yalnızca yeni tur eklenir, sıkıştırılan mesajlar yeniden yazılır.
+        """
+        if conv_id not in self.conversations:
+            return
+        data = []
+        for message in messages:
+            message_dict = message.to_dict()
+            message_dict.pop("base64_image", None)
+            data.append(message_dict)
+
+        stored = self._memories.get(conv_id, [])
+        start = 0
+        for old, new in zip(stored, data):
+            if old != new:
+                break
+            start += 1
+        if start == len(stored) == len(data):
+            return
+        self.store.save_memory(conv_id, start, data[start:])
+        self._memories[conv_id] = data
+
 
 # Singleton instance
-session_manager = SessionManager()
+session_manager = SessionManager(
+    config.session_store.path,
+    flush_interval=config.session_store.flush_interval,
+    batch_size=config.session_store.batch_size,
+    max_retries=config.session_store.max_retries,
+)
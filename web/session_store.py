@@ -0,0 +1,369 @@
+"""
+OpenHT Web UI - Konuşma Deposu
+SQLite (WAL modu) üzerinde, mesaj başına satır ekleyen toplu yazımlı depo
+"""
+
+import atexit
+import json
+import sqlite3
+import threading
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+from loguru import logger
+
+
+SCHEMA_VERSION = 1
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS conversations (
+    id TEXT PRIMARY KEY,
+    title TEXT NOT NULL,
+    created_at TEXT NOT NULL,
+    updated_at TEXT NOT NULL,
+    model TEXT NOT NULL,
+    settings TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS messages (
+    seq INTEGER PRIMARY KEY AUTOINCREMENT,
+    id TEXT NOT NULL,
+    conversation_id TEXT NOT NULL,
+    role TEXT NOT NULL,
+    content TEXT NOT NULL,
+    timestamp TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_messages_conversation
+    ON messages (conversation_id, seq);
+CREATE TABLE IF NOT EXISTS memories (
+    conversation_id TEXT NOT NULL,
+    position INTEGER NOT NULL,
+    data TEXT NOT NULL,
+    PRIMARY KEY (conversation_id, position)
+);
+"""
+
+_UPSERT_CONVERSATION = """
+INSERT INTO conversations (id, title, created_at, updated_at, model, settings)
+VALUES (?, ?, ?, ?, ?, ?)
+ON CONFLICT(id) DO UPDATE SET
+    title = excluded.title,
+    updated_at = excluded.updated_at,
+    model = excluded.model,
+    settings = excluded.settings
+"""
+
+_INSERT_MESSAGE = """
+INSERT INTO messages (id, conversation_id, role, content, timestamp)
+VALUES (?, ?, ?, ?, ?)
+"""
+
+_INSERT_MEMORY = """
+INSERT INTO memories (conversation_id, position, data) VALUES (?, ?, ?)
+"""
+
+_TRUNCATE_MEMORY = "DELETE FROM memories WHERE conversation_id = ? AND position >= ?"
+
+
+class SessionStore:
+    """Konuşmaları SQLite'ta saklar.
+
+    Yazımlar kuyruğa alınır ve arka plan thread'inde `flush_interval`
+    saniyede bir (ya da `batch_size` bekleyen yazıma ulaşınca) tek bir
+    transaction ile uygulanır. WAL modu sayesinde çökme durumunda veritabanı
+    tutarlı kalır; en fazla son `flush_interval` içindeki yazımlar kaybolur.
+    Üst üste `max_retries` kez uygulanamayan yazımlar tek tek denenir,
+    yine de yazılamayanlar atılır ve `dropped` sayacına eklenir.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        flush_interval: float = 0.5,
+        batch_size: int = 100,
+        max_retries: int = 3,
+    ):
+        self.path = Path(path)
+        self.flush_interval = flush_interval
+        self.batch_size = max(1, batch_size)
+        self.max_retries = max(0, max_retries)
+
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(str(self.path), check_same_thread=False)
+        self._conn.row_factory = sqlite3.Row
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._db_lock = threading.Lock()
+
+        self._pending: List[Tuple[str, Tuple[Any, ...]]] = []
+        self._pending_lock = threading.Condition()
+        self._closed = False
+        self._writer: Optional[threading.Thread] = None
+
+        self.flushes = 0
+        self.written = 0
+        self.failed_flushes = 0
+        self.dropped = 0
+        self._retries = 0
+        self.last_error: Optional[str] = None
+
+        self._migrate()
+        if self.flush_interval > 0:
+            self._writer = threading.Thread(
+                target=self._write_loop, name="session-store-writer", daemon=True
+            )
+            self._writer.start()
+        atexit.register(self.close)
+
+    def _migrate(self) -> None:
+        """Şemayı oluştur; ilk açılışta eski JSON dosyasını içeri aktar"""
+        with self._db_lock, self._conn:
+            version = self._conn.execute("PRAGMA user_version").fetchone()[0]
+            if version >= SCHEMA_VERSION:
+                return
+            self._conn.executescript(SCHEMA)
+            self._import_json(self.path.with_suffix(".json"))
+            self._conn.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+
+    def _import_json(self, json_path: Path) -> None:
+        if not json_path.exists():
+            return
+        try:
+            data = json.loads(json_path.read_text())
+        except Exception as e:
+            logger.warning(f"Eski konuşma dosyası okunamadı ({json_path}): {e}")
+            return
+        for conv in data.values():
+            self._conn.execute(_UPSERT_CONVERSATION, self._conversation_row(conv))
+            self._conn.executemany(
+                _INSERT_MESSAGE,
+                [self._message_row(conv["id"], m) for m in conv.get("messages", [])],
+            )
+        logger.info(f"{len(data)} konuşma {json_path} dosyasından aktarıldı")
+
+    @staticmethod
+    def _conversation_row(conv: Dict) -> Tuple[Any, ...]:
+        return (
+            conv["id"],
+            conv["title"],
+            conv["created_at"],
+            conv["updated_at"],
+            conv["model"],
+            json.dumps(conv.get("settings", {}), ensure_ascii=False),
+        )
+
+    @staticmethod
+    def _message_row(conv_id: str, message: Dict) -> Tuple[Any, ...]:
+        return (
+            message["id"],
+            conv_id,
+            message["role"],
+            message["content"],
+            message["timestamp"],
+        )
+
+    @staticmethod
+    def _memory_rows(
+        conv_id: str, start: int, messages: List[Dict]
+    ) -> List[Tuple[Any, ...]]:
+        return [
+            (conv_id, start + offset, json.dumps(message, ensure_ascii=False))
+            for offset, message in enumerate(messages)
+        ]
+
+    # ----- Yazma -----
+
+    def _enqueue(self, *ops: Tuple[str, Tuple[Any, ...]]) -> None:
+        with self._pending_lock:
+            self._pending.extend(ops)
+            if len(self._pending) >= self.batch_size:
+                self._pending_lock.notify()
+        if self._writer is None:
+            self.flush()
+
+    def save_conversation(self, conv: Dict) -> None:
+        """Konuşma bilgilerini (mesajlar hariç) kaydet"""
+        self._enqueue((_UPSERT_CONVERSATION, self._conversation_row(conv)))
+
+    def append_message(self, conv: Dict, message: Dict) -> None:
+        """Mesajı ekle ve konuşmanın güncellenme zamanını kaydet"""
+        self._enqueue(
+            (_INSERT_MESSAGE, self._message_row(conv["id"], message)),
+            (_UPSERT_CONVERSATION, self._conversation_row(conv)),
+        )
+
+    def save_memory(self, conv_id: str, start: int, messages: List[Dict]) -> None:
+        """Agent hafızasını `start` konumundan itibaren verilen mesajlarla değiştir.
+
+        Önceki konumlar olduğu gibi kalır; her turda yalnızca yeni mesajlar
+        yazılır.
+        """
+        self._enqueue(
+            (_TRUNCATE_MEMORY, (conv_id, start)),
+            *(
+                (_INSERT_MEMORY, row)
+                for row in self._memory_rows(conv_id, start, messages)
+            ),
+        )
+
+    def delete_conversation(self, conv_id: str) -> None:
+        self._enqueue(
+            ("DELETE FROM memories WHERE conversation_id = ?", (conv_id,)),
+            ("DELETE FROM messages WHERE conversation_id = ?", (conv_id,)),
+            ("DELETE FROM conversations WHERE id = ?", (conv_id,)),
+        )
+
+    def flush(self) -> None:
+        """Bekleyen yazımları tek transaction ile uygula"""
+        with self._db_lock:
+            with self._pending_lock:
+                ops, self._pending = self._pending, []
+            if not ops:
+                return
+            try:
+                with self._conn:
+                    for sql, rows in self._coalesce(ops):
+                        self._conn.executemany(sql, rows)
+                self.flushes += 1
+                self.written += len(ops)
+                self._retries = 0
+            except Exception as e:
+                self.failed_flushes += 1
+                self.last_error = str(e)
+                logger.error(f"Konuşmalar kaydedilemedi: {e}")
+                if self._retries < self.max_retries:
+                    # Yazımlar kaybolmasın, bir sonraki denemede tekrar uygulanır
+                    self._retries += 1
+                    with self._pending_lock:
+                        self._pending[:0] = ops
+                else:
+                    self._retries = 0
+                    self._apply_each(ops)
+
+    def _apply_each(self, ops: List[Tuple[str, Tuple[Any, ...]]]) -> None:
+        """Yazımları tek tek uygula, uygulanamayanları at"""
+        dropped = 0
+        for sql, params in ops:
+            try:
+                with self._conn:
+                    self._conn.execute(sql, params)
+                self.written += 1
+            except Exception as e:
+                dropped += 1
+                self.last_error = str(e)
+        if dropped:
+            self.dropped += dropped
+            logger.error(
+                f"{self.max_retries} denemeden sonra {dropped} yazım atıldı: "
+                f"{self.last_error}"
+            )
+
+    @staticmethod
+    def _coalesce(
+        ops: List[Tuple[str, Tuple[Any, ...]]]
+    ) -> List[Tuple[str, List[Tuple[Any, ...]]]]:
+        """Ardışık aynı sorguları toplu yazıma çevir.
+
+        Bir konuşmanın bilgileri yalnızca son haliyle yazılır; mesajlar
+        sırayla tek `executemany` ile eklenir.
+        """
+        last_upsert = {
+            params[0]: i
+            for i, (sql, params) in enumerate(ops)
+            if sql is _UPSERT_CONVERSATION
+        }
+        groups: List[Tuple[str, List[Tuple[Any, ...]]]] = []
+        for i, (sql, params) in enumerate(ops):
+            if sql is _UPSERT_CONVERSATION and last_upsert[params[0]] != i:
+                continue
+            if groups and groups[-1][0] == sql:
+                groups[-1][1].append(params)
+            else:
+                groups.append((sql, [params]))
+        return groups
+
+    def _write_loop(self) -> None:
+        while True:
+            with self._pending_lock:
+                if not self._closed and len(self._pending) < self.batch_size:
+                    self._pending_lock.wait(self.flush_interval)
+                closed = self._closed
+            self.flush()
+            if closed:
+                return
+
+    def close(self) -> None:
+        """Bekleyen yazımları diske yaz ve bağlantıyı kapat"""
+        if self._closed:
+            return
+        with self._pending_lock:
+            self._closed = True
+            self._pending_lock.notify()
+        if self._writer is not None:
+            self._writer.join()
+        self.flush()
+        with self._db_lock:
+            self._conn.close()
+
+    # ----- Okuma -----
+
+    def load_conversations(self) -> List[Dict]:
+        """Konuşma bilgilerini mesaj sayılarıyla birlikte yükle (mesajlar hariç)"""
+        self.flush()
+        with self._db_lock:
+            rows = self._conn.execute(
+                """
+                SELECT c.*, (
+                    SELECT COUNT(*) FROM messages m WHERE m.conversation_id = c.id
+                ) AS message_count
+                FROM conversations c
+                """
+            ).fetchall()
+        return [{**dict(row), "settings": json.loads(row["settings"])} for row in rows]
+
+    def load_messages(
+        self, conv_id: str, offset: int = 0, limit: Optional[int] = None
+    ) -> List[Dict]:
+        """Konuşmanın mesajlarını eklenme sırasıyla yükle (isteğe bağlı pencere)"""
+        self.flush()
+        with self._db_lock:
+            rows = self._conn.execute(
+                "SELECT id, role, content, timestamp FROM messages "
+                "WHERE conversation_id = ? ORDER BY seq LIMIT ? OFFSET ?",
+                (conv_id, -1 if limit is None else limit, offset),
+            ).fetchall()
+        return [dict(row) for row in rows]
+
+    def load_memory(self, conv_id: str) -> List[Dict]:
+        """Agent hafızasını sırasıyla yükle.
+
+        Raises:
+            ValueError: Kayıtlı bir mesaj çözümlenemezse
+        """
+        self.flush()
+        with self._db_lock:
+            rows = self._conn.execute(
+                "SELECT position, data FROM memories "
+                "WHERE conversation_id = ? ORDER BY position",
+                (conv_id,),
+            ).fetchall()
+        messages = []
+        for row in rows:
+            try:
+                messages.append(json.loads(row["data"]))
+            except json.JSONDecodeError as e:
+                raise ValueError(
+                    f"Hafıza mesajı çözümlenemedi ({conv_id}#{row['position']}): {e}"
+                ) from e
+        return messages
+
+    def stats(self) -> Dict[str, Any]:
+        with self._pending_lock:
+            pending = len(self._pending)
+        return {
+            "pending_writes": pending,
+            "written": self.written,
+            "flushes": self.flushes,
+            "failed_flushes": self.failed_flushes,
+            "dropped": self.dropped,
+            "last_error": self.last_error,
+        }